@@ -0,0 +1,58 @@
+"""Compare the JSON codec backends on recorded DataBus and Fleet API samples.
+
+Usage: python benchmarks/bench_codec.py [iterations]
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from wingxtra_plugin import codec  # noqa: E402
+
+DATABUS_SAMPLES: dict[str, bytes] = {
+    "9102": (
+        b'{"ty":"uv","sd":"WX-DRN-001","tg":"_GD_","mt":9102,"ms":{"la":56037123,"ln":-1870456,'
+        b'"a":120300,"r":35210,"ha":120.3,"y":187.4,"vx":412,"vy":-37,"vz":3}}'
+    ),
+    "GPS": (
+        b'{"ty":"uv","sd":"WX-DRN-001","tg":"_GD_","mt":1002,"ms":{"lat":5.6037123,"lon":-0.1870456,'
+        b'"alt":120.3,"3D":3,"SATC":17,"hdop":0.8,"vdop":1.1,"p":"G","ts":1718000000123}}'
+    ),
+    "NAV_INFO": (
+        b'{"ty":"uv","sd":"WX-DRN-001","tg":"_GD_","mt":1036,"ms":{"a":0.012,"b":-0.034,"y":3.271,'
+        b'"groundspeed":12.4,"yaw":187.4,"armed":true,"mode":"AUTO","rssi":-61,"d":142.7,'
+        b'"e":0.3,"f":-0.1,"g":5.2,"h":180.0,"i":3,"j":12}}'
+    ),
+}
+
+PAYLOAD_SAMPLE = {
+    "schema_version": 1,
+    "drone_id": "WX-DRN-001",
+    "ts": "2024-06-10T06:13:20.123Z",
+    "position": {"lat": 5.6037123, "lon": -0.1870456, "alt_m": 120.3},
+    "attitude": {"yaw_deg": 187.4},
+    "velocity": {"groundspeed_mps": 12.4},
+    "state": {"armed": True, "mode": "AUTO"},
+    "battery": {"voltage_v": 22.1, "remaining_pct": 81},
+    "link": {"rssi_dbm": -61},
+}
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"default backend: {codec.BACKEND}; iterations: {iterations}")
+    for name, (loads, dumps) in codec.BACKENDS.items():
+        for label, raw in DATABUS_SAMPLES.items():
+            view = memoryview(bytearray(raw))
+            seconds = timeit.timeit(lambda: loads(view), number=iterations)
+            print(f"{name:>7} loads {label:<9} {seconds / iterations * 1e6:7.2f} us/msg")
+        seconds = timeit.timeit(lambda: dumps(PAYLOAD_SAMPLE), number=iterations)
+        print(f"{name:>7} dumps payload   {seconds / iterations * 1e6:7.2f} us/msg")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Compare shape-cached field extraction with the previous alias probing.
+
+Usage: python benchmarks/bench_extract.py [iterations]
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import timeit
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_codec import DATABUS_SAMPLES  # noqa: E402
+
+from wingxtra_plugin.databus_client import _GPS_FIELDS, _NAV_FIELDS  # noqa: E402
+
+
+def _coalesce(data: dict[str, Any], *keys: str, default: Any = None) -> Any:
+    """The alias probing `ShapeExtractor` replaced."""
+    for key in keys:
+        if key in data and data[key] is not None:
+            return data[key]
+    return default
+
+
+def probe_gps(cmd: dict[str, Any]) -> tuple[Any, ...]:
+    return (
+        _coalesce(cmd, "lat", "latitude", "y"),
+        _coalesce(cmd, "lon", "lng", "longitude", "x"),
+        _coalesce(cmd, "alt", "alt_m", "altitude", "z"),
+    )
+
+
+def probe_nav(cmd: dict[str, Any]) -> tuple[Any, ...]:
+    return (
+        _coalesce(cmd, "groundspeed", "groundspeed_mps", "speed"),
+        _coalesce(cmd, "yaw", "yaw_deg", "heading"),
+        _coalesce(cmd, "armed", default=False),
+        _coalesce(cmd, "mode", "flight_mode", default="UNKNOWN"),
+        _coalesce(cmd, "rssi", "rssi_dbm", default=None),
+    )
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"iterations: {iterations}")
+    cases = {
+        "GPS": (json.loads(DATABUS_SAMPLES["GPS"])["ms"], probe_gps, _GPS_FIELDS),
+        "NAV_INFO": (json.loads(DATABUS_SAMPLES["NAV_INFO"])["ms"], probe_nav, _NAV_FIELDS),
+    }
+    for label, (cmd, probe, extractor) in cases.items():
+        assert probe(cmd)[:2] == extractor(cmd)[:2]
+        for name, func in (("probe", probe), ("shaped", extractor)):
+            seconds = timeit.timeit(lambda: func(cmd), number=iterations)
+            print(f"{name:>7} {label:<9} {seconds / iterations * 1e6:7.2f} us/msg")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,42 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import os
+import random
 
+from wingxtra_plugin import metrics, tracing
+from wingxtra_plugin.adaptive import AdaptiveRate
+from wingxtra_plugin.aio import (
+    AsyncPayloadQueue,
+    AsyncTelemetrySender,
+    async_send_loop,
+    open_databus_endpoint,
+    watch_sniffer,
+)
 from wingxtra_plugin.config import Config
-from wingxtra_plugin.databus_client import DataBusClient
-from wingxtra_plugin.sender import TelemetrySender, send_loop
+from wingxtra_plugin.databus_client import DataBusClient, TelemetryState, apply_message
+from wingxtra_plugin.databus_lib.de_module import (
+    MODULE_CLASS_GENERIC,
+    MODULE_FEATURE_RECEIVING_TELEMETRY,
+    CModule,
+)
+from wingxtra_plugin.delta import DeltaEncoder
+from wingxtra_plugin.events import EventDetector, EventLane, state_payload
+from wingxtra_plugin.gateway import Gateway, UploadSettings, load_drone_table
+from wingxtra_plugin.pipeline import PayloadQueue, start_reader
+from wingxtra_plugin.sender import (
+    PayloadBatcher,
+    TelemetrySender,
+    send_batch_loop,
+    send_loop,
+    store_and_forward_loop,
+)
 from wingxtra_plugin.simulate import TelemetrySimulator
-from wingxtra_plugin.telemetry_mapper import iso_utc_now, map_databus_to_payload
+from wingxtra_plugin.sniffer import DataBusSniffer
+from wingxtra_plugin.spool import Spool
+from wingxtra_plugin.telemetry_mapper import map_databus_to_payload
+from wingxtra_plugin.timestamps import message_iso_ts
 
 
 def _extract_cmd(message: dict) -> dict | None:
@@ -38,13 +68,14 @@ def _build_payload_from_9102(drone_id: str, message: dict) -> dict | None:
     if lat is None or lon is None:
         return None
 
+    metrics.PAYLOADS_BUILT.inc()
     lat = float(lat) / 1e7
     lon = float(lon) / 1e7
 
     payload: dict = {
         "schema_version": 1,
         "drone_id": drone_id,
-        "ts": iso_utc_now(),
+        "ts": message_iso_ts(message),
         "position": {
             "lat": lat,
             "lon": lon,
@@ -65,13 +96,46 @@ def main() -> None:
         format="%(asctime)s %(levelname)s %(name)s :: %(message)s",
     )
 
-    sender = TelemetrySender(config.api_url, config.api_key, timeout_seconds=config.http_timeout_seconds)
+    if config.metrics_port:
+        metrics.start_metrics_server(config.metrics_port, config.metrics_host)
+    tracing.configure(config.trace_sample_every, config.trace_capacity)
+    tracing.install_signal_handlers(
+        tracing.ProfileToggle(config.profile_dir, config.profile_mode) if config.profile_dir else None
+    )
+
+    if config.gateway_enabled:
+        _warn_ignored(config, "gateway mode", {"WIRE_FORMAT", "HTTP_COMPRESSION", "EVENT_LANE"})
+        run_gateway(config)
+        return
+
+    if config.async_runtime:
+        _warn_ignored(config, "ASYNC_RUNTIME", {"EVENT_LANE"})
+        asyncio.run(main_async(config))
+        return
+
+    sender = TelemetrySender(
+        config.api_url,
+        config.api_key,
+        timeout_seconds=config.http_timeout_seconds,
+        compression=config.http_compression,
+        compression_min_bytes=config.http_compression_min_bytes,
+        wire_format=config.wire_format,
+    )
+    events = _start_event_lane(config)
 
     if config.simulate:
         sim = TelemetrySimulator()
 
-        def get_payload() -> dict:
-            return map_databus_to_payload(config.drone_id, sim.next())
+        def get_payload(timeout: float | None = None) -> dict | None:
+            # one sample per send tick: batching's non-blocking poll finds nothing queued
+            if timeout == 0:
+                return None
+            started = tracing.MAP.start()
+            payload = map_databus_to_payload(config.drone_id, sim.next())
+            tracing.MAP.stop(started)
+            if events is not None:
+                events.observe(payload)
+            return payload
 
     else:
         client = DataBusClient(
@@ -81,24 +145,246 @@ def main() -> None:
             listen_port=config.de_listen_port,
             module_name=config.de_module_name,
             message_filter=list(config.de_subscriptions),
+            sniff_mode=config.sniff_mode,
+            sniff_iface=config.sniff_iface,
+            sniff_capture=config.sniff_capture,
         )
 
-        def get_payload() -> dict:
-            while True:
-                message = client.read_one_databus_message()
+        stream = client.messages()
+        state = client.state
+        seen_version = state.version
+
+        def read_payload() -> dict:
+            nonlocal seen_version
+            for message in stream:
                 if not isinstance(message, dict):
                     continue
+                if events is not None and state.version != seen_version:
+                    # check on arrival, not on the send grid
+                    seen_version = state.version
+                    events.observe(state_payload(config.drone_id, message_iso_ts(message), state.to_payload()))
+                started = tracing.MAP.start()
                 payload = _build_payload_from_9102(config.drone_id, message)
+                tracing.MAP.stop(started)
                 if payload is not None:
-                    return payload
+                    # 9102 carries position/yaw; battery, speed, mode and link come from the fused state
+                    return state.merge_into(payload)
+            raise RuntimeError("DataBus message stream ended")
+
+        # keep reading DataBus while uploads are slow or backing off
+        queue = PayloadQueue(maxsize=config.queue_size, policy=config.queue_policy)
+        start_reader(read_payload, queue)
+        metrics.QUEUE_DEPTH.set_function(lambda: queue.stats().depth)
+        get_payload = queue.get
+
+    if (config.delta_encoding or config.adaptive_rate) and (config.spool_dir or config.batching_enabled):
+        logging.getLogger(__name__).warning("DELTA_ENCODING and ADAPTIVE_RATE are ignored with SPOOL_DIR or batching")
+
+    if config.spool_dir:
+        store_and_forward_loop(
+            get_payload=get_payload,
+            sender=sender,
+            spool=Spool(
+                config.spool_dir,
+                max_total_bytes=config.spool_max_bytes,
+                max_age_seconds=config.spool_max_age_seconds,
+            ),
+            send_interval_seconds=config.send_interval_seconds,
+            offline_backoff_seconds=config.offline_backoff_seconds,
+            replay_batch_items=config.spool_replay_batch_items,
+            replay_interval_seconds=config.spool_replay_interval_seconds,
+            overrun_policy=config.send_overrun_policy,
+        )
+        return
+
+    if config.batching_enabled:
+        send_batch_loop(
+            get_payload=get_payload,
+            sender=sender,
+            batcher=PayloadBatcher(
+                max_items=config.batch_max_items,
+                max_bytes=config.batch_max_bytes,
+                max_age_seconds=config.batch_max_age_seconds,
+            ),
+            send_interval_seconds=config.send_interval_seconds,
+            offline_backoff_seconds=config.offline_backoff_seconds,
+            ndjson=config.batch_format == "ndjson",
+            overrun_policy=config.send_overrun_policy,
+        )
+        return
 
     send_loop(
         get_payload=get_payload,
         sender=sender,
         send_interval_seconds=config.send_interval_seconds,
         offline_backoff_seconds=config.offline_backoff_seconds,
+        overrun_policy=config.send_overrun_policy,
+        delta=DeltaEncoder(config.delta_keyframe_seconds) if config.delta_encoding else None,
+        rate=(
+            AdaptiveRate(
+                base_hz=config.send_hz,
+                min_hz=config.send_hz_min,
+                max_hz=config.send_hz_max,
+                weak_rssi_dbm=config.weak_link_rssi_dbm,
+            )
+            if config.adaptive_rate
+            else None
+        ),
+    )
+
+
+def _warn_ignored(config: Config, runtime: str, supported: set[str]) -> None:
+    active = {
+        "DELTA_ENCODING": config.delta_encoding,
+        "ADAPTIVE_RATE": config.adaptive_rate,
+        "WIRE_FORMAT": config.wire_format != "json",
+        "HTTP_COMPRESSION": config.http_compression != "none",
+        "SPOOL_DIR": bool(config.spool_dir),
+        "BATCH_MAX_ITEMS": config.batching_enabled,
+        "EVENT_LANE": config.event_lane,
+    }
+    ignored = [name for name, enabled in active.items() if enabled and name not in supported]
+    if ignored:
+        logging.getLogger(__name__).warning("%s ignored with %s", ", ".join(ignored), runtime)
+
+
+def _start_event_lane(config: Config) -> EventLane | None:
+    if not config.event_lane:
+        return None
+    # JSON on its own connection: the binary layout has no room for events
+    lane = EventLane(
+        TelemetrySender(config.api_url, config.api_key, timeout_seconds=config.http_timeout_seconds),
+        EventDetector(
+            battery_thresholds_pct=tuple(float(t) for t in config.event_battery_thresholds),
+            link_lost_rssi_dbm=config.event_link_lost_rssi_dbm,
+        ),
+        max_attempts=config.event_max_attempts,
+    )
+    lane.start()
+    return lane
+
+
+def run_gateway(config: Config) -> None:
+    """Relay DataBus telemetry for every drone in `GATEWAY_TABLE`."""
+    gateway = Gateway(
+        load_drone_table(config.gateway_table),
+        _build_payload_from_9102,
+        UploadSettings(
+            api_url=config.api_url,
+            api_key=config.api_key,
+            timeout_seconds=config.http_timeout_seconds,
+            compression=config.http_compression,
+            compression_min_bytes=config.http_compression_min_bytes,
+            wire_format=config.wire_format,
+            send_interval_seconds=config.send_interval_seconds,
+            offline_backoff_seconds=config.offline_backoff_seconds,
+            max_concurrency=config.http_max_concurrency,
+            event_lane=config.event_lane,
+            event_battery_thresholds=tuple(float(t) for t in config.event_battery_thresholds),
+            event_link_lost_rssi_dbm=config.event_link_lost_rssi_dbm,
+            event_max_attempts=config.event_max_attempts,
+        ),
+        workers=config.gateway_workers or os.cpu_count() or 1,
+    )
+    client = DataBusClient(
+        comm_host=config.de_comm_host,
+        comm_port=config.de_comm_port,
+        listen_host=config.de_listen_host,
+        listen_port=config.de_listen_port,
+        module_name=config.de_module_name,
+        message_filter=list(config.de_subscriptions),
+        sniff_mode=config.sniff_mode,
+        sniff_iface=config.sniff_iface,
+        sniff_capture=config.sniff_capture,
     )
 
+    gateway.start()
+    try:
+        for message in client.messages():
+            if isinstance(message, dict):
+                gateway.dispatch(message)
+    finally:
+        gateway.stop()
+        client.close()
+
+
+async def main_async(config: Config) -> None:
+    """Run ingestion and uploads on one event loop (`ASYNC_RUNTIME=true`)."""
+    sender = AsyncTelemetrySender(
+        config.api_url,
+        config.api_key,
+        timeout_seconds=config.http_timeout_seconds,
+        max_concurrency=config.http_max_concurrency,
+    )
+    queue = AsyncPayloadQueue(maxsize=config.queue_size, policy=config.queue_policy)
+    metrics.QUEUE_DEPTH.set_function(lambda: queue.stats().depth)
+    state = TelemetryState()
+    events = _start_event_lane(config)
+    seen_version = state.version
+    cleanup = []
+
+    def on_message(message: dict) -> None:
+        nonlocal seen_version
+        started = tracing.MAP.start()
+        payload = _build_payload_from_9102(config.drone_id, message)
+        tracing.MAP.stop(started)
+        if payload is not None:
+            queue.put(state.merge_into(payload))
+            return
+        apply_message(state, message)
+        if events is not None and state.version != seen_version:
+            seen_version = state.version
+            events.observe(state_payload(config.drone_id, message_iso_ts(message), state.to_payload()))
+
+    if config.simulate:
+        sim = TelemetrySimulator()
+
+        async def simulate() -> None:
+            while True:
+                payload = map_databus_to_payload(config.drone_id, sim.next())
+                if events is not None:
+                    events.observe(payload)
+                queue.put(payload)
+                await asyncio.sleep(config.send_interval_seconds)
+
+        cleanup.append(asyncio.create_task(simulate()).cancel)
+    elif config.sniff_mode:
+        sniffer = DataBusSniffer(config.de_comm_port, iface=config.sniff_iface, capture=config.sniff_capture)
+        sniffer.open()
+        cleanup += [sniffer.close, watch_sniffer(sniffer, on_message)]
+    else:
+        module = CModule()
+        module.defineModule(
+            module_class=MODULE_CLASS_GENERIC,
+            module_name=config.de_module_name,
+            module_key="".join(str(random.randint(0, 9)) for _ in range(12)),
+            module_version="0.1.0",
+            message_filter=list(config.de_subscriptions),
+        )
+        module.addModuleFeatures(MODULE_FEATURE_RECEIVING_TELEMETRY)
+        transport = await open_databus_endpoint(
+            module,
+            on_message,
+            comm_host=config.de_comm_host,
+            comm_port=config.de_comm_port,
+            listen_host=config.de_listen_host,
+            listen_port=config.de_listen_port,
+        )
+        cleanup.append(transport.close)
+
+    try:
+        await async_send_loop(
+            queue=queue,
+            sender=sender,
+            send_interval_seconds=config.send_interval_seconds,
+            offline_backoff_seconds=config.offline_backoff_seconds,
+            overrun_policy=config.send_overrun_policy,
+        )
+    finally:
+        for stop in reversed(cleanup):
+            stop()
+        await sender.close()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import gzip
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+
+from wingxtra_plugin.wire import CONTENT_TYPE_BINARY, decode_payload
+
+
+class _RecordingHandler(BaseHTTPRequestHandler):
+    """Fleet API stand-in; behaviour is set on the server, see `telemetry_server`."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):  # noqa: N802
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        time.sleep(server.response_delay)
+        binary = self.headers.get("Content-Type") == CONTENT_TYPE_BINARY
+        if binary and not server.accept_binary:
+            self.send_response(415)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        encoding = self.headers.get("Content-Encoding")
+        if encoding is not None and server.accept_encoding is None:
+            self.send_response(415)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        server.requests.append(
+            {
+                "api_key": self.headers.get("X-API-Key"),
+                "peer": self.client_address,
+                "encoding": encoding,
+                "binary": binary,
+                "body": decode_payload(body) if binary else json.loads(body),
+            }
+        )
+        self.send_response(200)
+        if server.accept_encoding is not None:
+            self.send_header("Accept-Encoding", server.accept_encoding)
+        self.send_header("Content-Length", str(len(server.response_body)))
+        self.end_headers()
+        self.wfile.write(server.response_body)
+
+    def log_message(self, *_args):
+        return
+
+
+@pytest.fixture
+def telemetry_server():
+    """A recording HTTP server on a free port.
+
+    Each POST lands in `server.requests`. Set `response_body`, `accept_encoding`,
+    `accept_binary` or `response_delay` on the server to change how it answers.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RecordingHandler)
+    server.requests = []
+    server.response_body = b""
+    server.accept_encoding = None
+    server.accept_binary = False
+    server.response_delay = 0.0
+    Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
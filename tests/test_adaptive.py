@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from wingxtra_plugin.adaptive import AdaptiveRate
+
+
+def _payload(lat: float, speed: float = 0.0, armed: bool = True, rssi: float = -60.0, yaw: float = 90.0) -> dict:
+    return {
+        "schema_version": 1,
+        "drone_id": "WX-DRN-001",
+        "position": {"lat": lat, "lon": -0.187, "alt_m": 120.0},
+        "velocity": {"groundspeed_mps": speed},
+        "attitude": {"yaw_deg": yaw},
+        "state": {"armed": armed, "mode": "AUTO"},
+        "link": {"rssi_dbm": rssi},
+    }
+
+
+def test_adaptive_rate_rises_with_groundspeed() -> None:
+    rate = AdaptiveRate(base_hz=2.0, min_hz=0.2, max_hz=5.0, speed_full_mps=10.0)
+
+    rate.observe(_payload(5.6, speed=2.0), now=0.0)
+    slow = rate.hz
+    rate.observe(_payload(5.601, speed=10.0), now=1.0)
+
+    assert 2.0 < slow < 5.0
+    assert rate.hz == 5.0
+    assert rate.interval_seconds == 0.2
+
+
+def test_adaptive_rate_floors_when_disarmed_stationary_or_weak_link() -> None:
+    for payload in (
+        _payload(5.6, speed=12.0, armed=False),
+        _payload(5.6, speed=12.0, rssi=-95.0),
+        _payload(5.6, speed=0.1),
+    ):
+        rate = AdaptiveRate(min_hz=0.2)
+        rate.observe(payload, now=0.0)
+        assert rate.hz == 0.2
+
+
+def test_adaptive_rate_suppresses_samples_inside_the_deadband() -> None:
+    rate = AdaptiveRate(min_hz=0.2, deadband_m=0.5, deadband_yaw_deg=2.0)
+
+    assert rate.observe(_payload(5.6), now=0.0) is True
+    assert rate.observe(_payload(5.6, yaw=91.0), now=1.0) is False
+    assert rate.observe(_payload(5.60001, yaw=91.0), now=2.0) is True  # ~1.1 m
+    # a heartbeat still goes out once per min_hz interval
+    assert rate.observe(_payload(5.60001, yaw=91.0), now=7.5) is True
+    assert rate.suppressed == 1
+
+
+def test_adaptive_rate_uses_its_own_stationary_yaw_and_climb_limits() -> None:
+    def hover(yaw: float, alt: float) -> dict:
+        payload = _payload(5.6, yaw=yaw)
+        payload["position"]["alt_m"] = alt
+        return payload
+
+    slow_drift = AdaptiveRate(min_hz=0.2, stationary_yaw_rate_dps=3.0, stationary_climb_mps=0.2)
+    slow_drift.observe(hover(90.0, 120.0), now=0.0)
+    slow_drift.observe(hover(92.5, 120.1), now=1.0)
+    assert slow_drift.hz == 0.2
+
+    pirouette = AdaptiveRate(min_hz=0.2, stationary_yaw_rate_dps=3.0)
+    pirouette.observe(hover(90.0, 120.0), now=0.0)
+    pirouette.observe(hover(95.0, 120.0), now=1.0)
+    assert pirouette.hz > 0.2
+
+    # a slow climb below the groundspeed threshold still counts as moving
+    climbing = AdaptiveRate(min_hz=0.2, stationary_speed_mps=0.5, stationary_climb_mps=0.2)
+    climbing.observe(hover(90.0, 120.0), now=0.0)
+    climbing.observe(hover(90.0, 120.4), now=1.0)
+    assert climbing.hz > 0.2
+
+
+def test_adaptive_rate_deadband_tolerates_battery_and_rssi_jitter() -> None:
+    def sample(voltage: float, remaining: float, rssi: float) -> dict:
+        payload = _payload(5.6, rssi=rssi)
+        payload["battery"] = {"voltage_v": voltage, "remaining_pct": remaining}
+        return payload
+
+    rate = AdaptiveRate(min_hz=0.2, deadband_voltage_v=0.05, deadband_battery_pct=1.0, deadband_rssi_db=2.0)
+
+    assert rate.observe(sample(16.20, 80.0, -60.0), now=0.0) is True
+    assert rate.observe(sample(16.18, 79.6, -61.0), now=0.5) is False
+    assert rate.observe(sample(16.23, 80.4, -59.0), now=1.0) is False
+    assert rate.observe(sample(16.10, 80.0, -60.0), now=1.5) is True  # voltage sag
+    assert rate.observe(sample(16.10, 80.0, -65.0), now=2.0) is True  # link fade
+    assert rate.suppressed == 2
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import socket
+
+from wingxtra_plugin.aio import AsyncPayloadQueue, AsyncTelemetrySender, open_databus_endpoint
+from wingxtra_plugin.databus_lib.de_module import CModule
+from wingxtra_plugin.databus_lib.udpClient import split_chunks
+
+
+def test_async_sender_reuses_keep_alive_connection(telemetry_server) -> None:
+    async def run() -> None:
+        sender = AsyncTelemetrySender(f"http://127.0.0.1:{telemetry_server.server_address[1]}/api/v1/telemetry", "top-secret")
+        try:
+            for seq in range(3):
+                await sender.send({"seq": seq})
+            assert sender.last_timing is not None and sender.last_timing.reused_connection
+        finally:
+            await sender.close()
+
+    asyncio.run(run())
+
+    assert [req["body"]["seq"] for req in telemetry_server.requests] == [0, 1, 2]
+    assert {req["api_key"] for req in telemetry_server.requests} == {"top-secret"}
+    assert len({req["peer"] for req in telemetry_server.requests}) == 1
+
+
+def test_async_queue_overflow_policies() -> None:
+    async def run() -> None:
+        latest = AsyncPayloadQueue(maxsize=1, policy="latest")
+        latest.put(1)
+        latest.put(2)
+        assert await latest.get() == 2
+
+        oldest = AsyncPayloadQueue(maxsize=2, policy="drop_oldest")
+        for item in (1, 2, 3):
+            oldest.put(item)
+        assert [await oldest.get(), await oldest.get()] == [2, 3]
+
+        block = AsyncPayloadQueue(maxsize=1, policy="block")
+        block.put(1)
+        block.put(2)
+        assert await block.get() == 1
+        assert block.stats().dropped == 1
+
+    asyncio.run(run())
+
+
+def test_databus_endpoint_registers_and_decodes_chunked_messages() -> None:
+    comm = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    comm.bind(("127.0.0.1", 0))
+    comm.settimeout(1.0)
+
+    module = CModule()
+    module.defineModule("MODULE_CLASS_GENERIC", "WX", "123", "0.1.0", message_filter=[1002])
+
+    async def run() -> list[dict]:
+        received: list[dict] = []
+        transport = await open_databus_endpoint(
+            module,
+            received.append,
+            comm_host="127.0.0.1",
+            comm_port=comm.getsockname()[1],
+            listen_host="127.0.0.1",
+            listen_port=0,
+        )
+        try:
+            hello, _ = comm.recvfrom(8192)
+            assert json.loads(hello)["event"] == "register"
+
+            target = transport.get_extra_info("sockname")
+            wanted = json.dumps({"mt": 1002, "ms": {"lat": 1, "pad": "x" * 100}}).encode("utf-8")
+            for datagram in [json.dumps({"mt": 1003}).encode("utf-8"), *split_chunks(wanted, 32)]:
+                comm.sendto(datagram, target)
+            for _ in range(50):
+                if received:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            transport.close()
+        return received
+
+    try:
+        received = asyncio.run(run())
+    finally:
+        comm.close()
+
+    assert [message["ms"]["lat"] for message in received] == [1]
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import pytest
+
+from wingxtra_plugin import codec
+
+
+@pytest.mark.parametrize("backend", sorted(codec.BACKENDS))
+def test_codec_backends_round_trip_bytes_and_views(backend: str) -> None:
+    loads, dumps = codec.BACKENDS[backend]
+    message = {"mt": 9102, "ms": {"la": 56037000, "ln": -1870000, "y": 45.5}}
+
+    encoded = dumps(message)
+
+    assert isinstance(encoded, bytes)
+    assert loads(encoded) == message
+    assert loads(memoryview(bytearray(b"xx" + encoded))[2:]) == message
+    with pytest.raises(ValueError):
+        loads(b"{not json")
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from wingxtra_plugin.databus_client import DataBusClient
+from wingxtra_plugin.databus_client import DataBusClient, TelemetryState
 from wingxtra_plugin.databus_lib.messages import (
     ANDRUAV_PROTOCOL_MESSAGE_CMD,
     ANDRUAV_PROTOCOL_MESSAGE_TYPE,
@@ -83,3 +83,21 @@ def test_databus_client_handles_string_message_type_and_mt_ms_keys() -> None:
     payload = client.receive()
 
     assert payload["position"] == {"lat": 5.6037, "lon": -0.187, "alt_m": 120.3}
+
+
+def test_telemetry_state_versions_only_move_on_real_changes() -> None:
+    state = TelemetryState()
+    assert state.to_payload() == {}
+
+    assert state.update_position(1.0, 2.0, 3.0) is True
+    payload = state.to_payload()
+    assert payload == {"position": {"lat": 1.0, "lon": 2.0, "alt_m": 3.0}}
+
+    assert state.update_position(1.0, 2.0, 3.0) is False
+    assert state.to_payload() is payload
+    assert state.section_version("position") == 1
+
+    state.update_battery(15.2, 80)
+    fused = state.merge_into({"position": {"lat": 9.0}})
+    assert fused == {"position": {"lat": 9.0}, "battery": {"voltage_v": 15.2, "remaining_pct": 80}}
+    assert state.to_payload()["position"] is payload["position"]
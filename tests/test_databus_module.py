@@ -1,20 +1,30 @@
 from __future__ import annotations
 
 import json
+import socket
+import time
 
-from wingxtra_plugin.databus_lib.de_module import CModule
-from wingxtra_plugin.databus_lib.messages import TYPE_AndruavMessage_GPS
+from wingxtra_plugin import metrics
+from wingxtra_plugin.databus_lib.de_module import _UNDECIDED, CModule, _peek_message_type
+from wingxtra_plugin.databus_lib.messages import TYPE_AndruavMessage_GPS, TYPE_AndruavMessage_POWER
+from wingxtra_plugin.databus_lib.udpClient import ChunkReassembler, UdpClient
 
 
 class FakeUdp:
     def __init__(self, packets: list[bytes]):
         self._packets = packets
+        self.batch_timestamps: list[float | None] = []
 
     def recv(self):
         if not self._packets:
             return None
         return self._packets.pop(0)
 
+    def recv_batch(self):
+        batch = [memoryview(packet) for packet in self._packets]
+        self._packets = []
+        return batch
+
     def send(self, host: str, port: int, payload: bytes):
         self.sent = (host, port, payload)
 
@@ -35,3 +45,146 @@ def test_demodule_filters_using_numeric_string_message_type() -> None:
     msg = module.receive_message()
 
     assert msg["mt"] == "1002"
+
+
+def test_demodule_drains_whole_batch_in_one_pass() -> None:
+    module = CModule()
+    module.defineModule(
+        module_class="MODULE_CLASS_GENERIC",
+        module_name="WX_TELEMETRY_SENDER",
+        module_key="123456789012",
+        module_version="0.1.0",
+        message_filter=[TYPE_AndruavMessage_GPS],
+    )
+    received: list[dict] = []
+    module.m_OnReceive = received.append
+    module._udp = FakeUdp(
+        [
+            b'{"mt": 1002, "ms": {"lat": 1}}',
+            b'{"mt": 1003, "ms": {}}',
+            b"not json",
+            b'{"mt": 1002, "ms": {"lat": 2}}',
+        ]
+    )
+
+    messages = module.drain_messages()
+
+    assert [m["ms"]["lat"] for m in messages] == [1, 2]
+    assert received == messages
+
+
+def test_udp_client_recv_batch_returns_views_for_queued_datagrams() -> None:
+    client = UdpClient("127.0.0.1", 0, packet_size=256, batch_size=8)
+    port = client._sock.getsockname()[1]
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as tx:
+            for seq in range(5):
+                tx.sendto(json.dumps({"mt": TYPE_AndruavMessage_POWER, "seq": seq}).encode("utf-8"), ("127.0.0.1", port))
+            tx.sendto(b'0|{"mt": 6502, ', ("127.0.0.1", port))
+            tx.sendto(b'65535:1|"seq": 5}', ("127.0.0.1", port))
+
+        batch = client.recv_batch()
+
+        assert all(isinstance(view, memoryview) for view in batch)
+        assert [json.loads(bytes(view))["seq"] for view in batch] == [0, 1, 2, 3, 4, 5]
+        assert len(client.batch_timestamps) == 6
+        assert all(abs(stamp - time.time()) < 5 for stamp in client.batch_timestamps)
+    finally:
+        client.close()
+
+
+def test_udp_client_reassembles_chunked_payload_from_send() -> None:
+    receiver = UdpClient("127.0.0.1", 0, packet_size=64)
+    sender = UdpClient("127.0.0.1", 0, packet_size=64)
+    port = receiver._sock.getsockname()[1]
+    message = {"mt": 1036, "ms": {"note": "x" * 300}}
+    try:
+        sender.send("127.0.0.1", port, json.dumps(message).encode("utf-8"))
+
+        received = None
+        while received is None:
+            received = receiver.recv()
+
+        assert json.loads(received) == message
+        assert receiver.reassembly_stats.completed == 1
+    finally:
+        sender.close()
+        receiver.close()
+
+
+def test_chunk_reassembler_counts_incomplete_and_evicted_messages() -> None:
+    reassembler = ChunkReassembler(max_bytes=10, timeout_s=1.0)
+
+    assert reassembler.feed("a", b"0|aaaa", now=0.0) is None
+    assert reassembler.feed("a", b"0|bbbb", now=0.1) is None  # restart drops the first message
+    assert reassembler.feed("a", b"65535:1|cc", now=0.2) == b"bbbbcc"
+    assert reassembler.feed("b", b"0|dddd", now=0.3) is None
+    assert reassembler.feed("c", b"0|eeeeeeee", now=0.4) is None  # over the cap, evicts "b"
+    assert reassembler.feed("c", b"2|ee", now=2.0) is None  # "c" expired first
+    assert reassembler.feed("c", b"65535:2|ee", now=2.1) is None  # waits for 0 and 1
+    assert reassembler.feed("c", b"65535|ee", now=2.2) is None  # final chunk without a position
+
+    assert reassembler.stats.completed == 1
+    assert reassembler.stats.incomplete == 3
+    assert reassembler.stats.evicted == 1
+    assert reassembler.pending_bytes == 0
+
+
+def test_peek_message_type_reads_top_level_type_without_decoding() -> None:
+    assert _peek_message_type(b'{"ty": "uv", "mt": 1036, "ms": {"type": 5}}') == 1036
+    assert _peek_message_type(memoryview(b'{"mt": "1002", "ms": {}}')) == 1002
+    assert _peek_message_type(b'{"messageType": 1003, "cmd": "x"}') == 1003
+    assert _peek_message_type(b'{"message_type": "abc", "type": 1002}') is None
+    assert _peek_message_type(b'{"ms": {"mt": 1}, "mt": 1002}') is _UNDECIDED
+    assert _peek_message_type(b'{"cmd": {}, "type": 1002}') is _UNDECIDED
+
+
+def test_module_exposes_reassembly_stats_and_metrics() -> None:
+    module = CModule()
+    assert module.reassembly_stats.completed == 0
+
+    module.initUDPChannel("127.0.0.1", 60000, "127.0.0.1", 0, packet_size=64)
+    sender = UdpClient("127.0.0.1", 0, packet_size=64)
+    port = module._udp._sock.getsockname()[1]
+    before = dict(metrics.DATABUS_REASSEMBLY.samples())
+    try:
+        sender.send("127.0.0.1", port, json.dumps({"mt": 1036, "ms": {"note": "x" * 300}}).encode("utf-8"))
+        received = None
+        while received is None:
+            received = module._udp.recv()
+    finally:
+        sender.close()
+        module._udp.close()
+
+    assert module.reassembly_stats.completed == 1
+    after = dict(metrics.DATABUS_REASSEMBLY.samples())
+    assert after['{outcome="completed"}'] == before.get('{outcome="completed"}', 0) + 1
+
+
+def test_chunk_reassembler_accepts_chunks_in_any_order() -> None:
+    reassembler = ChunkReassembler()
+
+    assert reassembler.feed("a", b"0|aa", now=0.0) is None
+    assert reassembler.feed("a", b"65535:2|cc", now=0.1) is None  # chunk 1 still missing
+    assert reassembler.feed("a", b"1|bb", now=0.2) == b"aabbcc"
+
+    assert reassembler.feed("b", b"1|bb", now=0.3) is None
+    assert reassembler.feed("b", b"0|aa", now=0.4) is None  # not a restart: no index 0 held yet
+    assert reassembler.feed("b", b"65535:2|cc", now=0.5) == b"aabbcc"
+
+    assert reassembler.stats.completed == 2
+    assert reassembler.stats.incomplete == 0
+    assert reassembler.pending_bytes == 0
+
+
+def test_chunk_reassembler_never_completes_a_message_with_a_lost_middle_chunk() -> None:
+    reassembler = ChunkReassembler(timeout_s=1.0)
+
+    assert reassembler.feed("a", b"0|aa", now=0.0) is None
+    assert reassembler.feed("a", b"65535:2|cc", now=0.1) is None
+    assert reassembler.feed("a", b"0|xx", now=0.2) is None  # next message starts, the torn one is dropped
+    assert reassembler.feed("a", b"65535:1|yy", now=0.3) == b"xxyy"
+
+    assert reassembler.stats.completed == 1
+    assert reassembler.stats.incomplete == 1
+    assert reassembler.pending_bytes == 0
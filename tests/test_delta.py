@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import pytest
+
+from wingxtra_plugin.delta import DeltaEncoder
+from wingxtra_plugin.sender import send_loop
+
+
+class _Done(Exception):
+    pass
+
+
+def _payload(lat: float, yaw: float, mode: str = "AUTO") -> dict:
+    return {
+        "schema_version": 1,
+        "drone_id": "WX-DRN-001",
+        "ts": "2026-01-01T00:00:00.000Z",
+        "position": {"lat": lat, "lon": -0.187, "alt_m": 120.0},
+        "attitude": {"yaw_deg": yaw},
+        "state": {"armed": True, "mode": mode},
+    }
+
+
+def test_delta_encoder_sends_only_fields_beyond_tolerance() -> None:
+    encoder = DeltaEncoder(keyframe_interval_seconds=10.0)
+
+    first = encoder.encode(_payload(5.6037, 45.0), now=0.0)
+    encoder.ack()
+    assert first["schema_version"] == 2 and first["keyframe"] is True
+    assert first["position"] == {"lat": 5.6037, "lon": -0.187, "alt_m": 120.0}
+
+    # yaw within 1 degree: suppressed; lat moved ~1 m and mode changed: sent
+    second = encoder.encode(_payload(5.60371, 45.4, mode="RTL"), now=1.0)
+    encoder.ack()
+    assert second["keyframe"] is False
+    assert second["base_seq"] == first["seq"]
+    assert second["position"] == {"lat": 5.60371}
+    assert second["state"] == {"mode": "RTL"}
+    assert "attitude" not in second
+    assert second["drone_id"] == "WX-DRN-001" and "ts" in second
+
+    # small drifts accumulate against the acknowledged value
+    assert "attitude" in encoder.encode(_payload(5.60371, 46.2, mode="RTL"), now=2.0)
+
+
+def test_delta_encoder_sends_keyframes_on_interval_and_after_reset() -> None:
+    encoder = DeltaEncoder(keyframe_interval_seconds=5.0)
+    encoder.encode(_payload(5.6, 45.0), now=0.0)
+    encoder.ack()
+
+    assert encoder.encode(_payload(5.6, 45.0), now=1.0)["keyframe"] is False
+    encoder.ack()
+    assert encoder.encode(_payload(5.6, 45.0), now=5.0)["keyframe"] is True
+    encoder.ack()
+
+    encoder.encode(_payload(5.6, 45.0), now=6.0)
+    encoder.reset()
+    assert encoder.encode(_payload(5.6, 45.0), now=7.0)["keyframe"] is True
+
+
+def test_send_loop_resends_keyframe_after_failed_delta(monkeypatch) -> None:
+    sent: list[dict] = []
+
+    class FakeSender:
+        def send(self, payload: dict) -> None:
+            sent.append(payload)
+            if len(sent) == 2:
+                raise RuntimeError("offline")
+
+    def fake_sleep(_seconds: float) -> None:
+        if len(sent) >= 3:
+            raise _Done()
+
+    monkeypatch.setattr("wingxtra_plugin.sender.time.sleep", fake_sleep)
+
+    with pytest.raises(_Done):
+        send_loop(
+            get_payload=lambda: _payload(5.6, 45.0),
+            sender=FakeSender(),
+            send_interval_seconds=0.1,
+            offline_backoff_seconds=0.1,
+            delta=DeltaEncoder(),
+        )
+
+    assert [payload["keyframe"] for payload in sent] == [True, False, True]
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from wingxtra_plugin.events import EventDetector, EventLane
+
+
+def _payload(remaining: float = 80.0, armed: bool = True, mode: str = "AUTO", rssi: float = -60.0) -> dict:
+    return {
+        "schema_version": 1,
+        "drone_id": "WX-DRN-001",
+        "battery": {"voltage_v": 15.8, "remaining_pct": remaining},
+        "state": {"armed": armed, "mode": mode},
+        "link": {"rssi_dbm": rssi},
+    }
+
+
+def _types(events: list[dict]) -> list[str]:
+    return [event["type"] for event in events]
+
+
+def test_event_detector_reports_transitions_once() -> None:
+    detector = EventDetector(battery_thresholds_pct=(30.0, 20.0), link_lost_rssi_dbm=-100.0)
+
+    assert detector.detect(_payload()) == []
+    assert detector.detect(_payload(mode="RTL")) == [{"type": "mode_change", "from": "AUTO", "to": "RTL"}]
+    assert _types(detector.detect(_payload(mode="RTL", armed=False, rssi=-105.0))) == ["disarmed", "link_lost"]
+    assert _types(detector.detect(_payload(mode="RTL", armed=False, rssi=-80.0))) == ["link_restored"]
+    assert detector.detect(_payload(mode="RTL", armed=False)) == []
+
+
+def test_event_detector_battery_thresholds_fire_on_the_way_down_with_hysteresis() -> None:
+    detector = EventDetector(battery_thresholds_pct=(30.0, 20.0), battery_hysteresis_pct=2.0)
+
+    assert detector.detect(_payload(remaining=29.0)) == [
+        {"type": "battery_low", "threshold_pct": 30.0, "remaining_pct": 29.0}
+    ]
+    assert detector.detect(_payload(remaining=28.0)) == []
+    assert detector.detect(_payload(remaining=31.0)) == []  # within hysteresis
+    assert _types(detector.detect(_payload(remaining=15.0))) == ["battery_low"]
+    assert detector.detect(_payload(remaining=21.0)) == []
+    assert detector.detect(_payload(remaining=23.0)) == []  # re-arms the 20% level
+    assert detector.detect(_payload(remaining=19.0))[0]["threshold_pct"] == 20.0
+
+
+def test_event_lane_retries_within_its_budget(monkeypatch) -> None:
+    attempts: list[dict] = []
+
+    class FlakySender:
+        def send(self, payload: dict, api_key: str | None = None) -> None:
+            attempts.append(payload)
+            if len(attempts) < 3:
+                raise RuntimeError("offline")
+
+    monkeypatch.setattr("wingxtra_plugin.events.time.sleep", lambda _seconds: None)
+    lane = EventLane(FlakySender(), max_attempts=3)
+
+    lane.observe(_payload())
+    lane.observe(_payload(armed=False))
+    assert lane._deliver(*lane._queue.get()) is True
+    assert len(attempts) == 3 and attempts[-1]["events"] == [{"type": "disarmed"}]
+
+    lane = EventLane(FlakySender(), max_attempts=1)
+    attempts.clear()
+    lane.observe(_payload())
+    lane.observe(_payload(mode="LAND"))
+    assert lane._deliver(*lane._queue.get()) is False
+    assert lane.abandoned == 1
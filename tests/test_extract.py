@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from wingxtra_plugin.extract import ShapeExtractor
+
+
+def test_shape_extractor_honours_alias_priority_and_none_values() -> None:
+    extract = ShapeExtractor(("lat", "latitude", "y"), ("alt", "altitude"))
+
+    assert extract({"y": 3.0, "latitude": 2.0, "alt": 7}) == (2.0, 7)
+    # same shape, but the preferred alias is None this time
+    assert extract({"y": 3.0, "latitude": None, "alt": None}) == (3.0, None)
+    assert extract({}) == (None, None)
+    assert extract.cached_shapes == 1
+
+
+def test_shape_extractor_evicts_oldest_shape_when_full() -> None:
+    extract = ShapeExtractor(("a",), max_shapes=2)
+
+    for shape in ({"a": 1}, {"a": 1, "b": 2}, {"a": 1, "c": 3}):
+        assert extract(shape) == (1,)
+
+    assert extract.cached_shapes == 2
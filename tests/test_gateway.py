@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import queue
+import time
+from threading import Thread
+
+import pytest
+
+import main
+from wingxtra_plugin.databus_lib.messages import TYPE_AndruavMessage_NAV_INFO
+from wingxtra_plugin.gateway import (
+    DroneRoute,
+    Gateway,
+    UploadSettings,
+    _run_worker,
+    load_drone_table,
+    sender_party_id,
+)
+
+
+def test_load_drone_table_accepts_ids_and_entries(tmp_path) -> None:
+    path = tmp_path / "drones.json"
+    path.write_text(json.dumps({"P1": "WX-DRN-001", "P2": {"drone_id": "WX-DRN-002", "api_key": "k2"}}))
+
+    assert load_drone_table(str(path)) == {
+        "P1": DroneRoute("WX-DRN-001"),
+        "P2": DroneRoute("WX-DRN-002", "k2"),
+    }
+
+    path.write_text(json.dumps({"P3": {"api_key": "k3"}}))
+    with pytest.raises(ValueError):
+        load_drone_table(str(path))
+
+
+def test_sender_party_id_falls_back_to_alternate_keys() -> None:
+    assert sender_party_id({"sd": "P1", "mt": 9102}) == "P1"
+    assert sender_party_id({"party_id": 7}) == "7"
+    assert sender_party_id({"mt": 9102}) is None
+
+
+def test_gateway_routes_messages_to_per_drone_senders(telemetry_server) -> None:
+    gateway = Gateway(
+        {"P1": DroneRoute("WX-DRN-001"), "P2": DroneRoute("WX-DRN-002", "k2")},
+        main._build_payload_from_9102,
+        UploadSettings(api_url=f"http://127.0.0.1:{telemetry_server.server_address[1]}/telemetry", api_key="shared"),
+        workers=2,
+    )
+    try:
+        gateway.start()
+        assert gateway.worker_count == 2
+        assert gateway.dispatch({"sd": "P1", "mt": 9102, "ms": {"la": 10000000, "ln": 20000000}})
+        assert gateway.dispatch({"sd": "P2", "mt": 9102, "ms": {"la": 30000000, "ln": 40000000}})
+        assert not gateway.dispatch({"sd": "P9", "mt": 9102, "ms": {"la": 1, "ln": 1}})
+    finally:
+        gateway.stop()
+
+    received = {
+        req["body"]["drone_id"]: (req["api_key"], req["body"]["position"]["lat"]) for req in telemetry_server.requests
+    }
+    assert received == {"WX-DRN-001": ("shared", 1.0), "WX-DRN-002": ("k2", 3.0)}
+    assert gateway.unknown == 1
+
+
+def test_gateway_workers_post_events_per_drone(telemetry_server) -> None:
+    gateway = Gateway(
+        {"P1": DroneRoute("WX-DRN-001", "k1")},
+        main._build_payload_from_9102,
+        UploadSettings(
+            api_url=f"http://127.0.0.1:{telemetry_server.server_address[1]}/telemetry",
+            api_key="shared",
+            event_lane=True,
+        ),
+    )
+    try:
+        gateway.start()
+        nav = TYPE_AndruavMessage_NAV_INFO
+        gateway.dispatch({"sd": "P1", "mt": nav, "ms": {"armed": True, "mode": "AUTO"}})
+        gateway.dispatch({"sd": "P1", "mt": nav, "ms": {"armed": True, "mode": "RTL"}})
+        deadline = time.monotonic() + 5
+        while not telemetry_server.requests and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        gateway.stop()
+
+    api_key, payload = telemetry_server.requests[0]["api_key"], telemetry_server.requests[0]["body"]
+    assert api_key == "k1"
+    assert payload["drone_id"] == "WX-DRN-001"
+    assert payload["events"] == [{"type": "mode_change", "from": "AUTO", "to": "RTL"}]
+
+
+def test_gateway_stop_terminates_a_worker_whose_inbox_stays_full() -> None:
+    class _StuckWorker:
+        name = "wx-gateway-0"
+        terminated = False
+
+        def terminate(self) -> None:
+            self.terminated = True
+
+        def join(self, _timeout=None) -> None:
+            return None
+
+        def is_alive(self) -> bool:
+            return not self.terminated
+
+    gateway = Gateway({"P1": DroneRoute("WX-DRN-001")}, main._build_payload_from_9102, UploadSettings("http://x", "k"))
+    inbox = multiprocessing.Queue(1)
+    inbox.put(("P1", {}))
+    worker = _StuckWorker()
+    gateway._inboxes.append(inbox)
+    gateway._processes.append(worker)
+
+    started = time.monotonic()
+    gateway.stop(timeout_seconds=0.2)
+
+    assert worker.terminated
+    assert time.monotonic() - started < 2.0
+
+
+def test_gateway_worker_keeps_reading_its_inbox_while_uploads_are_slow(telemetry_server) -> None:
+    telemetry_server.response_delay = 0.5
+    routes = {f"P{index}": DroneRoute(f"WX-DRN-00{index}") for index in range(4)}
+    inbox: queue.Queue = queue.Queue()
+    upload = UploadSettings(
+        api_url=f"http://127.0.0.1:{telemetry_server.server_address[1]}/telemetry",
+        api_key="shared",
+        send_interval_seconds=0.05,
+        max_concurrency=4,
+    )
+    worker = Thread(target=_run_worker, args=(inbox, routes, main._build_payload_from_9102, upload), daemon=True)
+    worker.start()
+
+    for party_id in routes:
+        inbox.put((party_id, {"sd": party_id, "mt": 9102, "ms": {"la": 10000000, "ln": 20000000}}))
+    time.sleep(0.2)  # every drone is now waiting on the slow endpoint
+    inbox.put(("P0", {"sd": "P0", "mt": 9102, "ms": {"la": 30000000, "ln": 40000000}}))
+    deadline = time.monotonic() + 0.2
+    while not inbox.empty() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert inbox.empty()
+
+    inbox.put(None)
+    worker.join(5)
+    assert not worker.is_alive()
+    # four uploads in parallel, then P0's newer position once its first POST returned
+    lats = sorted(req["body"]["position"]["lat"] for req in telemetry_server.requests)
+    assert lats == [1.0, 1.0, 1.0, 1.0, 3.0]
@@ -4,6 +4,7 @@ import pytest
 
 import main
 from wingxtra_plugin.config import Config
+from wingxtra_plugin.databus_client import TelemetryState
 
 
 class _Done(Exception):
@@ -27,21 +28,25 @@ def test_main_uses_comm_and_listen_ports_in_databus_mode(monkeypatch) -> None:
     )
 
     class FakeDataBusClient:
-        def __init__(self, comm_host, comm_port, listen_host, listen_port, module_name, message_filter):
+        def __init__(self, comm_host, comm_port, listen_host, listen_port, module_name, message_filter, **kwargs):
             captured["comm_host"] = comm_host
             captured["comm_port"] = comm_port
             captured["listen_host"] = listen_host
             captured["listen_port"] = listen_port
             captured["module_name"] = module_name
             captured["message_filter"] = message_filter
+            captured["sniff_mode"] = kwargs["sniff_mode"]
+            self.state = TelemetryState()
 
-        def read_one_databus_message(self):
-            return {"mt": 9102, "ms": {"la": 56037000, "ln": -1870000, "ha": 120.3, "y": 45}}
+        def messages(self):
+            self.state.update_battery(15.2, 80)
+            yield {"mt": 9102, "ms": {"la": 56037000, "ln": -1870000, "ha": 120.3, "y": 45}}
 
-    def fake_send_loop(*, get_payload, sender, send_interval_seconds, offline_backoff_seconds):
+    def fake_send_loop(*, get_payload, sender, send_interval_seconds, offline_backoff_seconds, **_kwargs):
         payload = get_payload()
         captured["mapped_drone_id"] = payload["drone_id"]
         captured["lat"] = payload["position"]["lat"]
+        captured["battery"] = payload["battery"]
         raise _Done()
 
     monkeypatch.setattr(main.Config, "from_env", classmethod(lambda cls: cfg))
@@ -57,5 +62,30 @@ def test_main_uses_comm_and_listen_ports_in_databus_mode(monkeypatch) -> None:
     assert captured["listen_port"] == 61233
     assert captured["module_name"] == "WX_TELEMETRY_SENDER"
     assert captured["message_filter"] == [1002, 1003, 1036]
+    assert captured["sniff_mode"] is True
     assert captured["mapped_drone_id"] == "WX-DRN-001"
     assert captured["lat"] == 5.6037
+    assert captured["battery"] == {"voltage_v": 15.2, "remaining_pct": 80}
+
+
+def test_main_warns_about_options_the_async_runtime_ignores(monkeypatch, caplog) -> None:
+    cfg = Config(
+        drone_id="WX-DRN-001",
+        api_url="https://example.com/api/v1/telemetry",
+        api_key="secret",
+        async_runtime=True,
+        delta_encoding=True,
+        http_compression="gzip",
+        event_lane=True,
+    )
+
+    async def fake_main_async(_config) -> None:
+        return None
+
+    monkeypatch.setattr(main.Config, "from_env", classmethod(lambda cls: cfg))
+    monkeypatch.setattr(main, "main_async", fake_main_async)
+
+    with caplog.at_level("WARNING", logger="main"):
+        main.main()
+
+    assert "DELTA_ENCODING, HTTP_COMPRESSION ignored with ASYNC_RUNTIME" in caplog.text
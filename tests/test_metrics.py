@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import urllib.request
+
+from wingxtra_plugin import metrics
+from wingxtra_plugin.databus_lib.de_module import CModule
+from wingxtra_plugin.databus_lib.messages import TYPE_AndruavMessage_GPS
+from wingxtra_plugin.scheduler import RateScheduler
+from wingxtra_plugin.timestamps import iso_now, iso_to_unix
+
+
+def test_render_emits_prometheus_text_for_each_metric_type() -> None:
+    counter = metrics.Counter("wx_test_total", "Test counter.", "status")
+    counter.inc_label(200, 3)
+    counter.inc_label(503)
+    gauge = metrics.Gauge("wx_test_depth", "Test gauge.")
+    gauge.set_function(lambda: 4)
+    histogram = metrics.Histogram("wx_test_seconds", "Test histogram.", (0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        histogram.observe(value)
+
+    text = metrics.render((counter, gauge, histogram))
+
+    assert "# TYPE wx_test_total counter\n" in text
+    assert 'wx_test_total{status="200"} 3\nwx_test_total{status="503"} 1\n' in text
+    assert "wx_test_depth 4.0\n" in text
+    assert 'wx_test_seconds_bucket{le="0.1"} 1\n' in text
+    assert 'wx_test_seconds_bucket{le="1.0"} 2\n' in text
+    assert 'wx_test_seconds_bucket{le="+Inf"} 3\n' in text
+    assert "wx_test_seconds_count 3\n" in text
+
+
+def test_databus_decode_counts_packets_filtered_types_and_failures() -> None:
+    module = CModule()
+    module.defineModule(
+        module_class="MODULE_CLASS_GENERIC",
+        module_name="WX_TELEMETRY_SENDER",
+        module_key="123456789012",
+        module_version="0.1.0",
+        message_filter=[TYPE_AndruavMessage_GPS],
+    )
+    before_packets = metrics.DATABUS_PACKETS._values.get("udp", 0)
+    before_failures = metrics.DATABUS_DECODE_FAILURES._values.get("udp", 0)
+    before_filtered = metrics.DATABUS_FILTERED._values.get("1003", 0)
+
+    module.decode_packets(
+        [
+            memoryview(b'{"mt": 1002, "ms": {}}'),
+            memoryview(b'{"mt": 1003, "ms": {}}'),
+            memoryview(b"not json"),
+        ]
+    )
+
+    assert metrics.DATABUS_PACKETS._values["udp"] - before_packets == 3
+    assert metrics.DATABUS_FILTERED._values["1003"] - before_filtered == 1
+    assert metrics.DATABUS_DECODE_FAILURES._values["udp"] - before_failures == 1
+
+
+def test_metrics_server_serves_the_registry() -> None:
+    server = metrics.start_metrics_server(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=2) as resp:
+            body = resp.read().decode("utf-8")
+            assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert "# TYPE wx_send_latency_seconds histogram" in body
+    assert "wx_payloads_built_total " in body
+
+
+def test_observe_data_age_records_payloads_stamped_by_iso_now() -> None:
+    before = metrics.DATA_AGE.count
+
+    metrics.observe_data_age({"ts": "2026-01-01T00:00:00.000Z"}, now=1767225600.25)
+    metrics.observe_data_age({"ts": iso_now()})
+    metrics.observe_data_age({"ts": "not a time"})
+
+    assert metrics.DATA_AGE.count - before == 2
+    assert iso_to_unix("2026-01-01T00:00:00.000Z") == 1767225600.0
+
+
+def test_track_scheduler_exports_rate_and_jitter() -> None:
+    scheduler = RateScheduler(0.5)
+    scheduler.tick()
+    scheduler.tick()
+
+    metrics.track_scheduler(scheduler)
+    text = metrics.render()
+
+    assert "wx_send_rate_target_hz 2.0\n" in text
+    assert "# TYPE wx_send_jitter_seconds gauge" in text
+    assert "wx_send_skipped_ticks 0.0\n" in text
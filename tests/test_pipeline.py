@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from wingxtra_plugin.pipeline import PayloadQueue, start_reader
+
+
+def test_latest_policy_coalesces_to_freshest_payload() -> None:
+    queue = PayloadQueue(maxsize=1, policy="latest")
+    for seq in range(3):
+        queue.put({"seq": seq})
+
+    assert queue.get() == {"seq": 2}
+    assert queue.stats().coalesced == 2
+    assert queue.stats().depth == 0
+
+
+def test_drop_oldest_policy_counts_drops() -> None:
+    queue = PayloadQueue(maxsize=2, policy="drop_oldest")
+    for seq in range(4):
+        queue.put(seq)
+
+    assert [queue.get(), queue.get()] == [2, 3]
+    assert queue.stats().dropped == 2
+
+
+def test_block_policy_waits_for_consumer() -> None:
+    queue = PayloadQueue(maxsize=1, policy="block")
+    queue.put(1)
+    producer = threading.Thread(target=queue.put, args=(2,), daemon=True)
+    producer.start()
+    producer.join(timeout=0.1)
+    assert producer.is_alive()
+
+    assert queue.get() == 1
+    producer.join(timeout=1.0)
+    assert queue.get() == 2
+
+
+def test_reader_failure_is_raised_by_consumer() -> None:
+    payloads = iter([{"seq": 1}])
+    queue = PayloadQueue()
+
+    start_reader(lambda: next(payloads), queue)
+
+    assert queue.get() == {"seq": 1}
+    with pytest.raises(RuntimeError):
+        queue.get()
+
+
+def test_payload_queue_get_returns_none_after_timeout() -> None:
+    queue = PayloadQueue()
+
+    assert queue.get(timeout=0.01) is None
+    queue.put({"seq": 1})
+    assert queue.get(timeout=0.01) == {"seq": 1}
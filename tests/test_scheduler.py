@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import pytest
+
+from wingxtra_plugin.scheduler import RateScheduler
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr("wingxtra_plugin.scheduler.time.monotonic", fake.monotonic)
+    monkeypatch.setattr("wingxtra_plugin.scheduler.time.sleep", fake.sleep)
+    return fake
+
+
+def test_scheduler_absorbs_work_time_into_the_period(clock: FakeClock) -> None:
+    scheduler = RateScheduler(1.0)
+
+    for _ in range(4):
+        clock.now += 0.3  # acquisition + HTTP latency
+        scheduler.wait()
+
+    assert clock.sleeps == [1.0, 0.7, 0.7, 0.7]  # grid starts at the first tick
+    assert scheduler.stats().achieved_hz == pytest.approx(1.0)
+    assert scheduler.stats().jitter_seconds == pytest.approx(0.0)
+
+
+def test_skip_policy_realigns_after_overrun(clock: FakeClock) -> None:
+    scheduler = RateScheduler(1.0, overrun_policy="skip")
+    scheduler.wait()  # deadline 101
+    clock.now += 2.5  # 103.5: ticks at 102 and 103 are missed
+    scheduler.wait()
+    scheduler.wait()
+
+    assert clock.sleeps == [1.0, 0.5]
+    assert scheduler.stats().skipped_ticks == 1
+
+
+def test_catch_up_policy_fires_missed_ticks_back_to_back(clock: FakeClock) -> None:
+    scheduler = RateScheduler(1.0, overrun_policy="catch_up", max_catch_up=1)
+    scheduler.wait()  # deadline 101
+    clock.now += 3.5  # 104.5: deadlines 102, 103, 104 are late
+    scheduler.wait()
+    scheduler.wait()
+    scheduler.wait()
+
+    assert clock.sleeps == [1.0, 0.5]
+    assert scheduler.stats().skipped_ticks == 1
+
+
+def test_scheduler_set_interval_moves_the_pending_deadline(clock: FakeClock) -> None:
+    scheduler = RateScheduler(1.0)
+    scheduler.wait()
+    scheduler.set_interval(0.25)
+    scheduler.wait()
+
+    assert clock.sleeps == [1.0, 0.25]
@@ -1,31 +1,56 @@
 from __future__ import annotations
 
 import json
-from unittest.mock import MagicMock, patch
+import socket
 
 import pytest
 
-from wingxtra_plugin.sender import TelemetrySender, send_loop
+from wingxtra_plugin import tracing
+from wingxtra_plugin.pipeline import OVERFLOW_DROP_OLDEST, PayloadQueue
+from wingxtra_plugin.sender import (
+    PayloadBatcher,
+    TelemetrySender,
+    offline_backoff,
+    send_batch_loop,
+    send_loop,
+    store_and_forward_loop,
+)
+from wingxtra_plugin.spool import Spool
 
 
 class _Done(Exception):
     pass
 
 
-def test_sender_uses_x_api_key_header() -> None:
+def test_sender_uses_x_api_key_header(telemetry_server) -> None:
     payload = {"schema_version": 1, "drone_id": "WX-DRN-001"}
 
-    with patch("wingxtra_plugin.sender.request.urlopen") as mock_urlopen:
-        response = MagicMock()
-        response.status = 200
-        mock_urlopen.return_value.__enter__.return_value = response
+    sender = TelemetrySender(f"http://127.0.0.1:{telemetry_server.server_address[1]}/api/v1/telemetry", "top-secret")
+    sender.send(payload)
+    sender.close()
 
-        sender = TelemetrySender("https://example.com/api/v1/telemetry", "top-secret")
-        sender.send(payload)
+    assert telemetry_server.requests[0]["api_key"] == "top-secret"
+    assert telemetry_server.requests[0]["body"] == payload
 
-    request_obj = mock_urlopen.call_args.args[0]
-    assert request_obj.get_header("X-api-key") == "top-secret"
-    assert json.loads(request_obj.data.decode("utf-8")) == payload
+
+def test_sender_reuses_connection_and_reconnects_after_server_close(telemetry_server) -> None:
+    sender = TelemetrySender(f"http://127.0.0.1:{telemetry_server.server_address[1]}/api/v1/telemetry", "secret")
+
+    sender.send({"seq": 1})
+    first = sender.last_timing
+    sender.send({"seq": 2})
+    second = sender.last_timing
+    sender._conn.sock.shutdown(socket.SHUT_RDWR)  # simulate the server dropping the idle connection
+    sender.send({"seq": 3})
+    third = sender.last_timing
+    sender.close()
+
+    peers = [item["peer"] for item in telemetry_server.requests]
+    assert [item["body"]["seq"] for item in telemetry_server.requests] == [1, 2, 3]
+    assert peers[0] == peers[1] != peers[2]
+    assert (first.reused_connection, second.reused_connection, third.reused_connection) == (False, True, False)
+    assert second.connect_seconds == 0.0
+    assert third.status == 200
 
 
 def test_send_loop_sends_latest_payload_after_failure(monkeypatch) -> None:
@@ -59,3 +84,240 @@ def test_send_loop_sends_latest_payload_after_failure(monkeypatch) -> None:
         )
 
     assert sent == [{"seq": 1}, {"seq": 2}]
+
+
+def test_send_batch_posts_array_and_maps_per_item_results(telemetry_server) -> None:
+    telemetry_server.response_body = json.dumps({"results": [{"status": 201}, {"status": 503}, 422]}).encode()
+    sender = TelemetrySender(f"http://127.0.0.1:{telemetry_server.server_address[1]}/api/v1/telemetry", "secret")
+
+    statuses = sender.send_batch([json.dumps({"seq": seq}).encode() for seq in range(3)])
+    sender.close()
+
+    assert telemetry_server.requests[0]["body"] == [{"seq": 0}, {"seq": 1}, {"seq": 2}]
+    assert statuses == [201, 503, 422]
+
+
+def test_payload_batcher_is_ready_by_count_size_or_age() -> None:
+    by_count = PayloadBatcher(max_items=2, max_bytes=10_000, max_age_seconds=60)
+    by_count.add({"seq": 1}, now=0.0)
+    assert by_count.ready(now=0.0) is False
+    by_count.add({"seq": 2}, now=0.1)
+    assert by_count.ready(now=0.1) is True
+
+    by_size = PayloadBatcher(max_items=10, max_bytes=20, max_age_seconds=60)
+    by_size.add({"seq": 1, "pad": "x" * 20}, now=0.0)
+    by_size.add({"seq": 2}, now=0.0)
+    assert by_size.ready(now=0.0) is True
+    assert len(by_size.drain()) == 1  # the second item would overflow max_bytes
+
+    by_age = PayloadBatcher(max_items=10, max_bytes=10_000, max_age_seconds=1.0)
+    by_age.add({"seq": 1}, now=0.0)
+    assert by_age.ready(now=0.5) is False
+    assert by_age.ready(now=1.0) is True
+
+
+def test_send_batch_loop_requeues_only_retryable_payloads(monkeypatch) -> None:
+    payloads = [{"seq": seq} for seq in range(4)]
+    batches: list[list[int]] = []
+
+    class FakeSender:
+        def send_batch(self, items, ndjson=False):
+            batches.append([json.loads(item)["seq"] for item in items])
+            if len(batches) == 1:
+                return [200, 503]
+            return [200] * len(items)
+
+    def fake_sleep(_seconds: float) -> None:
+        if len(batches) >= 2:
+            raise _Done()
+
+    monkeypatch.setattr("wingxtra_plugin.sender.time.sleep", fake_sleep)
+
+    with pytest.raises(_Done):
+        send_batch_loop(
+            get_payload=lambda timeout=None: payloads.pop(0),
+            sender=FakeSender(),
+            batcher=PayloadBatcher(max_items=2, max_age_seconds=60),
+            send_interval_seconds=0.1,
+            offline_backoff_seconds=0.1,
+        )
+
+    assert batches == [[0, 1], [1, 2]]
+
+
+def test_send_batch_loop_flushes_a_partial_batch_when_the_source_goes_quiet() -> None:
+    queue = PayloadQueue()
+    queue.put({"seq": 0})
+    batches: list[list[int]] = []
+
+    class FakeSender:
+        def send_batch(self, items, ndjson=False):
+            batches.append([json.loads(item)["seq"] for item in items])
+            return [200] * len(items)
+
+    def get_payload(timeout: float | None = None) -> dict | None:
+        if batches:
+            raise _Done()
+        return queue.get(timeout=timeout)
+
+    with pytest.raises(_Done):
+        send_batch_loop(
+            get_payload=get_payload,
+            sender=FakeSender(),
+            batcher=PayloadBatcher(max_items=10, max_age_seconds=0.05),
+            send_interval_seconds=0.01,
+            offline_backoff_seconds=0.1,
+        )
+
+    assert batches == [[0]]
+
+
+def test_sender_gzips_bodies_above_threshold(telemetry_server) -> None:
+    telemetry_server.accept_encoding = "gzip"
+    sender = TelemetrySender(
+        f"http://127.0.0.1:{telemetry_server.server_address[1]}/api/v1/telemetry",
+        "secret",
+        compression="gzip",
+        compression_min_bytes=200,
+    )
+
+    sender.send({"seq": 1})
+    sender.send({"seq": 2, "pad": "x" * 300})
+    sender.close()
+
+    assert [item["encoding"] for item in telemetry_server.requests] == [None, "gzip"]
+    assert telemetry_server.requests[1]["body"]["pad"] == "x" * 300
+
+
+def test_sender_falls_back_to_identity_when_server_rejects_encoding(telemetry_server) -> None:
+    sender = TelemetrySender(
+        f"http://127.0.0.1:{telemetry_server.server_address[1]}/api/v1/telemetry",
+        "secret",
+        compression="auto",
+        compression_min_bytes=0,
+    )
+
+    sender.send({"seq": 1})
+    sender.send({"seq": 2})
+    sender.close()
+
+    assert [item["encoding"] for item in telemetry_server.requests] == [None, None]
+    assert [item["body"]["seq"] for item in telemetry_server.requests] == [1, 2]
+    assert sender.content_encodings == ()
+
+
+def test_store_and_forward_loop_spools_while_offline_and_replays(monkeypatch, tmp_path) -> None:
+    payloads = [{"seq": seq} for seq in range(6)]
+    live: list[int] = []
+    replayed: list[list[int]] = []
+    clock = {"now": 0.0}
+
+    class FakeSender:
+        def send(self, payload):
+            if payload["seq"] == 1:
+                raise RuntimeError("offline")
+            live.append(payload["seq"])
+
+        def send_batch(self, items, ndjson=False):
+            replayed.append([json.loads(item)["seq"] for item in items])
+            return [200] * len(items)
+
+    class FakeScheduler:
+        def wait(self):
+            clock["now"] += 1.0
+            if not payloads:
+                raise _Done()
+
+    monkeypatch.setattr("wingxtra_plugin.sender.time.monotonic", lambda: clock["now"])
+
+    with pytest.raises(_Done):
+        store_and_forward_loop(
+            get_payload=lambda: payloads.pop(0),
+            sender=FakeSender(),
+            spool=Spool(str(tmp_path)),
+            send_interval_seconds=1.0,
+            offline_backoff_seconds=1.0,  # first retry 2 s after the failure
+            scheduler=FakeScheduler(),
+        )
+
+    assert live == [0, 3, 4, 5]
+    assert replayed == [[1, 2]]
+
+
+def test_sender_posts_binary_and_falls_back_to_json_on_415(telemetry_server) -> None:
+    payload = {
+        "schema_version": 1,
+        "drone_id": "WX-DRN-001",
+        "ts": "2026-01-01T00:00:00.000Z",
+        "position": {"lat": 5.6037, "lon": -0.187, "alt_m": 120.3},
+    }
+    url = f"http://127.0.0.1:{telemetry_server.server_address[1]}/t"
+
+    telemetry_server.accept_binary = True
+    sender = TelemetrySender(url, "k", wire_format="binary")
+    sender.send(payload)
+    sender.send({**payload, "schema_version": 2})  # not representable: sent as JSON
+
+    telemetry_server.accept_binary = False
+    sender.send(payload)
+    sender.close()
+
+    assert [req["binary"] for req in telemetry_server.requests] == [True, False, False]
+    assert telemetry_server.requests[0]["body"]["position"] == payload["position"]
+    assert sender.wire_format == "json"
+
+
+def test_offline_backoff_doubles_per_failure_up_to_the_cap() -> None:
+    assert [offline_backoff(1.0, failures) for failures in range(4)] == [1.0, 2.0, 4.0, 8.0]
+    assert offline_backoff(1.0, 50) == 30.0
+    assert offline_backoff(0.01, 50) == 0.01 * 256
+
+
+def test_send_batch_loop_drains_a_backlog_in_full_batches() -> None:
+    queue = PayloadQueue(maxsize=10, policy=OVERFLOW_DROP_OLDEST)
+    for seq in range(10):
+        queue.put({"seq": seq})
+    batches: list[list[int]] = []
+    waits_before_send: list[int] = []
+
+    class FakeSender:
+        def send_batch(self, items, ndjson=False):
+            batches.append([json.loads(item)["seq"] for item in items])
+            waits_before_send.append(scheduler.waits)
+            return [200] * len(items)
+
+    class FakeScheduler:
+        waits = 0
+
+        def wait(self):
+            self.waits += 1
+            if len(batches) == 2:
+                raise _Done()
+
+    scheduler = FakeScheduler()
+    with pytest.raises(_Done):
+        send_batch_loop(
+            get_payload=queue.get,
+            sender=FakeSender(),
+            batcher=PayloadBatcher(max_items=5, max_age_seconds=60),
+            send_interval_seconds=1.0,
+            offline_backoff_seconds=0.1,
+            scheduler=scheduler,
+        )
+
+    assert batches == [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9]]
+    assert waits_before_send == [0, 1]  # one send interval per batch, not per payload
+
+
+def test_sender_times_a_failed_binary_encode_and_its_json_fallback_once(monkeypatch, telemetry_server) -> None:
+    timer = tracing.StageTimer("serialize", sample_every=2)
+    monkeypatch.setattr(tracing, "SERIALIZE", timer)
+    telemetry_server.accept_binary = True
+    sender = TelemetrySender(f"http://127.0.0.1:{telemetry_server.server_address[1]}/t", "k", wire_format="binary")
+
+    for _ in range(2):
+        sender.send({"schema_version": 1, "drone_id": "WX-DRN-001", "position": {"lat": 5.6, "lon": -0.2, "alt_m": 3e7}})
+    sender.close()
+
+    assert [req["binary"] for req in telemetry_server.requests] == [False, False]
+    assert len(timer.samples) == 1  # one start per send, so every other send is sampled
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+import socket
+import time
+
+import pytest
+
+from wingxtra_plugin.sniffer import DataBusSniffer, _decode_databus_packet, _DedupCache
+from wingxtra_plugin.timestamps import CAPTURE_TS_KEY
+
+
+def _udp_frame(payload: bytes, dst_port: int, src_port: int = 45000, ip_id: int = 1) -> bytes:
+    eth = b"\x00" * 12 + (0x0800).to_bytes(2, "big")
+    ip = bytes([0x45, 0]) + (20 + 8 + len(payload)).to_bytes(2, "big") + ip_id.to_bytes(2, "big")
+    ip += b"\x40\x00" + bytes([64, 17]) + b"\x00\x00" + bytes([127, 0, 0, 1]) * 2
+    udp = src_port.to_bytes(2, "big") + dst_port.to_bytes(2, "big")
+    udp += (8 + len(payload)).to_bytes(2, "big") + b"\x00\x00"
+    return eth + ip + udp + payload
+
+
+def _free_udp_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def test_decode_databus_packet_filters_on_destination_port() -> None:
+    frame = _udp_frame(json.dumps({"mt": 9102, "ms": {"la": 1}}).encode("utf-8"), 60000)
+
+    assert _decode_databus_packet(frame, 60000) == {"mt": 9102, "ms": {"la": 1}}
+    assert _decode_databus_packet(frame, 60001) is None
+
+
+def test_decode_databus_packet_drops_repeated_frames_within_ttl() -> None:
+    dedup = _DedupCache(ttl_s=60.0, max_entries=8)
+    frame = _udp_frame(b'{"mt": 9102}', 60000, ip_id=7)
+
+    assert _decode_databus_packet(frame, 60000, dedup=dedup) == {"mt": 9102}
+    assert _decode_databus_packet(frame, 60000, dedup=dedup) is None
+    assert _decode_databus_packet(_udp_frame(b'{"mt": 9102}', 60000, ip_id=8), 60000, dedup=dedup) == {"mt": 9102}
+
+
+def test_dedup_cache_evicts_by_age_and_size() -> None:
+    dedup = _DedupCache(ttl_s=1.0, max_entries=2)
+
+    assert dedup.seen((1, 1, 1), now=0.0) is False
+    assert dedup.seen((1, 1, 1), now=0.5) is True
+    assert dedup.seen((1, 1, 1), now=1.5) is False
+    assert dedup.seen((2, 2, 2), now=1.6) is False
+    assert dedup.seen((3, 3, 3), now=1.7) is False
+    assert dedup.seen((1, 1, 1), now=1.8) is False
+
+
+def test_sniffer_session_yields_consecutive_messages_on_loopback() -> None:
+    port = _free_udp_port()
+    sniffer = DataBusSniffer(port, iface="lo")
+    try:
+        sniffer.open()
+    except OSError:
+        pytest.skip("raw packet sockets not permitted")
+
+    with sniffer, socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as tx:
+        for seq in range(3):
+            tx.sendto(json.dumps({"mt": 9102, "seq": seq}).encode("utf-8"), ("127.0.0.1", port))
+
+        seen = []
+        while len(seen) < 3:
+            message = sniffer.read(timeout_s=1.0)
+            assert message is not None
+            if message["seq"] not in seen:
+                seen.append(message["seq"])
+
+    assert seen == [0, 1, 2]
+    assert sniffer.is_open is False
+
+
+def test_sniffer_bpf_filter_only_delivers_destination_port_frames() -> None:
+    port = _free_udp_port()
+    other_port = _free_udp_port()
+    sniffer = DataBusSniffer(port, iface="lo")
+    try:
+        sniffer.open()
+    except OSError:
+        pytest.skip("raw packet sockets not permitted")
+
+    with sniffer, socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as tx:
+        tx.sendto(b'{"mt": 1}', ("127.0.0.1", other_port))
+        tx.sendto(b'{"mt": 2}', ("127.0.0.1", port))
+
+        raw_sock = sniffer._sock
+        frame = raw_sock.recv(65535)
+
+    assert _decode_databus_packet(frame, port) == {"mt": 2}
+
+
+def test_sniffer_ring_capture_walks_blocks_on_loopback() -> None:
+    port = _free_udp_port()
+    sniffer = DataBusSniffer(port, iface="lo", capture="ring", ring_block_size=1 << 16, ring_block_count=4)
+    try:
+        sniffer.open()
+    except OSError:
+        pytest.skip("packet mmap ring not permitted")
+
+    with sniffer, socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as tx:
+        for seq in range(20):
+            tx.sendto(json.dumps({"mt": 9102, "seq": seq}).encode("utf-8"), ("127.0.0.1", port))
+
+        seen: set[int] = set()
+        while len(seen) < 20:
+            message = sniffer.read(timeout_s=1.0)
+            assert message is not None
+            assert abs(message[CAPTURE_TS_KEY] - time.time()) < 5
+            seen.add(message["seq"])
+
+    assert seen == set(range(20))
+
+
+def test_sniffer_delivers_each_loopback_datagram_once() -> None:
+    port = _free_udp_port()
+    sniffer = DataBusSniffer(port, iface="lo", dedup_ttl_s=0)
+    try:
+        sniffer.open()
+    except OSError:
+        pytest.skip("raw packet sockets not permitted")
+
+    with sniffer, socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as tx:
+        for seq in range(3):
+            tx.sendto(json.dumps({"mt": 9102, "seq": seq}).encode("utf-8"), ("127.0.0.1", port))
+
+        messages = [sniffer.read(timeout_s=1.0) for _ in range(3)]
+        extra = sniffer.read(timeout_s=0.3)
+
+    assert [message["seq"] for message in messages] == [0, 1, 2]
+    assert all(abs(message[CAPTURE_TS_KEY] - time.time()) < 5 for message in messages)
+    assert extra is None
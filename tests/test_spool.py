@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import os
+
+from wingxtra_plugin.spool import Spool
+
+
+def test_spool_replays_in_order_and_resumes_after_restart(tmp_path) -> None:
+    spool = Spool(str(tmp_path), segment_max_bytes=40)
+    for seq in range(5):
+        spool.append(f'{{"seq":{seq}}}'.encode())
+
+    first = spool.read_batch(2)
+    assert [record for record, _ in first] == [b'{"seq":0}', b'{"seq":1}']
+    spool.commit(first[-1][1])
+    spool.close()
+
+    reopened = Spool(str(tmp_path), segment_max_bytes=40)
+    reopened.append(b'{"seq":5}')
+    rest = reopened.read_batch(10)
+    reopened.commit(rest[-1][1])
+
+    assert [record for record, _ in rest] == [f'{{"seq":{seq}}}'.encode() for seq in range(2, 6)]
+    assert reopened.has_backlog() is False
+
+
+def test_spool_skips_corrupt_tail_of_a_segment(tmp_path) -> None:
+    spool = Spool(str(tmp_path))
+    spool.append(b"good")
+    spool.append(b"torn")
+    spool.close()
+    segment = next(name for name in os.listdir(tmp_path) if name.endswith(".seg"))
+    with open(tmp_path / segment, "r+b") as fh:
+        fh.truncate(os.path.getsize(tmp_path / segment) - 2)
+
+    reopened = Spool(str(tmp_path))
+    reopened.append(b"after")
+    records = reopened.read_batch(10)
+
+    assert [record for record, _ in records] == [b"good", b"after"]
+    assert reopened.corrupt_records == 1
+
+
+def test_spool_drops_oldest_segments_beyond_size_limit(tmp_path) -> None:
+    spool = Spool(str(tmp_path), segment_max_bytes=20, max_total_bytes=60)
+    for seq in range(10):
+        spool.append(b"x" * 12 + str(seq).encode())
+
+    records = spool.read_batch(20)
+
+    assert spool.dropped_segments > 0
+    assert records[-1][0] == b"x" * 12 + b"9"
+    assert len(records) < 10
+
+
+def test_spool_drains_past_a_torn_tail_after_restart(tmp_path) -> None:
+    spool = Spool(str(tmp_path))
+    spool.append(b"good")
+    spool.append(b"torn")
+    spool.close()
+    segment = next(name for name in os.listdir(tmp_path) if name.endswith(".seg"))
+    with open(tmp_path / segment, "r+b") as fh:
+        fh.truncate(os.path.getsize(tmp_path / segment) - 2)
+
+    reopened = Spool(str(tmp_path))
+    records = reopened.read_batch(10)
+    assert [record for record, _ in records] == [b"good"]
+    reopened.commit(records[-1][1])
+
+    assert reopened.has_backlog() is False
+    assert reopened.read_batch(10) == []
+    assert reopened.corrupt_records == 1
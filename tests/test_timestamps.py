@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import main
+from wingxtra_plugin.timestamps import CAPTURE_TS_KEY, IsoFormatter
+
+
+def test_iso_formatter_matches_datetime_isoformat() -> None:
+    formatter = IsoFormatter()
+
+    for unix_seconds in (0.0, 1718000000.123, 1718000000.9999, 1718000001.5, 1718000000.001):
+        expected = datetime.fromtimestamp(unix_seconds, timezone.utc).isoformat(timespec="milliseconds")
+        assert formatter.format(unix_seconds) == expected.replace("+00:00", "Z")
+
+
+def test_9102_payload_is_stamped_with_capture_time() -> None:
+    payload = main._build_payload_from_9102(
+        "WX-DRN-001",
+        {"mt": 9102, "ms": {"la": 1, "ln": 2}, CAPTURE_TS_KEY: 1718000000.25},
+    )
+
+    assert payload is not None
+    assert payload["ts"] == "2024-06-10T06:13:20.250Z"
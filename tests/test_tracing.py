@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import os
+import pstats
+import time
+
+from wingxtra_plugin import tracing
+
+
+def test_stage_timer_samples_one_call_in_n_into_a_ring() -> None:
+    timer = tracing.StageTimer("decode", sample_every=3, capacity=2)
+
+    for _ in range(9):
+        timer.stop(timer.start())
+    timer.record(0.5)  # 10th call: not sampled
+
+    assert len(timer.samples) == 2
+    assert timer.summary().samples == 2
+
+    off = tracing.StageTimer("decode")
+    assert off.start() == 0.0
+    off.record(1.0)
+    assert off.summary() == tracing.StageSummary("decode", 0, 0.0, 0.0, 0.0)
+
+
+def test_format_summary_lists_every_stage() -> None:
+    timer = tracing.StageTimer("post", sample_every=1)
+    for seconds in (0.001, 0.002, 0.010):
+        timer.record(seconds)
+
+    text = tracing.format_summary([timer.summary()])
+
+    assert text.splitlines()[1].split() == ["post", "3", "2000.0", "10000.0", "10000.0"]
+    assert [line.split()[0] for line in tracing.format_summary().splitlines()[1:]] == [
+        "capture",
+        "decode",
+        "filter",
+        "map",
+        "serialize",
+        "post",
+    ]
+
+
+def _busy(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profile_toggle_writes_folded_stacks(tmp_path) -> None:
+    profile = tracing.ProfileToggle(str(tmp_path), interval_seconds=0.001)
+
+    assert profile.toggle() is None and profile.active
+    _busy(0.05)
+    path = profile.toggle()
+
+    assert path is not None and path.endswith(".folded") and not profile.active
+    with open(path, encoding="utf-8") as fh:
+        lines = fh.read().splitlines()
+    assert any("_busy" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_profile_toggle_writes_cprofile_stats(tmp_path) -> None:
+    profile = tracing.ProfileToggle(str(tmp_path), mode=tracing.PROFILE_CPROFILE)
+
+    profile.toggle()
+    _busy(0.01)
+    path = profile.toggle()
+
+    assert path is not None and os.path.basename(path).endswith(".prof")
+    assert any(func[2] == "_busy" for func in pstats.Stats(path).stats)
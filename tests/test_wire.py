@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+import main
+from wingxtra_plugin.wire import decode_payload, encode_payload
+
+
+def test_binary_payload_round_trips_within_field_resolution() -> None:
+    payload = {
+        "schema_version": 1,
+        "drone_id": "WX-DRN-001",
+        "ts": "2026-03-01T12:34:56.789Z",
+        "position": {"lat": 5.6037123, "lon": -0.1870456, "alt_m": 120.34},
+        "attitude": {"yaw_deg": -90.0},
+        "velocity": {"groundspeed_mps": 12.34},
+        "battery": {"voltage_v": 15.21, "remaining_pct": 76},
+        "link": {"rssi_dbm": -71},
+        "state": {"armed": True, "mode": "AUTO"},
+    }
+
+    decoded = decode_payload(encode_payload(payload))
+
+    assert decoded == {**payload, "attitude": {"yaw_deg": 270.0}}
+
+
+def test_binary_9102_payload_is_much_smaller_than_json() -> None:
+    payload = main._build_payload_from_9102(
+        "WX-DRN-001", {"mt": 9102, "ms": {"la": 56037123, "ln": -1870456, "ha": 120.3, "y": 45}}
+    )
+
+    encoded = encode_payload(payload)
+
+    assert len(encoded) <= 40 < len(json.dumps(payload)) // 3
+    assert decode_payload(encoded)["position"]["lat"] == 5.6037123
+
+
+def test_binary_encoding_rejects_other_schema_versions() -> None:
+    with pytest.raises(ValueError):
+        encode_payload({"schema_version": 2, "drone_id": "x", "ts": "2026-01-01T00:00:00Z"})
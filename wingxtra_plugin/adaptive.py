@@ -0,0 +1,162 @@
+"""Adaptive send rate driven by aircraft motion and link quality."""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Any
+
+_METERS_PER_DEG_LAT = 111_320.0
+
+
+class AdaptiveRate:
+    """Pick the send rate for each payload between `min_hz` and `max_hz`.
+
+    The rate rises from `base_hz` towards `max_hz` as groundspeed, yaw rate
+    or climb rate approach their `*_full` thresholds, and drops to `min_hz`
+    while disarmed, stationary (below all three `stationary_*` limits) or on
+    a link weaker than `weak_rssi_dbm`.
+    A payload that is within the dead-band of the last one sent (position,
+    yaw, battery voltage and percentage, RSSI; `state` must match exactly) is
+    suppressed, unless nothing was sent for a full `min_hz` interval.
+    """
+
+    def __init__(
+        self,
+        base_hz: float = 3.0,
+        min_hz: float = 0.2,
+        max_hz: float = 5.0,
+        weak_rssi_dbm: float = -90.0,
+        speed_full_mps: float = 15.0,
+        yaw_rate_full_dps: float = 30.0,
+        climb_full_mps: float = 3.0,
+        stationary_speed_mps: float = 0.5,
+        stationary_yaw_rate_dps: float = 3.0,
+        stationary_climb_mps: float = 0.2,
+        deadband_m: float = 0.5,
+        deadband_yaw_deg: float = 2.0,
+        deadband_voltage_v: float = 0.05,
+        deadband_battery_pct: float = 1.0,
+        deadband_rssi_db: float = 2.0,
+    ) -> None:
+        self._min_hz = max(0.01, min_hz)
+        self._max_hz = max(self._min_hz, max_hz)
+        self._base_hz = min(self._max_hz, max(self._min_hz, base_hz))
+        self._weak_rssi = weak_rssi_dbm
+        self._speed_full = speed_full_mps
+        self._yaw_rate_full = yaw_rate_full_dps
+        self._climb_full = climb_full_mps
+        self._stationary_speed = stationary_speed_mps
+        self._stationary_yaw_rate = stationary_yaw_rate_dps
+        self._stationary_climb = stationary_climb_mps
+        self._deadband_m = deadband_m
+        self._deadband_yaw = deadband_yaw_deg
+        # fused battery and link readings jitter on nearly every sample
+        self._field_deadbands = {
+            ("battery", "voltage_v"): deadband_voltage_v,
+            ("battery", "remaining_pct"): deadband_battery_pct,
+            ("link", "rssi_dbm"): deadband_rssi_db,
+        }
+
+        self._previous: tuple[float, dict[str, Any]] | None = None
+        self._last_sent: tuple[float, dict[str, Any]] | None = None
+        self.hz = self._base_hz
+        self.suppressed = 0
+
+    @property
+    def interval_seconds(self) -> float:
+        return 1.0 / self.hz
+
+    def observe(self, payload: dict[str, Any], now: float | None = None) -> bool:
+        """Update the rate from `payload`; return False if it should not be sent."""
+        now = time.monotonic() if now is None else now
+        self.hz = self._rate_for(payload, now)
+        self._previous = (now, payload)
+
+        if self._last_sent is not None:
+            sent_at, sent = self._last_sent
+            if now - sent_at < 1.0 / self._min_hz and self._within_deadband(sent, payload):
+                self.suppressed += 1
+                return False
+        self._last_sent = (now, payload)
+        return True
+
+    def _rate_for(self, payload: dict[str, Any], now: float) -> float:
+        state = payload.get("state") or {}
+        rssi = _number((payload.get("link") or {}).get("rssi_dbm"))
+        if state.get("armed") is False or (rssi is not None and rssi < self._weak_rssi):
+            return self._min_hz
+
+        speed = _number((payload.get("velocity") or {}).get("groundspeed_mps"))
+        yaw_rate = climb = 0.0
+        if self._previous is not None:
+            then, previous = self._previous
+            dt = now - then
+            if dt > 0:
+                yaw_rate = abs(_yaw_delta(previous, payload)) / dt
+                old_alt, new_alt = _alt(previous), _alt(payload)
+                if old_alt is not None and new_alt is not None:
+                    climb = abs(new_alt - old_alt) / dt
+                if speed is None:
+                    moved = _distance_m(previous, payload)
+                    speed = None if moved is None else moved / dt
+
+        speed = speed or 0.0
+        if (
+            speed < self._stationary_speed
+            and yaw_rate < self._stationary_yaw_rate
+            and climb < self._stationary_climb
+        ):
+            return self._min_hz
+
+        score = min(1.0, max(speed / self._speed_full, yaw_rate / self._yaw_rate_full, climb / self._climb_full))
+        return self._base_hz + (self._max_hz - self._base_hz) * score
+
+    def _within_deadband(self, sent: dict[str, Any], payload: dict[str, Any]) -> bool:
+        if sent.get("state") != payload.get("state"):
+            return False
+        for section in ("battery", "link"):
+            old, new = sent.get(section) or {}, payload.get(section) or {}
+            for key in old.keys() | new.keys():
+                tolerance = self._field_deadbands.get((section, key))
+                old_value, new_value = _number(old.get(key)), _number(new.get(key))
+                if tolerance is not None and old_value is not None and new_value is not None:
+                    if abs(new_value - old_value) > tolerance:
+                        return False
+                elif old.get(key) != new.get(key):
+                    return False
+        moved = _distance_m(sent, payload)
+        if moved is None or moved > self._deadband_m:
+            return False
+        old_alt, new_alt = _alt(sent), _alt(payload)
+        if old_alt is not None and new_alt is not None and abs(new_alt - old_alt) > self._deadband_m:
+            return False
+        return abs(_yaw_delta(sent, payload)) <= self._deadband_yaw
+
+
+def _number(value: Any) -> float | None:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _alt(payload: dict[str, Any]) -> float | None:
+    return _number((payload.get("position") or {}).get("alt_m"))
+
+
+def _yaw_delta(old: dict[str, Any], new: dict[str, Any]) -> float:
+    a = _number((old.get("attitude") or {}).get("yaw_deg"))
+    b = _number((new.get("attitude") or {}).get("yaw_deg"))
+    if a is None or b is None:
+        return 0.0
+    return (b - a + 180.0) % 360.0 - 180.0
+
+
+def _distance_m(old: dict[str, Any], new: dict[str, Any]) -> float | None:
+    """Horizontal distance; equirectangular is plenty at telemetry step sizes."""
+    a, b = old.get("position") or {}, new.get("position") or {}
+    lat1, lon1 = _number(a.get("lat")), _number(a.get("lon"))
+    lat2, lon2 = _number(b.get("lat")), _number(b.get("lon"))
+    if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
+        return None
+    dy = (lat2 - lat1) * _METERS_PER_DEG_LAT
+    dx = (lon2 - lon1) * _METERS_PER_DEG_LAT * math.cos(math.radians((lat1 + lat2) / 2))
+    return math.hypot(dx, dy)
@@ -0,0 +1,404 @@
+"""asyncio runtime: one event loop for DataBus ingestion, uploads and retries.
+
+The threaded loops in `sender` block on socket timeouts and `time.sleep`;
+here the DataBus socket (bound port or sniffer fd) is read from loop
+callbacks and uploads run as tasks over a small pool of keep-alive
+connections, so a slow POST never delays ingestion.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import http.client
+import logging
+import ssl
+import time
+from collections import deque
+from typing import Any, Callable
+from urllib import error
+from urllib.parse import urlsplit
+
+from . import codec, metrics, tracing
+from .databus_lib.de_module import CModule
+from .databus_lib.udpClient import ChunkReassembler, ReassemblyStats, split_chunks
+from .pipeline import OVERFLOW_BLOCK, OVERFLOW_LATEST, OVERFLOW_POLICIES, QueueStats
+from .scheduler import OVERRUN_SKIP, RateScheduler
+from .sender import CONTENT_TYPE_JSON, RequestTiming, offline_backoff
+from .sniffer import DataBusSniffer
+from .timestamps import capture_clock
+
+# stream errors raised when the server closed a pooled connection while it sat idle
+_STALE_CONNECTION_ERRORS = (
+    asyncio.IncompleteReadError,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+_Connection = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class AsyncPayloadQueue:
+    """`PayloadQueue` for a single event loop.
+
+    Producers are loop callbacks and cannot wait, so when full `block`
+    rejects the new item (the socket buffer would overflow anyway) and
+    counts it as dropped; `latest` and `drop_oldest` behave as in the
+    threaded queue.
+    """
+
+    def __init__(self, maxsize: int = 1, policy: str = OVERFLOW_LATEST) -> None:
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown queue overflow policy: {policy}")
+        self._maxsize = max(1, maxsize)
+        self._policy = policy
+        self._items: deque[Any] = deque()
+        self._waiter: asyncio.Future[None] | None = None
+        self._error: BaseException | None = None
+        self._enqueued = 0
+        self._coalesced = 0
+        self._dropped = 0
+
+    def put(self, item: Any) -> None:
+        if len(self._items) >= self._maxsize:
+            if self._policy == OVERFLOW_LATEST:
+                self._items[-1] = item
+                self._coalesced += 1
+                self._enqueued += 1
+                self._wake()
+                return
+            self._dropped += 1
+            if self._policy == OVERFLOW_BLOCK:
+                return
+            self._items.popleft()
+        self._items.append(item)
+        self._enqueued += 1
+        self._wake()
+
+    async def get(self) -> Any:
+        """Wait for an item; re-raises a producer failure."""
+        while not self._items:
+            if self._error is not None:
+                raise RuntimeError("telemetry acquisition stopped") from self._error
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._items.popleft()
+
+    def fail(self, exc: BaseException) -> None:
+        self._error = exc
+        self._wake()
+
+    def stats(self) -> QueueStats:
+        return QueueStats(
+            depth=len(self._items),
+            enqueued=self._enqueued,
+            coalesced=self._coalesced,
+            dropped=self._dropped,
+        )
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+
+class DataBusProtocol(asyncio.DatagramProtocol):
+    """Bound-port DataBus transport: reassemble, filter and decode each datagram."""
+
+    def __init__(
+        self,
+        module: CModule,
+        on_message: Callable[[dict[str, Any]], None],
+        reassembler: ChunkReassembler | None = None,
+    ) -> None:
+        self._module = module
+        self._on_message = on_message
+        self._reassembler = reassembler or ChunkReassembler()
+        self._logger = logging.getLogger(__name__)
+        self.transport: asyncio.DatagramTransport | None = None
+
+    @property
+    def reassembly_stats(self) -> ReassemblyStats:
+        return self._reassembler.stats
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore[assignment]
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        message = self._reassembler.feed(addr, data)
+        if message is None:
+            return
+        # asyncio does not expose SO_TIMESTAMPNS; stamp on arrival in the loop callback
+        for decoded in self._module.decode_packets([memoryview(message)], [capture_clock()]):
+            self._on_message(decoded)
+
+    def error_received(self, exc: Exception) -> None:
+        self._logger.debug("DataBus socket error: %s", exc)
+
+
+async def open_databus_endpoint(
+    module: CModule,
+    on_message: Callable[[dict[str, Any]], None],
+    *,
+    comm_host: str,
+    comm_port: int,
+    listen_host: str,
+    listen_port: int,
+    packet_size: int = 8192,
+) -> asyncio.DatagramTransport:
+    """Bind the DataBus listen port and register `module` with the communicator."""
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: DataBusProtocol(module, on_message),
+        local_addr=(listen_host, listen_port),
+    )
+    for datagram in split_chunks(module.registration_message(), packet_size):
+        transport.sendto(datagram, (comm_host, comm_port))
+    return transport
+
+
+def watch_sniffer(sniffer: DataBusSniffer, on_message: Callable[[dict[str, Any]], None]) -> Callable[[], None]:
+    """Drain `sniffer` whenever its fd is readable; returns a callable that stops watching."""
+    loop = asyncio.get_running_loop()
+    fd = sniffer.fileno()
+
+    def readable() -> None:
+        for message in sniffer.drain():
+            on_message(message)
+
+    loop.add_reader(fd, readable)
+    return lambda: loop.remove_reader(fd)
+
+
+class AsyncTelemetrySender:
+    """POST telemetry over up to `max_concurrency` keep-alive HTTP/1.1 connections.
+
+    Mirrors `TelemetrySender` (without compression): idle connections are
+    replaced after `idle_timeout_seconds`, and a request on a reused
+    connection the server already closed is retried once on a fresh one.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        api_key: str,
+        timeout_seconds: float = 3.0,
+        idle_timeout_seconds: float = 30.0,
+        max_concurrency: int = 2,
+    ) -> None:
+        self._api_url = api_url
+        self._api_key = api_key
+        self._timeout = timeout_seconds
+        self._idle_timeout = idle_timeout_seconds
+        self.max_concurrency = max(1, max_concurrency)
+
+        parts = urlsplit(api_url)
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname or ""
+        self._port = parts.port or (443 if self._https else 80)
+        self._path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self._host_header = self._host if parts.port is None else f"{self._host}:{parts.port}"
+        self._ssl_context = ssl.create_default_context() if self._https else None
+
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._idle: list[tuple[_Connection, float]] = []
+        self.last_timing: RequestTiming | None = None
+
+    async def send(self, payload: dict[str, Any]) -> None:
+        started = tracing.SERIALIZE.start()
+        body = codec.dumps(payload)
+        tracing.SERIALIZE.stop(started)
+        status, resp_headers, _ = await self._post(body, CONTENT_TYPE_JSON)
+        if status >= 400:
+            raise error.HTTPError(self._api_url, status, "HTTP error", hdrs=resp_headers, fp=None)
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for (_, writer), _ in idle:
+            writer.close()
+
+    async def _post(self, body: bytes, content_type: str) -> tuple[int, http.client.HTTPMessage, bytes]:
+        request = (
+            f"POST {self._path} HTTP/1.1\r\n"
+            f"Host: {self._host_header}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"X-API-Key: {self._api_key}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "\r\n"
+        ).encode("latin-1") + body
+
+        async with self._slots:
+            started = time.monotonic()
+            conn = self._checkout(started)
+            try:
+                return await self._exchange(conn, request, started)
+            except _STALE_CONNECTION_ERRORS:
+                if conn is None:
+                    raise
+            # the server dropped an idle keep-alive connection; retry once on a fresh one
+            return await self._exchange(None, request, started)
+
+    def _checkout(self, now: float) -> _Connection | None:
+        while self._idle:
+            conn, last_used = self._idle.pop()
+            if now - last_used <= self._idle_timeout and not conn[1].is_closing():
+                return conn
+            conn[1].close()
+        return None
+
+    async def _exchange(
+        self,
+        conn: _Connection | None,
+        request: bytes,
+        started: float,
+    ) -> tuple[int, http.client.HTTPMessage, bytes]:
+        reused = conn is not None
+        connect_seconds = 0.0
+        writer: asyncio.StreamWriter | None = None
+        try:
+            if conn is None:
+                conn = await asyncio.wait_for(
+                    asyncio.open_connection(
+                        self._host,
+                        self._port,
+                        ssl=self._ssl_context,
+                        server_hostname=self._host if self._https else None,
+                    ),
+                    self._timeout,
+                )
+                connect_seconds = time.monotonic() - started
+            reader, writer = conn
+            writer.write(request)
+            status, headers, body, will_close = await asyncio.wait_for(
+                _read_response(reader, writer), self._timeout
+            )
+        except BaseException:
+            if writer is not None:
+                writer.close()
+            raise
+
+        now = time.monotonic()
+        if will_close:
+            writer.close()
+        else:
+            self._idle.append((conn, now))
+        self.last_timing = RequestTiming(
+            status=status,
+            reused_connection=reused,
+            connect_seconds=connect_seconds,
+            total_seconds=now - started,
+        )
+        metrics.SEND_LATENCY.observe(now - started)
+        tracing.POST.record(now - started)
+        metrics.HTTP_RESPONSES.inc_label(status)
+        return status, headers, body
+
+
+async def _read_response(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+) -> tuple[int, http.client.HTTPMessage, bytes, bool]:
+    await writer.drain()
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("connection closed before the response")
+    version, status, *_ = status_line.decode("latin-1").split(" ", 2)
+
+    headers = http.client.HTTPMessage()
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip()] = value.strip()
+
+    connection = (headers.get("Connection") or "").lower()
+    will_close = connection == "close" or (version == "HTTP/1.0" and connection != "keep-alive")
+    if (headers.get("Transfer-Encoding") or "").lower() == "chunked":
+        body = bytearray()
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0], 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            body += await reader.readexactly(size)
+            await reader.readexactly(2)
+    elif headers.get("Content-Length") is not None:
+        body = await reader.readexactly(int(headers["Content-Length"]))
+    else:
+        body = await reader.read()
+        will_close = True
+    return int(status), headers, bytes(body), will_close
+
+
+async def async_send_loop(
+    *,
+    queue: AsyncPayloadQueue,
+    sender: AsyncTelemetrySender,
+    send_interval_seconds: float,
+    offline_backoff_seconds: float,
+    overrun_policy: str = OVERRUN_SKIP,
+    scheduler: RateScheduler | None = None,
+    report_interval_seconds: float = 60.0,
+) -> None:
+    """Send the next queued payload every interval without waiting for the previous POST.
+
+    A tick whose every connection is still busy is skipped rather than
+    queued behind it. After a failed send the loop backs off like `send_loop`.
+    """
+    logger = logging.getLogger(__name__)
+    failures = 0
+    retry_at = 0.0
+    busy_ticks = 0
+    last_report = time.monotonic()
+    scheduler = scheduler or RateScheduler(send_interval_seconds, overrun_policy=overrun_policy)
+    metrics.track_scheduler(scheduler)
+    in_flight: set[asyncio.Task[None]] = set()
+
+    async def send_one(payload: dict[str, Any]) -> None:
+        nonlocal failures, retry_at
+        try:
+            await sender.send(payload)
+        except Exception as exc:  # intentionally broad for resilience
+            failures += 1
+            delay = offline_backoff(offline_backoff_seconds, failures)
+            retry_at = time.monotonic() + delay
+            metrics.SEND_FAILURES.inc()
+            metrics.BACKOFF_SECONDS.set(delay)
+            logger.warning("Send failed (%s). Retrying in %.1fs", exc, delay)
+        else:
+            failures = 0
+            metrics.BACKOFF_SECONDS.set(0.0)
+            metrics.observe_data_age(payload)
+
+    while True:
+        delay = retry_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+            scheduler.reset()
+
+        payload = await queue.get()
+        if len(in_flight) >= sender.max_concurrency:
+            busy_ticks += 1
+        else:
+            task = asyncio.create_task(send_one(payload))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+        now = time.monotonic()
+        if now - last_report >= report_interval_seconds:
+            rate = scheduler.stats()
+            stats = queue.stats()
+            logger.info(
+                "Send rate %.2f/%.2f Hz, busy ticks=%d, queue depth=%d coalesced=%d dropped=%d",
+                rate.achieved_hz,
+                rate.target_hz,
+                busy_ticks,
+                stats.depth,
+                stats.coalesced,
+                stats.dropped,
+            )
+            last_report = now
+        await scheduler.wait_async()
@@ -0,0 +1,36 @@
+"""JSON codec shared by the hot paths: bytes in, bytes out.
+
+Uses orjson when it is installed and falls back to the stdlib otherwise.
+Decode errors are raised as `ValueError` subclasses for both backends.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+Loads = Callable[[Any], Any]
+Dumps = Callable[[Any], bytes]
+
+
+def _stdlib_loads(data: bytes | bytearray | memoryview | str) -> Any:
+    if isinstance(data, memoryview):
+        data = str(data, "utf-8")
+    return json.loads(data)
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+BACKENDS: dict[str, tuple[Loads, Dumps]] = {"json": (_stdlib_loads, _stdlib_dumps)}
+if orjson is not None:
+    BACKENDS["orjson"] = (orjson.loads, orjson.dumps)
+
+BACKEND = "orjson" if "orjson" in BACKENDS else "json"
+loads, dumps = BACKENDS[BACKEND]
@@ -30,20 +30,68 @@ class Config:
     log_level: str = "INFO"
     simulate: bool = False
     de_module_name: str = "WX_TELEMETRY_SENDER"
+    batch_max_items: int = 1
+    batch_max_bytes: int = 64 * 1024
+    batch_max_age_seconds: float = 2.0
+    batch_format: str = "json"
+    http_compression: str = "none"
+    http_compression_min_bytes: int = 1024
+    queue_policy: str = "latest"
+    queue_size: int = 1
+    send_overrun_policy: str = "skip"
+    spool_dir: str = ""
+    spool_max_bytes: int = 256 * 1024 * 1024
+    spool_max_age_seconds: float = 7 * 24 * 3600
+    spool_replay_batch_items: int = 50
+    spool_replay_interval_seconds: float = 1.0
+    async_runtime: bool = False
+    http_max_concurrency: int = 2
+    sniff_mode: bool = True
+    sniff_iface: str = "lo"
+    sniff_capture: str = "socket"
+    gateway_table: str = ""
+    gateway_workers: int = 0
+    delta_encoding: bool = False
+    delta_keyframe_seconds: float = 10.0
+    wire_format: str = "json"
+    adaptive_rate: bool = False
+    send_hz_min: float = 0.2
+    send_hz_max: float = 5.0
+    weak_link_rssi_dbm: float = -90.0
+    event_lane: bool = False
+    event_battery_thresholds: tuple[int, ...] = (30, 20, 10)
+    event_link_lost_rssi_dbm: float = -100.0
+    event_max_attempts: int = 5
+    metrics_port: int = 0
+    metrics_host: str = "127.0.0.1"
+    trace_sample_every: int = 0
+    trace_capacity: int = 512
+    profile_dir: str = ""
+    profile_mode: str = "sample"
 
     @property
     def send_interval_seconds(self) -> float:
         return 1.0 / max(0.1, self.send_hz)
 
+    @property
+    def batching_enabled(self) -> bool:
+        return self.batch_max_items > 1
+
     @property
     def de_receive_port(self) -> int:
         """Backward-compatible alias for older naming (prefer `de_listen_port`)."""
         return self.de_listen_port
 
+    @property
+    def gateway_enabled(self) -> bool:
+        return bool(self.gateway_table)
+
     @classmethod
     def from_env(cls) -> "Config":
+        gateway_table = os.getenv("GATEWAY_TABLE", "")
         return cls(
-            drone_id=_required_env("DRONE_ID"),
+            # in gateway mode drone IDs come from the table
+            drone_id=os.getenv("DRONE_ID", "") if gateway_table else _required_env("DRONE_ID"),
             api_url=_required_env("API_URL"),
             api_key=_required_env("API_KEY"),
             send_hz=_float_env("SEND_HZ", 3.0),
@@ -64,6 +112,44 @@ class Config:
             log_level=os.getenv("LOG_LEVEL", "INFO"),
             simulate=_bool_env("SIMULATE", False),
             de_module_name=os.getenv("DE_MODULE_NAME", "WX_TELEMETRY_SENDER"),
+            batch_max_items=_int_env("BATCH_MAX_ITEMS", 1),
+            batch_max_bytes=_int_env("BATCH_MAX_BYTES", 64 * 1024),
+            batch_max_age_seconds=_float_env("BATCH_MAX_AGE_SECONDS", 2.0),
+            batch_format=os.getenv("BATCH_FORMAT", "json").strip().lower(),
+            http_compression=os.getenv("HTTP_COMPRESSION", "none").strip().lower(),
+            http_compression_min_bytes=_int_env("HTTP_COMPRESSION_MIN_BYTES", 1024),
+            queue_policy=os.getenv("QUEUE_POLICY", "latest").strip().lower(),
+            queue_size=_int_env("QUEUE_SIZE", 1),
+            send_overrun_policy=os.getenv("SEND_OVERRUN_POLICY", "skip").strip().lower(),
+            spool_dir=os.getenv("SPOOL_DIR", ""),
+            spool_max_bytes=_int_env("SPOOL_MAX_MB", 256) * 1024 * 1024,
+            spool_max_age_seconds=_float_env("SPOOL_MAX_AGE_HOURS", 168.0) * 3600,
+            spool_replay_batch_items=_int_env("SPOOL_REPLAY_BATCH", 50),
+            spool_replay_interval_seconds=_float_env("SPOOL_REPLAY_INTERVAL_SECONDS", 1.0),
+            async_runtime=_bool_env("ASYNC_RUNTIME", False),
+            http_max_concurrency=_int_env("HTTP_MAX_CONCURRENCY", 2),
+            sniff_mode=_bool_env("SNIFF_MODE", True),
+            sniff_iface=os.getenv("SNIFF_IFACE", "lo"),
+            sniff_capture=os.getenv("SNIFF_CAPTURE", "socket").strip().lower(),
+            gateway_table=gateway_table,
+            gateway_workers=_int_env("GATEWAY_WORKERS", 0),
+            delta_encoding=_bool_env("DELTA_ENCODING", False),
+            delta_keyframe_seconds=_float_env("DELTA_KEYFRAME_SECONDS", 10.0),
+            wire_format=os.getenv("WIRE_FORMAT", "json").strip().lower(),
+            adaptive_rate=_bool_env("ADAPTIVE_RATE", False),
+            send_hz_min=_float_env("SEND_HZ_MIN", 0.2),
+            send_hz_max=_float_env("SEND_HZ_MAX", 5.0),
+            weak_link_rssi_dbm=_float_env("WEAK_LINK_RSSI_DBM", -90.0),
+            event_lane=_bool_env("EVENT_LANE", False),
+            event_battery_thresholds=_int_csv_env("EVENT_BATTERY_THRESHOLDS", (30, 20, 10)),
+            event_link_lost_rssi_dbm=_float_env("EVENT_LINK_LOST_RSSI_DBM", -100.0),
+            event_max_attempts=_int_env("EVENT_MAX_ATTEMPTS", 5),
+            metrics_port=_int_env("METRICS_PORT", 0),
+            metrics_host=os.getenv("METRICS_HOST", "127.0.0.1"),
+            trace_sample_every=_int_env("TRACE_SAMPLE_EVERY", 0),
+            trace_capacity=_int_env("TRACE_CAPACITY", 512),
+            profile_dir=os.getenv("PROFILE_DIR", ""),
+            profile_mode=os.getenv("PROFILE_MODE", "sample").strip().lower(),
         )
 
 
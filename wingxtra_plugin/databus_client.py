@@ -1,10 +1,8 @@
 from __future__ import annotations
 
 import logging
-import os
 import random
-from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Iterator
 
 from .databus_lib.de_module import (
     MODULE_CLASS_GENERIC,
@@ -20,26 +18,123 @@ from .databus_lib.messages import (
     TYPE_AndruavMessage_NAV_INFO,
     TYPE_AndruavMessage_POWER,
 )
-from .sniffer import sniff_de_databus_json
+from .extract import ShapeExtractor
+from .sniffer import CAPTURE_SOCKET, DataBusSniffer
+
+
+_logger = logging.getLogger(__name__)
+
+SECTIONS = ("position", "velocity", "state", "battery", "attitude", "link")
+_SECTION_FIELDS = (
+    ("lat", "lon", "alt_m"),
+    ("groundspeed_mps",),
+    ("armed", "mode"),
+    ("voltage_v", "remaining_pct"),
+    ("yaw_deg",),
+    ("rssi_dbm",),
+)
+_POSITION, _VELOCITY, _STATE, _BATTERY, _ATTITUDE, _LINK = range(len(SECTIONS))
 
 
-@dataclass
 class TelemetryState:
-    position: dict[str, Any] = field(default_factory=dict)
-    velocity: dict[str, Any] = field(default_factory=dict)
-    state: dict[str, Any] = field(default_factory=dict)
-    battery: dict[str, Any] = field(default_factory=dict)
-    attitude: dict[str, Any] = field(default_factory=dict)
-    link: dict[str, Any] = field(default_factory=dict)
+    """Latest fused telemetry, updated in place.
 
-    def to_payload(self) -> dict[str, Any]:
-        payload: dict[str, Any] = {}
-        for key in ("position", "velocity", "state", "battery", "attitude", "link"):
-            value = getattr(self, key)
-            if value:
-                payload[key] = dict(value)
+    Every section carries a version that only moves when one of its values
+    actually changes, and `to_payload` keeps returning the same dict until
+    then. Payloads and their section dicts are shared: treat them as read-only.
+    """
+
+    __slots__ = (
+        "lat",
+        "lon",
+        "alt_m",
+        "groundspeed_mps",
+        "armed",
+        "mode",
+        "voltage_v",
+        "remaining_pct",
+        "yaw_deg",
+        "rssi_dbm",
+        "version",
+        "_versions",
+        "_sections",
+        "_payload",
+        "_payload_version",
+    )
+
+    def __init__(self) -> None:
+        for section in _SECTION_FIELDS:
+            for name in section:
+                setattr(self, name, None)
+        self.version = 0
+        self._versions = [0] * len(SECTIONS)
+        self._sections: list[dict[str, Any] | None] = [None] * len(SECTIONS)
+        self._payload: dict[str, Any] = {}
+        self._payload_version = 0
+
+    def section_version(self, section: str) -> int:
+        return self._versions[SECTIONS.index(section)]
+
+    def update_position(self, lat: Any, lon: Any, alt_m: Any) -> bool:
+        return self._update(_POSITION, lat, lon, alt_m)
+
+    def update_velocity(self, groundspeed_mps: Any) -> bool:
+        return self._update(_VELOCITY, groundspeed_mps)
+
+    def update_state(self, armed: bool, mode: Any) -> bool:
+        return self._update(_STATE, armed, mode)
+
+    def update_battery(self, voltage_v: Any, remaining_pct: Any) -> bool:
+        return self._update(_BATTERY, voltage_v, remaining_pct)
+
+    def update_attitude(self, yaw_deg: Any) -> bool:
+        return self._update(_ATTITUDE, yaw_deg)
+
+    def update_link(self, rssi_dbm: Any) -> bool:
+        return self._update(_LINK, rssi_dbm)
+
+    def section(self, section: str) -> dict[str, Any] | None:
+        """The section as a payload dict, or None if it was never set."""
+        index = SECTIONS.index(section)
+        if self._versions[index] == 0:
+            return None
+        cached = self._sections[index]
+        if cached is None:
+            cached = {name: getattr(self, name) for name in _SECTION_FIELDS[index]}
+            self._sections[index] = cached
+        return cached
+
+    def merge_into(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """Add every known section that `payload` does not already carry."""
+        for name in SECTIONS:
+            if name not in payload:
+                value = self.section(name)
+                if value is not None:
+                    payload[name] = value
         return payload
 
+    def to_payload(self) -> dict[str, Any]:
+        if self._payload_version != self.version:
+            payload: dict[str, Any] = {}
+            for name in SECTIONS:
+                value = self.section(name)
+                if value is not None:
+                    payload[name] = value
+            self._payload = payload
+            self._payload_version = self.version
+        return self._payload
+
+    def _update(self, index: int, *values: Any) -> bool:
+        names = _SECTION_FIELDS[index]
+        if self._versions[index] and all(getattr(self, name) == value for name, value in zip(names, values)):
+            return False
+        for name, value in zip(names, values):
+            setattr(self, name, value)
+        self._versions[index] += 1
+        self._sections[index] = None
+        self.version += 1
+        return True
+
 
 class DataBusClient:
     def __init__(
@@ -52,7 +147,9 @@ class DataBusClient:
         module_version: str = "0.1.0",
         message_filter: list[int] | None = None,
         module: CModule | None = None,
-        sniff_mode: bool | None = None,
+        sniff_mode: bool = True,
+        sniff_iface: str = "lo",
+        sniff_capture: str = CAPTURE_SOCKET,
     ) -> None:
         self._logger = logging.getLogger(__name__)
         self._state = TelemetryState()
@@ -63,10 +160,12 @@ class DataBusClient:
             TYPE_AndruavMessage_NAV_INFO,
         ]
 
-        env_sniff = os.getenv("SNIFF_MODE", "true").lower() in ("1", "true", "yes")
-        self._sniff_mode = env_sniff if sniff_mode is None else sniff_mode
-        self._sniff_port = int(os.getenv("DE_COMM_PORT", str(comm_port)))
-        self._sniff_iface = os.getenv("SNIFF_IFACE", "lo")
+        self._sniff_mode = sniff_mode
+        self._sniff_port = comm_port
+        self._sniff_iface = sniff_iface
+        self._sniff_capture = sniff_capture
+        self._sniffer: DataBusSniffer | None = None
+        self._sniffer_warned = False
 
         module_key = "".join(str(random.randint(0, 9)) for _ in range(12))
         self._module.defineModule(
@@ -91,75 +190,122 @@ class DataBusClient:
 
     def read_one_databus_message(self) -> dict[str, Any] | None:
         if self._sniff_mode:
-            return sniff_de_databus_json(self._sniff_port, iface=self._sniff_iface, timeout_s=1.0)
+            sniffer = self._open_sniffer()
+            if sniffer is None:
+                return None
+            return sniffer.read(timeout_s=1.0)
         return self._module.receive_message()
 
+    @property
+    def state(self) -> TelemetryState:
+        """Fused GPS/POWER/NAV_INFO state, updated by every message read."""
+        return self._state
+
+    def messages(self) -> Iterator[dict[str, Any]]:
+        """Yield DataBus messages continuously from the active transport.
+
+        Each message has already been applied to `state` when it is yielded.
+        """
+        while True:
+            message = self.read_one_databus_message()
+            if message is not None:
+                if self._sniff_mode:
+                    # bound-port messages reach _on_receive through the module callback
+                    self._on_receive(message)
+                yield message
+
+    def close(self) -> None:
+        if self._sniffer is not None:
+            self._sniffer.close()
+            self._sniffer = None
+
+    def _open_sniffer(self) -> DataBusSniffer | None:
+        if self._sniffer is None:
+            sniffer = DataBusSniffer(self._sniff_port, iface=self._sniff_iface, capture=self._sniff_capture)
+            try:
+                sniffer.open()
+            except OSError as exc:
+                if not self._sniffer_warned:
+                    self._logger.warning("Unable to open sniffer on %s (%s)", self._sniff_iface, exc)
+                    self._sniffer_warned = True
+                return None
+            self._sniffer = sniffer
+        return self._sniffer
+
     def receive(self) -> dict[str, Any]:
         message = self.read_one_databus_message()
-        if message is None:
-            return self._state.to_payload()
-        self._on_receive(message)
+        if message is not None and self._sniff_mode:
+            self._on_receive(message)
         return self._state.to_payload()
 
     def _on_receive(self, jMsg: dict[str, Any]) -> None:
-        msg_type = jMsg.get(ANDRUAV_PROTOCOL_MESSAGE_TYPE)
-        if msg_type is None:
-            for key in ALT_PROTOCOL_MESSAGE_TYPE_KEYS:
-                if key in jMsg:
-                    msg_type = jMsg[key]
-                    break
-
-        msg_type = _normalize_message_type(msg_type)
-
-        cmd = jMsg.get(ANDRUAV_PROTOCOL_MESSAGE_CMD)
-        if cmd is None:
-            for key in ALT_PROTOCOL_MESSAGE_CMD_KEYS:
-                if key in jMsg:
-                    cmd = jMsg[key]
-                    break
-        if not isinstance(cmd, dict):
-            cmd = {}
-
-        if cmd:
-            self._logger.debug("DataBus message type=%s cmd.keys=%s", msg_type, sorted(cmd.keys()))
-
-        if msg_type == TYPE_AndruavMessage_GPS:
-            self._update_gps(cmd)
-        elif msg_type == TYPE_AndruavMessage_POWER:
-            self._update_power(cmd)
-        elif msg_type == TYPE_AndruavMessage_NAV_INFO:
-            self._update_nav(cmd)
-
-    def _update_gps(self, cmd: dict[str, Any]) -> None:
-        self._state.position = {
-            "lat": _coalesce(cmd, "lat", "latitude", "y"),
-            "lon": _coalesce(cmd, "lon", "lng", "longitude", "x"),
-            "alt_m": _coalesce(cmd, "alt", "alt_m", "altitude", "z"),
-        }
-
-    def _update_power(self, cmd: dict[str, Any]) -> None:
-        self._state.battery = {
-            "voltage_v": _coalesce(cmd, "voltage", "voltage_v", "vbat"),
-            "remaining_pct": _coalesce(cmd, "battery_remaining", "remaining", "remaining_pct"),
-        }
-
-    def _update_nav(self, cmd: dict[str, Any]) -> None:
-        self._state.velocity = {
-            "groundspeed_mps": _coalesce(cmd, "groundspeed", "groundspeed_mps", "speed"),
-        }
-        self._state.attitude = {"yaw_deg": _coalesce(cmd, "yaw", "yaw_deg", "heading")}
-        self._state.state = {
-            "armed": bool(_coalesce(cmd, "armed", default=False)),
-            "mode": _coalesce(cmd, "mode", "flight_mode", default="UNKNOWN"),
-        }
-        self._state.link = {"rssi_dbm": _coalesce(cmd, "rssi", "rssi_dbm", default=None)}
-
-
-def _coalesce(data: dict[str, Any], *keys: str, default: Any = None) -> Any:
-    for key in keys:
-        if key in data and data[key] is not None:
-            return data[key]
-    return default
+        apply_message(self._state, jMsg)
+
+
+def apply_message(state: TelemetryState, jMsg: dict[str, Any]) -> int | None:
+    """Fold a GPS, POWER or NAV_INFO message into `state`; returns its message type."""
+    msg_type = jMsg.get(ANDRUAV_PROTOCOL_MESSAGE_TYPE)
+    if msg_type is None:
+        for key in ALT_PROTOCOL_MESSAGE_TYPE_KEYS:
+            if key in jMsg:
+                msg_type = jMsg[key]
+                break
+
+    msg_type = _normalize_message_type(msg_type)
+
+    cmd = jMsg.get(ANDRUAV_PROTOCOL_MESSAGE_CMD)
+    if cmd is None:
+        for key in ALT_PROTOCOL_MESSAGE_CMD_KEYS:
+            if key in jMsg:
+                cmd = jMsg[key]
+                break
+    if not isinstance(cmd, dict):
+        cmd = {}
+
+    if cmd:
+        _logger.debug("DataBus message type=%s cmd.keys=%s", msg_type, sorted(cmd.keys()))
+
+    if msg_type == TYPE_AndruavMessage_GPS:
+        _update_gps(state, cmd)
+    elif msg_type == TYPE_AndruavMessage_POWER:
+        _update_power(state, cmd)
+    elif msg_type == TYPE_AndruavMessage_NAV_INFO:
+        _update_nav(state, cmd)
+    return msg_type
+
+
+_GPS_FIELDS = ShapeExtractor(
+    ("lat", "latitude", "y"),
+    ("lon", "lng", "longitude", "x"),
+    ("alt", "alt_m", "altitude", "z"),
+)
+_POWER_FIELDS = ShapeExtractor(
+    ("voltage", "voltage_v", "vbat"),
+    ("battery_remaining", "remaining", "remaining_pct"),
+)
+_NAV_FIELDS = ShapeExtractor(
+    ("groundspeed", "groundspeed_mps", "speed"),
+    ("yaw", "yaw_deg", "heading"),
+    ("armed",),
+    ("mode", "flight_mode"),
+    ("rssi", "rssi_dbm"),
+)
+
+
+def _update_gps(state: TelemetryState, cmd: dict[str, Any]) -> None:
+    state.update_position(*_GPS_FIELDS(cmd))
+
+
+def _update_power(state: TelemetryState, cmd: dict[str, Any]) -> None:
+    state.update_battery(*_POWER_FIELDS(cmd))
+
+
+def _update_nav(state: TelemetryState, cmd: dict[str, Any]) -> None:
+    groundspeed, yaw, armed, mode, rssi = _NAV_FIELDS(cmd)
+    state.update_velocity(groundspeed)
+    state.update_attitude(yaw)
+    state.update_state(bool(armed), "UNKNOWN" if mode is None else mode)
+    state.update_link(rssi)
 
 
 def _normalize_message_type(value: Any) -> int | None:
@@ -1,16 +1,30 @@
 from __future__ import annotations
 
-import json
 import logging
+import re
+import time
+from collections import deque
 from typing import Any, Callable
 
+from .. import codec, metrics, tracing
+from ..timestamps import CAPTURE_TS_KEY
 from .messages import ALT_PROTOCOL_MESSAGE_TYPE_KEYS, ANDRUAV_PROTOCOL_MESSAGE_TYPE
-from .udpClient import UdpClient
+from .udpClient import ReassemblyStats, UdpClient
 
 MODULE_CLASS_GENERIC = "MODULE_CLASS_GENERIC"
 MODULE_FEATURE_RECEIVING_TELEMETRY = "MODULE_FEATURE_RECEIVING_TELEMETRY"
 MODULE_FEATURE_SENDING_TELEMETRY = "MODULE_FEATURE_SENDING_TELEMETRY"
 
+_TYPE_KEYS = (ANDRUAV_PROTOCOL_MESSAGE_TYPE, *ALT_PROTOCOL_MESSAGE_TYPE_KEYS)
+_TYPE_FIELD_RE = re.compile(
+    rb'"(' + b"|".join(re.escape(key.encode("utf-8")) for key in _TYPE_KEYS) + rb')"\s*:\s*'
+    rb'("(?:[^"\\]|\\.)*"|[^,}\s]+)'
+)
+_NESTED_OBJECT_RE = re.compile(rb"\{")
+_PRIMARY_TYPE_KEY = ANDRUAV_PROTOCOL_MESSAGE_TYPE.encode("utf-8")
+_ALT_TYPE_KEYS = tuple(key.encode("utf-8") for key in ALT_PROTOCOL_MESSAGE_TYPE_KEYS)
+_UNDECIDED = object()
+
 
 class CModule:
     def __init__(self) -> None:
@@ -21,7 +35,9 @@ class CModule:
         self._listen_host = "0.0.0.0"
         self._listen_port = 61233
         self._features: list[str] = []
-        self._message_filter: list[int] = []
+        self._subscriptions: list[int] = []
+        self._message_filter: frozenset[int] = frozenset()
+        self._pending: deque[dict[str, Any]] = deque()
         self._logger = logging.getLogger(__name__)
 
     def defineModule(
@@ -38,7 +54,8 @@ class CModule:
             "module_key": module_key,
             "module_version": module_version,
         }
-        self._message_filter = list(message_filter)
+        self._subscriptions = list(message_filter)
+        self._message_filter = frozenset(self._subscriptions)
 
     def addModuleFeatures(self, feature: str) -> None:
         self._features.append(feature)
@@ -57,39 +74,110 @@ class CModule:
         self._listen_port = listen_port
         self._udp = UdpClient(listen_ip, listen_port, packet_size=packet_size)
 
+    @property
+    def reassembly_stats(self) -> ReassemblyStats:
+        """Chunk reassembly counts of the UDP channel; all zero before it is initialized."""
+        if self._udp is None:
+            return ReassemblyStats()
+        return self._udp.reassembly_stats
+
     def connect(self) -> None:
         if self._udp is None:
             raise RuntimeError("UDP channel not initialized")
+        self._udp.send(self._comm_host, self._comm_port, self.registration_message())
+
+    def registration_message(self) -> bytes:
         hello = {
             "event": "register",
             "module": self._module_info,
             "features": self._features,
-            "message_filter": self._message_filter,
+            "message_filter": self._subscriptions,
         }
-        self._udp.send(self._comm_host, self._comm_port, json.dumps(hello).encode("utf-8"))
+        return codec.dumps(hello)
 
     def receive_message(self) -> dict[str, Any]:
         if self._udp is None:
             raise RuntimeError("UDP channel not initialized")
 
-        while True:
-            packet = self._udp.recv()
-            if packet is None:
-                continue
-            message = json.loads(packet.decode("utf-8"))
+        while not self._pending:
+            self._pending.extend(self._receive_batch())
+
+        message = self._pending.popleft()
+        self._dispatch(message)
+        return message
+
+    def drain_messages(self) -> list[dict[str, Any]]:
+        """Receive one batch of datagrams and return every accepted message.
+
+        Messages already queued by `receive_message` are returned first.
+        """
+        if self._udp is None:
+            raise RuntimeError("UDP channel not initialized")
+
+        messages = list(self._pending)
+        self._pending.clear()
+        messages.extend(self._receive_batch())
+        for message in messages:
+            self._dispatch(message)
+        return messages
+
+    def decode_packets(
+        self,
+        packets: list[memoryview],
+        captured_at: list[float | None] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Decode complete DataBus datagrams, keeping only subscribed message types.
+
+        `captured_at`, aligned with `packets`, is stored on each message under
+        `CAPTURE_TS_KEY`.
+        """
+        if captured_at is None or len(captured_at) != len(packets):
+            captured_at = [None] * len(packets)
+        messages: list[dict[str, Any]] = []
+        for packet, stamp in zip(packets, captured_at):
+            metrics.DATABUS_PACKETS.inc_label("udp")
+            metrics.DATABUS_BYTES.inc_label("udp", len(packet))
+            if stamp is not None:
+                tracing.CAPTURE.record(time.time() - stamp)
+            if self._message_filter:
+                # reject unsubscribed types before paying for a full parse
+                started = tracing.FILTER.start()
+                peeked = _peek_message_type(packet)
+                tracing.FILTER.stop(started)
+                if peeked is not _UNDECIDED and peeked is not None and peeked not in self._message_filter:
+                    metrics.DATABUS_FILTERED.inc_label(peeked)
+                    continue
+            started = tracing.DECODE.start()
+            try:
+                message = codec.loads(packet)
+            except ValueError:
+                self._logger.debug("Dropping undecodable DataBus packet (%d bytes)", len(packet))
+                message = None
+            tracing.DECODE.stop(started)
             if not isinstance(message, dict):
+                metrics.DATABUS_DECODE_FAILURES.inc_label("udp")
                 continue
 
             msg_type = _to_int_or_none(_extract_message_type(message))
             if self._message_filter and msg_type is not None and msg_type not in self._message_filter:
+                metrics.DATABUS_FILTERED.inc_label(msg_type)
                 continue
+            if stamp is not None:
+                message[CAPTURE_TS_KEY] = stamp
+            messages.append(message)
+        return messages
+
+    def _receive_batch(self) -> list[dict[str, Any]]:
+        assert self._udp is not None
+        packets = self._udp.recv_batch()
+        return self.decode_packets(packets, self._udp.batch_timestamps)
 
-            if self.m_OnReceive:
-                try:
-                    self.m_OnReceive(message)
-                except Exception:  # pragma: no cover
-                    self._logger.exception("m_OnReceive callback failed")
-            return message
+    def _dispatch(self, message: dict[str, Any]) -> None:
+        if self.m_OnReceive:
+            try:
+                self.m_OnReceive(message)
+            except Exception:  # pragma: no cover
+                self._logger.exception("m_OnReceive callback failed")
 
 
 def _extract_message_type(message: dict[str, Any]) -> Any:
@@ -102,6 +190,39 @@ def _extract_message_type(message: dict[str, Any]) -> Any:
     return None
 
 
+def _peek_message_type(packet: bytes | memoryview) -> Any:
+    """Read the message type from raw JSON bytes without a full decode.
+
+    Mirrors `_extract_message_type` but only trusts keys that appear before
+    the first nested object; returns `_UNDECIDED` when that is not enough to
+    be sure and the caller must decode the whole message.
+    """
+    nested = _NESTED_OBJECT_RE.search(packet, 1)
+    end = nested.start() if nested is not None else len(packet)
+    found: dict[bytes, bytes] = {}
+    for match in _TYPE_FIELD_RE.finditer(packet, 0, end):
+        found.setdefault(match.group(1), match.group(2))
+
+    primary = found.get(_PRIMARY_TYPE_KEY)
+    if primary is not None and primary != b"null":
+        return _to_int_or_none(_decode_json_token(primary))
+    if nested is not None:
+        # the deciding key may follow the nested object
+        return _UNDECIDED
+    for key in _ALT_TYPE_KEYS:
+        token = found.get(key)
+        if token is not None:
+            return _to_int_or_none(_decode_json_token(token))
+    return None
+
+
+def _decode_json_token(token: bytes) -> Any:
+    try:
+        return codec.loads(token)
+    except ValueError:
+        return None
+
+
 def _to_int_or_none(value: Any) -> int | None:
     try:
         if value is None:
@@ -3,10 +3,12 @@
 # protocol keys used by DroneEngage templates
 ANDRUAV_PROTOCOL_MESSAGE_TYPE = "mt"
 ANDRUAV_PROTOCOL_MESSAGE_CMD = "ms"
+ANDRUAV_PROTOCOL_SENDER = "sd"
 
 # common alternates seen in integrations
 ALT_PROTOCOL_MESSAGE_TYPE_KEYS = ("message_type", "messageType", "type")
 ALT_PROTOCOL_MESSAGE_CMD_KEYS = ("cmd", "messageCmd", "message", "payload")
+ALT_PROTOCOL_SENDER_KEYS = ("party_id", "partyID", "sender")
 
 # Message types
 TYPE_AndruavMessage_GPS = 1002
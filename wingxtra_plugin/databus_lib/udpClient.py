@@ -1,40 +1,241 @@
 from __future__ import annotations
 
 import socket
-from typing import Optional
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional, Union
+
+from .. import metrics
+from ..timestamps import TIMESTAMP_ANCBUF_SIZE, capture_time, enable_kernel_timestamps
+
+# final chunk of a multi-chunk message, mirroring the 0xFFFF end marker of DroneEngage
+CHUNK_LAST_INDEX = 0xFFFF
+
+Packet = Union[bytes, memoryview]
 
 
 class UdpClient:
-    def __init__(self, listen_host: str, listen_port: int, packet_size: int = 8192) -> None:
+    def __init__(
+        self,
+        listen_host: str,
+        listen_port: int,
+        packet_size: int = 8192,
+        batch_size: int = 64,
+        reassembly_max_bytes: int = 1 << 20,
+        reassembly_timeout_s: float = 2.0,
+    ) -> None:
         self._packet_size = packet_size
         self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self._sock.bind((listen_host, listen_port))
         self._sock.settimeout(1.0)
+        enable_kernel_timestamps(self._sock)
+        self._batch_timestamps: list[Optional[float]] = []
 
-    def send(self, host: str, port: int, payload: bytes) -> None:
-        if len(payload) <= self._packet_size:
-            self._sock.sendto(payload, (host, port))
-            return
+        # preallocated receive pool: one fixed slot per datagram in a batch
+        self._slot_size = packet_size + 64
+        self._batch_size = max(1, batch_size)
+        self._pool = memoryview(bytearray(self._slot_size * self._batch_size))
+        self._reassembler = ChunkReassembler(max_bytes=reassembly_max_bytes, timeout_s=reassembly_timeout_s)
+
+    @property
+    def batch_timestamps(self) -> list[Optional[float]]:
+        """Kernel receive times (Unix seconds) for the views of the last `recv_batch`."""
+        return self._batch_timestamps
 
-        index = 0
-        for chunk_start in range(0, len(payload), self._packet_size):
-            chunk = payload[chunk_start : chunk_start + self._packet_size]
-            header = f"{index}|".encode("utf-8")
-            self._sock.sendto(header + chunk, (host, port))
-            index += 1
+    @property
+    def reassembly_stats(self) -> "ReassemblyStats":
+        return self._reassembler.stats
+
+    def send(self, host: str, port: int, payload: bytes) -> None:
+        for datagram in split_chunks(payload, self._packet_size):
+            self._sock.sendto(datagram, (host, port))
 
     def recv(self) -> Optional[bytes]:
         try:
-            packet, _addr = self._sock.recvfrom(self._packet_size + 64)
+            packet, addr = self._sock.recvfrom(self._packet_size + 64)
         except socket.timeout:
             return None
 
-        # best-effort chunk strip: "<index>|<data>"
-        if b"|" in packet[:16]:
-            prefix, remainder = packet.split(b"|", 1)
-            if prefix.isdigit():
-                return remainder
-        return packet
+        message = self._reassembler.feed(addr, packet)
+        return None if message is None else bytes(message)
+
+    def recv_batch(self) -> list[memoryview]:
+        """Receive up to `batch_size` datagrams per wakeup into the buffer pool.
+
+        Blocks (up to the socket timeout) for the first datagram, then drains
+        whatever is already queued without blocking. Chunked messages are only
+        returned once fully reassembled, stamped with the receive time of their
+        last chunk. Returned views may point into the pool and are only valid
+        until the next `recv_batch` call.
+        """
+        views: list[memoryview] = []
+        stamps: list[Optional[float]] = []
+        timeout = self._sock.gettimeout()
+        try:
+            for index in range(self._batch_size):
+                slot = self._pool[index * self._slot_size : (index + 1) * self._slot_size]
+                try:
+                    nbytes, ancdata, _flags, addr = self._sock.recvmsg_into([slot], TIMESTAMP_ANCBUF_SIZE)
+                except (socket.timeout, BlockingIOError):
+                    break
+                message = self._reassembler.feed(addr, slot[:nbytes])
+                if message is not None:
+                    views.append(memoryview(message))
+                    stamps.append(capture_time(ancdata))
+                if index == 0:
+                    # drain the rest of the queue without waiting again
+                    self._sock.setblocking(False)
+        finally:
+            self._sock.settimeout(timeout)
+        self._batch_timestamps = stamps
+        return views
 
     def close(self) -> None:
         self._sock.close()
+
+
+def split_chunks(payload: bytes, packet_size: int) -> list[bytes]:
+    """Frame `payload` as DataBus datagrams, chunking it if it exceeds `packet_size`."""
+    if len(payload) <= packet_size:
+        return [payload]
+
+    datagrams: list[bytes] = []
+    starts = range(0, len(payload), packet_size)
+    for index, chunk_start in enumerate(starts):
+        chunk = payload[chunk_start : chunk_start + packet_size]
+        header = f"{CHUNK_LAST_INDEX}:{index}" if chunk_start == starts[-1] else str(index)
+        datagrams.append(f"{header}|".encode("utf-8") + chunk)
+    return datagrams
+
+
+@dataclass
+class ReassemblyStats:
+    completed: int = 0
+    incomplete: int = 0  # abandoned with chunks missing (restarted, timed out or gap)
+    evicted: int = 0  # dropped to honour the reassembly memory cap
+
+
+@dataclass
+class _PartialMessage:
+    updated_at: float
+    chunks: dict[int, bytes] = field(default_factory=dict)
+    size: int = 0
+    total: int | None = None  # known once the final chunk arrives
+
+
+class ChunkReassembler:
+    """Rebuild `"<index>|<data>"` chunk sequences per sender.
+
+    Indices count up from 0; the final chunk is framed `"<CHUNK_LAST_INDEX>:<index>|"`
+    so the receiver knows how many chunks to expect. Chunks may arrive in
+    any order and a message completes only once every index is present.
+    Unchunked datagrams pass straight through. Partial messages are kept in
+    LRU order, expire after `timeout_s` without a new chunk, and are evicted
+    oldest-first once they hold more than `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = 1 << 20, timeout_s: float = 2.0, max_entries: int = 64) -> None:
+        self._max_bytes = max_bytes
+        self._timeout = timeout_s
+        self._max_entries = max(1, max_entries)
+        self._entries: OrderedDict[Any, _PartialMessage] = OrderedDict()
+        self._bytes = 0
+        self.stats = ReassemblyStats()
+
+    @property
+    def pending_bytes(self) -> int:
+        return self._bytes
+
+    def feed(self, sender: Any, packet: Packet, now: float | None = None) -> Packet | None:
+        """Return a complete message for `packet`, or None while chunks are outstanding."""
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+
+        parsed = _split_chunk_header(packet)
+        if parsed is None:
+            return packet
+        index, total, data = parsed
+
+        entry = self._entries.get(sender)
+        if index == CHUNK_LAST_INDEX and total is None:
+            # final chunk without its position: the message length is unknown
+            if entry is not None:
+                self._discard(sender)
+            self._count("incomplete")
+            return None
+        if entry is not None and (
+            (index == 0 and 0 in entry.chunks)
+            or (total is not None and entry.total is not None and total != entry.total)
+        ):
+            # sender restarted before finishing the previous message
+            self._discard(sender)
+            self._count("incomplete")
+            entry = None
+
+        if entry is None:
+            entry = _PartialMessage(updated_at=now)
+            self._entries[sender] = entry
+        else:
+            entry.updated_at = now
+            self._entries.move_to_end(sender)
+        if total is not None:
+            entry.total = total
+        if entry.total is not None and any(position >= entry.total for position in (index, *entry.chunks)):
+            # a chunk beyond the announced end cannot belong to this message
+            self._discard(sender)
+            self._count("incomplete")
+            return None
+
+        chunk = bytes(data)
+        previous = entry.chunks.get(index)
+        if previous is not None:
+            entry.size -= len(previous)
+            self._bytes -= len(previous)
+        entry.chunks[index] = chunk
+        entry.size += len(chunk)
+        self._bytes += len(chunk)
+
+        if entry.total is not None and len(entry.chunks) == entry.total:
+            self._discard(sender)
+            self._count("completed")
+            return b"".join(entry.chunks[position] for position in range(entry.total))
+
+        while self._entries and (self._bytes > self._max_bytes or len(self._entries) > self._max_entries):
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self._count("evicted")
+        return None
+
+    def _expire(self, now: float) -> None:
+        while self._entries:
+            oldest, entry = next(iter(self._entries.items()))
+            if now - entry.updated_at < self._timeout:
+                break
+            self._discard(oldest)
+            self._count("incomplete")
+
+    def _count(self, outcome: str) -> None:
+        setattr(self.stats, outcome, getattr(self.stats, outcome) + 1)
+        metrics.DATABUS_REASSEMBLY.inc_label(outcome)
+
+    def _discard(self, sender: Any) -> None:
+        entry = self._entries.pop(sender)
+        self._bytes -= entry.size
+
+
+def _split_chunk_header(packet: Packet) -> tuple[int, int | None, Packet] | None:
+    """Return (index, total, data); `total` is only set on the final chunk."""
+    # chunk header: "<index>|<data>", final chunk "<CHUNK_LAST_INDEX>:<index>|<data>"
+    head = bytes(packet[:16])
+    sep = head.find(b"|")
+    if sep <= 0:
+        return None
+    index, colon, position = head[:sep].partition(b":")
+    if not index.isdigit():
+        return None
+    if not colon:
+        return int(index), None, packet[sep + 1 :]
+    if int(index) != CHUNK_LAST_INDEX or not position.isdigit():
+        return None
+    return int(position), int(position) + 1, packet[sep + 1 :]
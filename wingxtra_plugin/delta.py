@@ -0,0 +1,120 @@
+"""Delta-encoded telemetry payloads (`schema_version` 2).
+
+A keyframe carries every field. Deltas carry only the fields that moved
+beyond their tolerance since the last payload the server acknowledged,
+plus `seq`/`base_seq` so the server can tell which state a delta applies to.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+SCHEMA_VERSION = 2
+
+# always sent, never diffed
+_HEADER_FIELDS = ("drone_id", "ts")
+
+# absolute tolerance per `section.field`; unlisted numeric fields use exact comparison
+DEFAULT_TOLERANCES: dict[str, float] = {
+    "position.lat": 1e-6,  # ~0.1 m
+    "position.lon": 1e-6,
+    "position.alt_m": 0.5,
+    "attitude.yaw_deg": 1.0,
+    "velocity.groundspeed_mps": 0.2,
+    "battery.voltage_v": 0.05,
+    "battery.remaining_pct": 1.0,
+    "link.rssi_dbm": 2.0,
+}
+
+
+class DeltaEncoder:
+    """Turn full payloads into schema 2 keyframes and deltas.
+
+    Call `ack` after a payload was delivered and `reset` after a failed
+    send; the next payload after a reset, and one every
+    `keyframe_interval_seconds`, is a keyframe.
+    """
+
+    def __init__(
+        self,
+        keyframe_interval_seconds: float = 10.0,
+        tolerances: dict[str, float] | None = None,
+    ) -> None:
+        self._keyframe_interval = keyframe_interval_seconds
+        self._tolerances = DEFAULT_TOLERANCES if tolerances is None else tolerances
+        self._baseline: dict[str, dict[str, Any]] | None = None
+        self._base_seq = 0
+        self._last_keyframe = 0.0
+        self._seq = 0
+        self._sent: tuple[int, bool, dict[str, dict[str, Any]]] | None = None
+
+    def encode(self, payload: dict[str, Any], now: float | None = None) -> dict[str, Any]:
+        now = time.monotonic() if now is None else now
+        self._seq += 1
+        sections = {key: value for key, value in payload.items() if isinstance(value, dict)}
+
+        encoded: dict[str, Any] = {"schema_version": SCHEMA_VERSION, "seq": self._seq}
+        for key in _HEADER_FIELDS:
+            if key in payload:
+                encoded[key] = payload[key]
+
+        keyframe = self._baseline is None or now - self._last_keyframe >= self._keyframe_interval
+        if keyframe:
+            encoded["keyframe"] = True
+            encoded.update(sections)
+            self._last_keyframe = now
+            self._sent = (self._seq, True, sections)
+            return encoded
+
+        assert self._baseline is not None
+        changed = self._diff(sections, self._baseline)
+        encoded["keyframe"] = False
+        encoded["base_seq"] = self._base_seq
+        encoded.update(changed)
+        self._sent = (self._seq, False, changed)
+        return encoded
+
+    def ack(self) -> None:
+        """The last encoded payload was delivered; diff against it from now on."""
+        if self._sent is None:
+            return
+        seq, keyframe, sections = self._sent
+        if keyframe or self._baseline is None:
+            self._baseline = {key: dict(value) for key, value in sections.items()}
+        else:
+            for key, fields in sections.items():
+                self._baseline.setdefault(key, {}).update(fields)
+        self._base_seq = seq
+        self._sent = None
+
+    def reset(self) -> None:
+        """Forget the acknowledged state so the next payload is a keyframe."""
+        self._baseline = None
+        self._sent = None
+
+    def _diff(
+        self,
+        sections: dict[str, dict[str, Any]],
+        baseline: dict[str, dict[str, Any]],
+    ) -> dict[str, dict[str, Any]]:
+        changed: dict[str, dict[str, Any]] = {}
+        for key, fields in sections.items():
+            base = baseline.get(key, {})
+            for name, value in fields.items():
+                if name in base and not self._moved(f"{key}.{name}", base[name], value):
+                    continue
+                changed.setdefault(key, {})[name] = value
+        return changed
+
+    def _moved(self, path: str, old: Any, new: Any) -> bool:
+        tolerance = self._tolerances.get(path)
+        if (
+            tolerance is not None
+            and isinstance(old, (int, float))
+            and isinstance(new, (int, float))
+            and not isinstance(old, bool)
+            and not isinstance(new, bool)
+        ):
+            return abs(new - old) > tolerance
+        return old != new
@@ -0,0 +1,169 @@
+"""Critical telemetry events and the fast lane that uploads them.
+
+Battery threshold crossings, arm/disarm, mode changes and link loss are
+detected on the fused state as messages arrive, then posted right away on
+a dedicated thread and connection, independent of the send grid and of
+the routine loop's offline backoff.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any
+
+from .pipeline import OVERFLOW_DROP_OLDEST, PayloadQueue
+from .sender import TelemetrySender
+
+EVENT_BATTERY_LOW = "battery_low"
+EVENT_ARMED = "armed"
+EVENT_DISARMED = "disarmed"
+EVENT_MODE_CHANGE = "mode_change"
+EVENT_LINK_LOST = "link_lost"
+EVENT_LINK_RESTORED = "link_restored"
+
+
+def state_payload(drone_id: str, ts: str, sections: dict[str, Any]) -> dict[str, Any]:
+    """A schema 1 payload of the fused state sections, for event detection."""
+    return {"schema_version": 1, "drone_id": drone_id, "ts": ts, **sections}
+
+
+class EventDetector:
+    """Turn successive payloads into a list of critical events.
+
+    A battery event fires once per threshold on the way down; the level
+    re-arms after recovering `battery_hysteresis_pct` above it. The first
+    payload only sets the baseline for mode, armed and link transitions.
+    """
+
+    def __init__(
+        self,
+        battery_thresholds_pct: tuple[float, ...] = (30.0, 20.0, 10.0),
+        battery_hysteresis_pct: float = 2.0,
+        link_lost_rssi_dbm: float = -100.0,
+    ) -> None:
+        self._thresholds = tuple(sorted(battery_thresholds_pct, reverse=True))
+        self._hysteresis = battery_hysteresis_pct
+        self._link_lost_rssi = link_lost_rssi_dbm
+        self._battery_floor: float | None = None
+        self._armed: bool | None = None
+        self._mode: Any = None
+        self._link_up: bool | None = None
+
+    def detect(self, payload: dict[str, Any]) -> list[dict[str, Any]]:
+        events: list[dict[str, Any]] = []
+        self._battery(payload.get("battery") or {}, events)
+        self._state(payload.get("state") or {}, events)
+        self._link(payload.get("link") or {}, events)
+        return events
+
+    def _battery(self, battery: dict[str, Any], events: list[dict[str, Any]]) -> None:
+        remaining = battery.get("remaining_pct")
+        if not isinstance(remaining, (int, float)) or isinstance(remaining, bool):
+            return
+        crossed = [t for t in self._thresholds if remaining <= t]
+        floor = crossed[-1] if crossed else None
+        if floor is not None and (self._battery_floor is None or floor < self._battery_floor):
+            self._battery_floor = floor
+            events.append({"type": EVENT_BATTERY_LOW, "threshold_pct": floor, "remaining_pct": remaining})
+        elif self._battery_floor is not None and remaining > self._battery_floor + self._hysteresis:
+            self._battery_floor = floor
+
+    def _state(self, state: dict[str, Any], events: list[dict[str, Any]]) -> None:
+        armed = state.get("armed")
+        if isinstance(armed, bool):
+            if self._armed is not None and armed != self._armed:
+                events.append({"type": EVENT_ARMED if armed else EVENT_DISARMED})
+            self._armed = armed
+        mode = state.get("mode")
+        if mode is not None:
+            if self._mode is not None and mode != self._mode:
+                events.append({"type": EVENT_MODE_CHANGE, "from": self._mode, "to": mode})
+            self._mode = mode
+
+    def _link(self, link: dict[str, Any], events: list[dict[str, Any]]) -> None:
+        rssi = link.get("rssi_dbm")
+        if not isinstance(rssi, (int, float)) or isinstance(rssi, bool):
+            return
+        link_up = rssi >= self._link_lost_rssi
+        if self._link_up is not None and link_up != self._link_up:
+            events.append({"type": EVENT_LINK_RESTORED if link_up else EVENT_LINK_LOST, "rssi_dbm": rssi})
+        self._link_up = link_up
+
+
+class EventLane:
+    """Upload event payloads as soon as they are detected.
+
+    Each event payload gets up to `max_attempts` tries with exponential
+    backoff capped at `max_backoff_seconds`, then it is dropped: the
+    routine loop still carries the state that triggered it. At most
+    `maxsize` payloads wait; the oldest goes first when that overflows.
+    `observe` never blocks, so it is safe to call from an event loop.
+    """
+
+    def __init__(
+        self,
+        sender: TelemetrySender,
+        detector: EventDetector | None = None,
+        max_attempts: int = 5,
+        retry_backoff_seconds: float = 0.25,
+        max_backoff_seconds: float = 2.0,
+        maxsize: int = 64,
+    ) -> None:
+        self._sender = sender
+        self._detector = detector or EventDetector()
+        self._max_attempts = max(1, max_attempts)
+        self._backoff = retry_backoff_seconds
+        self._max_backoff = max_backoff_seconds
+        self._queue = PayloadQueue(maxsize=maxsize, policy=OVERFLOW_DROP_OLDEST)
+        self._thread: threading.Thread | None = None
+        self._logger = logging.getLogger(__name__)
+        self.sent = 0
+        self.abandoned = 0
+
+    def observe(
+        self,
+        payload: dict[str, Any],
+        detector: EventDetector | None = None,
+        api_key: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Detect events in `payload` and queue one event payload if any fired.
+
+        A gateway passes each drone's own `detector` and `api_key`.
+        """
+        events = (detector or self._detector).detect(payload)
+        if events:
+            self._logger.info(
+                "Telemetry events for %s: %s",
+                payload.get("drone_id"),
+                ", ".join(event["type"] for event in events),
+            )
+            self._queue.put(({**payload, "events": events}, api_key))
+        return events
+
+    def start(self) -> threading.Thread:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="wx-event-lane", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def _run(self) -> None:
+        while True:
+            self._deliver(*self._queue.get())
+
+    def _deliver(self, payload: dict[str, Any], api_key: str | None = None) -> bool:
+        for attempt in range(self._max_attempts):
+            try:
+                self._sender.send(payload, api_key=api_key)
+                self.sent += 1
+                return True
+            except Exception as exc:  # intentionally broad for resilience
+                if attempt + 1 == self._max_attempts:
+                    self._logger.error("Dropping telemetry event after %d attempts: %s", self._max_attempts, exc)
+                    break
+                delay = min(self._max_backoff, self._backoff * (2**attempt))
+                self._logger.warning("Event send failed (%s). Retrying in %.2fs", exc, delay)
+                time.sleep(delay)
+        self.abandoned += 1
+        return False
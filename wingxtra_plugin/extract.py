@@ -0,0 +1,67 @@
+"""Field extraction from DataBus commands with per-shape alias resolution.
+
+Producers use different key aliases (`lat`/`latitude`/`y`, ...) but each
+one sends the same key set every time. The first message of a key set
+("shape") decides which aliases it actually carries, and every later
+message of that shape only looks those keys up.
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from operator import itemgetter
+from typing import Any, Callable
+
+
+class ShapeExtractor:
+    """Pull one value per field, each from the first non-None alias in priority order.
+
+    Resolutions are cached for at most `max_shapes` shapes; the oldest
+    shape is evicted first.
+    """
+
+    def __init__(self, *fields: tuple[str, ...], max_shapes: int = 64) -> None:
+        self._fields = fields
+        self._empty = (None,) * len(fields)
+        self._max_shapes = max(1, max_shapes)
+        self._shapes: dict[tuple[str, ...], Callable[[dict[str, Any]], tuple[Any, ...]]] = {}
+
+    def __call__(self, data: dict[str, Any]) -> tuple[Any, ...]:
+        if not data:
+            return self._empty
+        shape = tuple(data)
+        getter = self._shapes.get(shape)
+        if getter is None:
+            getter = self._resolve(shape)
+        return getter(data)
+
+    @property
+    def cached_shapes(self) -> int:
+        return len(self._shapes)
+
+    def _resolve(self, shape: tuple[str, ...]) -> Callable[[dict[str, Any]], tuple[Any, ...]]:
+        present = set(shape)
+        # keep every present alias: a None value falls through to the next one
+        resolved = tuple(tuple(key for key in aliases if key in present) for aliases in self._fields)
+        getter: Callable[[dict[str, Any]], tuple[Any, ...]]
+        if len(resolved) > 1 and all(len(candidates) == 1 for candidates in resolved):
+            getter = itemgetter(*(candidates[0] for candidates in resolved))
+        else:
+            getter = partial(_first_non_none, resolved)
+
+        if len(self._shapes) >= self._max_shapes:
+            del self._shapes[next(iter(self._shapes))]
+        self._shapes[shape] = getter
+        return getter
+
+
+def _first_non_none(resolved: tuple[tuple[str, ...], ...], data: dict[str, Any]) -> tuple[Any, ...]:
+    values = []
+    for candidates in resolved:
+        value = None
+        for key in candidates:
+            value = data[key]
+            if value is not None:
+                break
+        values.append(value)
+    return tuple(values)
@@ -0,0 +1,316 @@
+"""Gateway mode: one process relays DataBus telemetry for many airframes.
+
+The parent process reads DataBus once and routes every message by its
+sender party ID. Drones from the table are spread over a pool of worker
+processes; each worker keeps the latest payload per drone and uploads
+them on the send grid over a small pool of keep-alive connections.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from .databus_client import TelemetryState, apply_message
+from .databus_lib.messages import ALT_PROTOCOL_SENDER_KEYS, ANDRUAV_PROTOCOL_SENDER
+from .events import EventDetector, EventLane, state_payload
+from .scheduler import RateScheduler
+from .sender import TelemetrySender, offline_backoff
+from .timestamps import message_iso_ts
+
+BuildPayload = Callable[[str, dict[str, Any]], "dict[str, Any] | None"]
+
+_STOP = None
+
+
+@dataclass(frozen=True)
+class DroneRoute:
+    drone_id: str
+    api_key: str | None = None
+
+
+@dataclass(frozen=True)
+class UploadSettings:
+    api_url: str
+    api_key: str
+    timeout_seconds: float = 3.0
+    compression: str = "none"
+    compression_min_bytes: int = 1024
+    wire_format: str = "json"
+    send_interval_seconds: float = 1 / 3
+    offline_backoff_seconds: float = 1.0
+    max_concurrency: int = 2
+    event_lane: bool = False
+    event_battery_thresholds: tuple[float, ...] = (30.0, 20.0, 10.0)
+    event_link_lost_rssi_dbm: float = -100.0
+    event_max_attempts: int = 5
+
+
+def load_drone_table(path: str) -> dict[str, DroneRoute]:
+    """Read `{"<party id>": "<drone id>" | {"drone_id": ..., "api_key": ...}}` from JSON."""
+    with open(path, encoding="utf-8") as fh:
+        raw = json.load(fh)
+    if not isinstance(raw, dict):
+        raise ValueError(f"Drone table {path} must be a JSON object keyed by party ID")
+
+    routes: dict[str, DroneRoute] = {}
+    for party_id, entry in raw.items():
+        if isinstance(entry, str):
+            routes[str(party_id)] = DroneRoute(entry)
+        elif isinstance(entry, dict) and entry.get("drone_id"):
+            routes[str(party_id)] = DroneRoute(str(entry["drone_id"]), entry.get("api_key") or None)
+        else:
+            raise ValueError(f"Drone table entry for {party_id!r} needs a drone_id")
+    return routes
+
+
+def sender_party_id(message: dict[str, Any]) -> str | None:
+    party_id = message.get(ANDRUAV_PROTOCOL_SENDER)
+    if party_id is None:
+        for key in ALT_PROTOCOL_SENDER_KEYS:
+            if message.get(key) is not None:
+                party_id = message[key]
+                break
+    return None if party_id is None else str(party_id)
+
+
+class Gateway:
+    """Route DataBus messages to per-drone state in `workers` sender processes.
+
+    Drones are assigned to workers round-robin in party ID order, so each
+    worker's share of the table is fixed for the life of the process.
+    Messages from unknown parties, and messages that would overflow a
+    worker inbox of `inbox_size`, are counted and dropped.
+    """
+
+    def __init__(
+        self,
+        routes: dict[str, DroneRoute],
+        build_payload: BuildPayload,
+        upload: UploadSettings,
+        workers: int = 1,
+        inbox_size: int = 1000,
+    ) -> None:
+        if not routes:
+            raise ValueError("Gateway needs at least one drone in its table")
+        self._routes = routes
+        self._build_payload = build_payload
+        self._upload = upload
+        self._worker_count = max(1, min(workers, len(routes)))
+        self._shard_of = {party_id: index % self._worker_count for index, party_id in enumerate(sorted(routes))}
+        self._inbox_size = inbox_size
+        self._inboxes: list[multiprocessing.Queue] = []
+        self._processes: list[multiprocessing.Process] = []
+        self._logger = logging.getLogger(__name__)
+        self._unknown_logged: set[str] = set()
+        self.unknown = 0
+        self.dropped = 0
+
+    @property
+    def worker_count(self) -> int:
+        return self._worker_count
+
+    def start(self) -> None:
+        for shard in range(self._worker_count):
+            routes = {party: route for party, route in self._routes.items() if self._shard_of[party] == shard}
+            inbox: multiprocessing.Queue = multiprocessing.Queue(self._inbox_size)
+            process = multiprocessing.Process(
+                target=_run_worker,
+                args=(inbox, routes, self._build_payload, self._upload),
+                name=f"wx-gateway-{shard}",
+                daemon=True,
+            )
+            process.start()
+            self._inboxes.append(inbox)
+            self._processes.append(process)
+        self._logger.info("Gateway serving %d drones with %d workers", len(self._routes), self._worker_count)
+
+    def dispatch(self, message: dict[str, Any]) -> bool:
+        """Hand `message` to the worker owning its sender; False if it was dropped."""
+        party_id = sender_party_id(message)
+        shard = self._shard_of.get(party_id) if party_id is not None else None
+        if shard is None:
+            self.unknown += 1
+            if party_id is not None and party_id not in self._unknown_logged and len(self._unknown_logged) < 100:
+                self._unknown_logged.add(party_id)
+                self._logger.info("Ignoring DataBus traffic from unknown party %s", party_id)
+            return False
+        try:
+            self._inboxes[shard].put_nowait((party_id, message))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def stop(self, timeout_seconds: float = 5.0) -> None:
+        """Ask every worker to flush its latest payloads and exit.
+
+        A worker whose inbox stays full, or that is still running after
+        `timeout_seconds`, is terminated without flushing.
+        """
+        deadline = time.monotonic() + timeout_seconds
+        for inbox, process in zip(self._inboxes, self._processes):
+            try:
+                inbox.put(_STOP, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                self._logger.warning("Gateway worker %s inbox is full; terminating it", process.name)
+                process.terminate()
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._inboxes.clear()
+        self._processes.clear()
+
+
+class _DroneSlot:
+    __slots__ = ("route", "state", "payload", "failures", "retry_at", "in_flight", "detector", "seen_version")
+
+    def __init__(self, route: DroneRoute, detector: EventDetector | None = None) -> None:
+        self.route = route
+        self.state = TelemetryState()
+        self.payload: dict[str, Any] | None = None
+        self.failures = 0
+        self.retry_at = 0.0
+        self.in_flight = False
+        self.detector = detector
+        self.seen_version = 0
+
+
+class _UploadPool:
+    """POST drone payloads on up to `upload.max_concurrency` keep-alive connections.
+
+    `submit` never blocks, so the worker keeps draining its inbox while a
+    slow or unreachable endpoint holds every connection. Each drone has at
+    most one request in flight; its slot is marked busy until the POST
+    finishes and carries the failure count and retry deadline.
+    """
+
+    def __init__(self, upload: UploadSettings) -> None:
+        self._upload = upload
+        self._work: queue.Queue = queue.Queue()
+        self._logger = logging.getLogger(__name__)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"wx-gateway-upload-{index}", daemon=True)
+            for index in range(max(1, upload.max_concurrency))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, slot: _DroneSlot, payload: dict[str, Any]) -> None:
+        slot.in_flight = True
+        self._work.put((slot, payload))
+
+    def close(self, timeout_seconds: float) -> None:
+        """Finish queued uploads, waiting at most `timeout_seconds` in total."""
+        deadline = time.monotonic() + timeout_seconds
+        for _ in self._threads:
+            self._work.put(_STOP)
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+    def _run(self) -> None:
+        upload = self._upload
+        sender = TelemetrySender(
+            upload.api_url,
+            upload.api_key,
+            timeout_seconds=upload.timeout_seconds,
+            compression=upload.compression,
+            compression_min_bytes=upload.compression_min_bytes,
+            wire_format=upload.wire_format,
+        )
+        try:
+            while True:
+                item = self._work.get()
+                if item is _STOP:
+                    return
+                slot, payload = item
+                try:
+                    sender.send(payload, api_key=slot.route.api_key)
+                    slot.failures = 0
+                except Exception as exc:  # intentionally broad for resilience
+                    slot.failures += 1
+                    delay = offline_backoff(upload.offline_backoff_seconds, slot.failures)
+                    slot.retry_at = time.monotonic() + delay
+                    self._logger.warning(
+                        "Send for %s failed (%s). Retrying in %.1fs", slot.route.drone_id, exc, delay
+                    )
+                finally:
+                    slot.in_flight = False
+        finally:
+            sender.close()
+
+
+def _run_worker(
+    inbox: multiprocessing.Queue,
+    routes: dict[str, DroneRoute],
+    build_payload: BuildPayload,
+    upload: UploadSettings,
+) -> None:
+    pool = _UploadPool(upload)
+    events: EventLane | None = None
+    if upload.event_lane:
+        # JSON on its own connection: the binary layout has no room for events
+        events = EventLane(
+            TelemetrySender(upload.api_url, upload.api_key, timeout_seconds=upload.timeout_seconds),
+            max_attempts=upload.event_max_attempts,
+        )
+        events.start()
+
+    def new_detector() -> EventDetector | None:
+        if events is None:
+            return None
+        return EventDetector(upload.event_battery_thresholds, link_lost_rssi_dbm=upload.event_link_lost_rssi_dbm)
+
+    slots = {party_id: _DroneSlot(route, new_detector()) for party_id, route in routes.items()}
+    scheduler = RateScheduler(upload.send_interval_seconds)
+
+    def flush() -> None:
+        now = time.monotonic()
+        for slot in slots.values():
+            # a busy drone keeps its newest payload for the next tick
+            if slot.payload is None or slot.in_flight or now < slot.retry_at:
+                continue
+            payload, slot.payload = slot.payload, None
+            pool.submit(slot, payload)
+
+    while True:
+        delay = scheduler.delay()
+        if delay > 0:
+            try:
+                item = inbox.get(timeout=delay)
+            except queue.Empty:
+                continue
+            if item is _STOP:
+                # let in-flight POSTs land so busy drones still flush their newest payload
+                deadline = time.monotonic() + upload.timeout_seconds
+                while any(slot.in_flight for slot in slots.values()) and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                flush()
+                pool.close(max(0.0, deadline - time.monotonic()) + upload.timeout_seconds)
+                return
+            party_id, message = item
+            slot = slots.get(party_id)
+            if slot is not None:
+                payload = build_payload(slot.route.drone_id, message)
+                if payload is not None:
+                    slot.payload = slot.state.merge_into(payload)
+                else:
+                    apply_message(slot.state, message)
+                if events is not None and slot.state.version != slot.seen_version:
+                    slot.seen_version = slot.state.version
+                    events.observe(
+                        state_payload(slot.route.drone_id, message_iso_ts(message), slot.state.to_payload()),
+                        detector=slot.detector,
+                        api_key=slot.route.api_key,
+                    )
+            continue
+        scheduler.tick()
+        flush()
@@ -0,0 +1,195 @@
+"""Pipeline counters and a Prometheus text endpoint (`METRICS_PORT`).
+
+Metrics are plain module-level objects updated without locks: an
+increment is one attribute or dict write under the GIL, so the hot path
+pays almost nothing, and a rare lost update between threads is an
+acceptable price. Nothing listens unless `start_metrics_server` is called.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Callable
+
+from .timestamps import iso_to_unix
+
+if TYPE_CHECKING:
+    from .scheduler import RateScheduler
+
+CONTENT_TYPE_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+AGE_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    """Monotonic count, optionally split by a single label."""
+
+    def __init__(self, name: str, help_text: str, label: str | None = None) -> None:
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.value = 0
+        self._values: dict[str, int] = {}
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+    def inc_label(self, label_value: Any, amount: int = 1) -> None:
+        key = str(label_value)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> list[tuple[str, float]]:
+        if self.label is None:
+            return [("", self.value)]
+        return [(f'{{{self.label}="{key}"}}', value) for key, value in sorted(self._values.items())]
+
+
+class Gauge:
+    """Last set value, or the result of `set_function` at scrape time."""
+
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help = help_text
+        self.value = 0.0
+        self._function: Callable[[], float] | None = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, function: Callable[[], float] | None) -> None:
+        self._function = function
+
+    def samples(self) -> list[tuple[str, float]]:
+        if self._function is not None:
+            try:
+                return [("", float(self._function()))]
+            except Exception:  # a broken source must not break the scrape
+                return []
+        return [("", self.value)]
+
+
+class Histogram:
+    """Cumulative buckets with fixed upper bounds, as Prometheus expects."""
+
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...]) -> None:
+        self.name = name
+        self.help = help_text
+        self._bounds = tuple(sorted(buckets))
+        self._counts = [0] * (len(self._bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self) -> list[tuple[str, float]]:
+        samples: list[tuple[str, float]] = []
+        running = 0
+        for bound, count in zip((*self._bounds, "+Inf"), self._counts):
+            running += count
+            samples.append((f'_bucket{{le="{bound}"}}', running))
+        samples.append(("_sum", self.sum))
+        samples.append(("_count", self.count))
+        return samples
+
+
+DATABUS_PACKETS = Counter("wx_databus_packets_total", "DataBus datagrams received or sniffed.", "source")
+DATABUS_BYTES = Counter("wx_databus_bytes_total", "DataBus payload bytes received or sniffed.", "source")
+DATABUS_FILTERED = Counter(
+    "wx_databus_filtered_total", "DataBus messages dropped by the subscription filter.", "message_type"
+)
+DATABUS_DECODE_FAILURES = Counter(
+    "wx_databus_decode_failures_total", "DataBus datagrams that were not a JSON object.", "source"
+)
+DATABUS_REASSEMBLY = Counter(
+    "wx_databus_reassembly_total", "Chunked DataBus messages by reassembly outcome.", "outcome"
+)
+PAYLOADS_BUILT = Counter("wx_payloads_built_total", "Telemetry payloads built from 9102 messages.")
+SEND_LATENCY = Histogram("wx_send_latency_seconds", "Fleet API request latency.", LATENCY_BUCKETS)
+HTTP_RESPONSES = Counter("wx_http_responses_total", "Fleet API responses by status code.", "status")
+SEND_FAILURES = Counter("wx_send_failures_total", "Sends that failed and started or extended backoff.")
+BACKOFF_SECONDS = Gauge("wx_send_backoff_seconds", "Current offline backoff delay; 0 while online.")
+QUEUE_DEPTH = Gauge("wx_queue_depth", "Payloads waiting in the acquisition-to-upload queue.")
+DATA_AGE = Histogram("wx_data_age_seconds", "Payload age from capture to a successful send.", AGE_BUCKETS)
+SEND_RATE_TARGET = Gauge("wx_send_rate_target_hz", "Send scheduler target rate.")
+SEND_RATE_ACHIEVED = Gauge("wx_send_rate_achieved_hz", "Send scheduler achieved rate over its recent window.")
+SEND_JITTER = Gauge("wx_send_jitter_seconds", "Standard deviation of send tick lateness.")
+SEND_SKIPPED_TICKS = Gauge("wx_send_skipped_ticks", "Send ticks skipped after overruns since start.")
+
+REGISTRY: tuple[Counter | Gauge | Histogram, ...] = (
+    DATABUS_PACKETS,
+    DATABUS_BYTES,
+    DATABUS_FILTERED,
+    DATABUS_DECODE_FAILURES,
+    DATABUS_REASSEMBLY,
+    PAYLOADS_BUILT,
+    SEND_LATENCY,
+    HTTP_RESPONSES,
+    SEND_FAILURES,
+    BACKOFF_SECONDS,
+    QUEUE_DEPTH,
+    DATA_AGE,
+    SEND_RATE_TARGET,
+    SEND_RATE_ACHIEVED,
+    SEND_JITTER,
+    SEND_SKIPPED_TICKS,
+)
+
+_TYPES = {Counter: "counter", Gauge: "gauge", Histogram: "histogram"}
+
+
+def observe_data_age(payload: dict[str, Any], now: float | None = None) -> None:
+    """Record how old `payload` is, judged by its `ts`."""
+    captured = iso_to_unix(payload.get("ts"))
+    if captured is not None:
+        DATA_AGE.observe(max(0.0, (time.time() if now is None else now) - captured))
+
+
+def track_scheduler(scheduler: RateScheduler) -> None:
+    """Read the send rate gauges from `scheduler` at scrape time."""
+    SEND_RATE_TARGET.set_function(lambda: scheduler.stats().target_hz)
+    SEND_RATE_ACHIEVED.set_function(lambda: scheduler.stats().achieved_hz)
+    SEND_JITTER.set_function(lambda: scheduler.stats().jitter_seconds)
+    SEND_SKIPPED_TICKS.set_function(lambda: scheduler.stats().skipped_ticks)
+
+
+def render(metrics: tuple[Counter | Gauge | Histogram, ...] = REGISTRY) -> str:
+    lines: list[str] = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {_TYPES[type(metric)]}")
+        for suffix, value in metric.samples():
+            lines.append(f"{metric.name}{suffix} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE_PROMETHEUS)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        return
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve `/metrics` on a daemon thread; port 0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="wx-metrics", daemon=True).start()
+    logging.getLogger(__name__).info("Serving metrics on http://%s:%d/metrics", host, server.server_address[1])
+    return server
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable
+
+OVERFLOW_LATEST = "latest"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_BLOCK = "block"
+OVERFLOW_POLICIES = (OVERFLOW_LATEST, OVERFLOW_DROP_OLDEST, OVERFLOW_BLOCK)
+
+
+@dataclass(frozen=True)
+class QueueStats:
+    depth: int
+    enqueued: int
+    coalesced: int
+    dropped: int
+
+
+class PayloadQueue:
+    """Bounded hand-off between the acquisition and upload threads.
+
+    When full, `latest` overwrites the newest queued item (with the default
+    size of 1 the sender always gets the freshest payload), `drop_oldest`
+    evicts the head, and `block` makes the producer wait.
+    """
+
+    def __init__(self, maxsize: int = 1, policy: str = OVERFLOW_LATEST) -> None:
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown queue overflow policy: {policy}")
+        self._maxsize = max(1, maxsize)
+        self._policy = policy
+        self._items: deque[Any] = deque()
+        self._cond = threading.Condition()
+        self._error: BaseException | None = None
+        self._enqueued = 0
+        self._coalesced = 0
+        self._dropped = 0
+
+    def put(self, item: Any) -> None:
+        with self._cond:
+            if len(self._items) >= self._maxsize:
+                if self._policy == OVERFLOW_LATEST:
+                    self._items[-1] = item
+                    self._coalesced += 1
+                    self._enqueued += 1
+                    self._cond.notify()
+                    return
+                if self._policy == OVERFLOW_DROP_OLDEST:
+                    self._items.popleft()
+                    self._dropped += 1
+                else:
+                    while len(self._items) >= self._maxsize:
+                        self._cond.wait()
+            self._items.append(item)
+            self._enqueued += 1
+            self._cond.notify_all()
+
+    def get(self, timeout: float | None = None) -> Any:
+        """Block until an item is available, or return None after `timeout` seconds.
+
+        Re-raises a producer failure.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._items:
+                if self._error is not None:
+                    raise RuntimeError("telemetry acquisition stopped") from self._error
+                if deadline is None:
+                    self._cond.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def fail(self, exc: BaseException) -> None:
+        with self._cond:
+            self._error = exc
+            self._cond.notify_all()
+
+    def stats(self) -> QueueStats:
+        with self._cond:
+            return QueueStats(
+                depth=len(self._items),
+                enqueued=self._enqueued,
+                coalesced=self._coalesced,
+                dropped=self._dropped,
+            )
+
+
+def start_reader(
+    get_payload: Callable[[], Any],
+    queue: PayloadQueue,
+    report_interval_seconds: float = 60.0,
+) -> threading.Thread:
+    """Run `get_payload` on a daemon thread, feeding `queue` until it raises."""
+    logger = logging.getLogger(__name__)
+
+    def run() -> None:
+        last_report = time.monotonic()
+        reported = queue.stats()
+        try:
+            while True:
+                queue.put(get_payload())
+                now = time.monotonic()
+                if now - last_report >= report_interval_seconds:
+                    stats = queue.stats()
+                    if stats.dropped != reported.dropped or stats.coalesced != reported.coalesced:
+                        logger.info(
+                            "Telemetry queue depth=%d coalesced=%d dropped=%d",
+                            stats.depth,
+                            stats.coalesced - reported.coalesced,
+                            stats.dropped - reported.dropped,
+                        )
+                    last_report, reported = now, stats
+        except BaseException as exc:  # hand the failure to the consumer thread
+            logger.error("Telemetry acquisition failed: %s", exc)
+            queue.fail(exc)
+
+    thread = threading.Thread(target=run, name="wx-telemetry-reader", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass
+
+OVERRUN_SKIP = "skip"
+OVERRUN_CATCH_UP = "catch_up"
+
+
+@dataclass(frozen=True)
+class SchedulerStats:
+    target_hz: float
+    achieved_hz: float
+    jitter_seconds: float
+    max_lateness_seconds: float
+    skipped_ticks: int
+
+
+class RateScheduler:
+    """Hold a fixed tick rate on monotonic deadlines instead of sleeping per call.
+
+    Deadlines advance by exactly one interval per tick, so time spent
+    acquiring and sending does not stretch the period. When a tick is missed
+    entirely, `skip` realigns to the next deadline on the grid while
+    `catch_up` fires late ticks back to back, at most `max_catch_up` of them.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float,
+        overrun_policy: str = OVERRUN_SKIP,
+        max_catch_up: int = 3,
+        window: int = 100,
+    ) -> None:
+        if overrun_policy not in (OVERRUN_SKIP, OVERRUN_CATCH_UP):
+            raise ValueError(f"Unknown overrun policy: {overrun_policy}")
+        self._interval = interval_seconds
+        self._policy = overrun_policy
+        self._max_catch_up = max(0, max_catch_up)
+        self._next: float | None = None
+        self._ticks: deque[float] = deque(maxlen=max(2, window))
+        self._lateness: deque[float] = deque(maxlen=max(2, window))
+        self._skipped = 0
+
+    def set_interval(self, interval_seconds: float) -> None:
+        """Change the period; the pending deadline moves to last tick + new interval."""
+        if self._next is not None:
+            self._next += interval_seconds - self._interval
+        self._interval = interval_seconds
+
+    def reset(self) -> None:
+        """Restart the deadline grid, e.g. after an offline backoff."""
+        self._next = None
+
+    def wait(self) -> None:
+        """Sleep until the next deadline and record the tick."""
+        delay = self.delay()
+        if delay > 0:
+            time.sleep(delay)
+        self.tick()
+
+    async def wait_async(self) -> None:
+        """`wait` for the asyncio runtime."""
+        delay = self.delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.tick()
+
+    def delay(self) -> float:
+        """Seconds until the next deadline; starts the grid on first use."""
+        now = time.monotonic()
+        if self._next is None:
+            self._next = now + self._interval
+        return self._next - now
+
+    def tick(self) -> None:
+        """Record a tick at the current time and advance the deadline."""
+        now = time.monotonic()
+        if self._next is None:
+            self._next = now
+        deadline = self._next
+        if now - deadline >= self._interval:
+            missed = math.floor((now - deadline) / self._interval)
+            if self._policy == OVERRUN_SKIP:
+                deadline += missed * self._interval
+                self._skipped += missed
+            elif missed > self._max_catch_up:
+                deadline += (missed - self._max_catch_up) * self._interval
+                self._skipped += missed - self._max_catch_up
+
+        self._ticks.append(now)
+        self._lateness.append(max(0.0, now - deadline))
+        self._next = deadline + self._interval
+
+    def stats(self) -> SchedulerStats:
+        achieved = 0.0
+        if len(self._ticks) >= 2 and self._ticks[-1] > self._ticks[0]:
+            achieved = (len(self._ticks) - 1) / (self._ticks[-1] - self._ticks[0])
+        lateness = list(self._lateness)
+        return SchedulerStats(
+            target_hz=1.0 / self._interval if self._interval > 0 else 0.0,
+            achieved_hz=achieved,
+            jitter_seconds=statistics.pstdev(lateness) if len(lateness) >= 2 else 0.0,
+            max_lateness_seconds=max(lateness, default=0.0),
+            skipped_ticks=self._skipped,
+        )
@@ -1,33 +1,350 @@
 from __future__ import annotations
 
-import json
+import gzip
+import http.client
 import logging
+import ssl
+import struct
 import time
+from collections import deque
+from dataclasses import dataclass
 from typing import Any
-from urllib import error, request
+from urllib import error
+from urllib.parse import urlsplit
+
+from . import codec, metrics, tracing
+from .adaptive import AdaptiveRate
+from .delta import DeltaEncoder
+from .scheduler import OVERRUN_SKIP, RateScheduler
+from .spool import Spool
+from .wire import CONTENT_TYPE_BINARY, encode_payload
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+# errors that mean a reused keep-alive connection was dropped by the peer
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+MAX_BACKOFF_SECONDS = 30.0
+
+CONTENT_TYPE_JSON = "application/json"
+CONTENT_TYPE_NDJSON = "application/x-ndjson"
+
+WIRE_FORMAT_JSON = "json"
+WIRE_FORMAT_BINARY = "binary"
+
+# request body codings in order of preference
+_COMPRESSORS: dict[str, Any] = {}
+if zstandard is not None:
+    _COMPRESSORS["zstd"] = zstandard.ZstdCompressor(level=3).compress
+_COMPRESSORS["gzip"] = lambda body: gzip.compress(body, compresslevel=6, mtime=0)
+
+
+@dataclass(frozen=True)
+class RequestTiming:
+    status: int
+    reused_connection: bool
+    connect_seconds: float
+    total_seconds: float
 
 
 class TelemetrySender:
-    def __init__(self, api_url: str, api_key: str, timeout_seconds: float = 3.0) -> None:
+    """POST telemetry to the Fleet API over one persistent HTTP(S) connection.
+
+    The connection is kept alive between sends, replaced after
+    `idle_timeout_seconds` of inactivity, and transparently re-opened once
+    if a reused connection turns out to have been closed by the server.
+
+    With `compression` set to `gzip`, `zstd` or `auto`, bodies of at least
+    `compression_min_bytes` are sent with a `Content-Encoding`. The usable
+    codings narrow to whatever the server lists in an `Accept-Encoding`
+    response header; a 415 reply resends the body uncompressed.
+
+    With `wire_format` set to `binary`, single payloads are sent in the
+    compact `wire` layout. A 415 reply, or a payload the layout cannot
+    represent, falls back to JSON; after a 415 JSON is used from then on.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        api_key: str,
+        timeout_seconds: float = 3.0,
+        idle_timeout_seconds: float = 30.0,
+        compression: str = "none",
+        compression_min_bytes: int = 1024,
+        wire_format: str = WIRE_FORMAT_JSON,
+    ) -> None:
+        if wire_format not in (WIRE_FORMAT_JSON, WIRE_FORMAT_BINARY):
+            raise ValueError(f"Unknown wire format: {wire_format}")
         self._api_url = api_url
         self._api_key = api_key
         self._timeout = timeout_seconds
+        self._idle_timeout = idle_timeout_seconds
+        self._encodings = _preferred_encodings(compression)
+        self._compression_min_bytes = compression_min_bytes
+        self._binary = wire_format == WIRE_FORMAT_BINARY
+
+        parts = urlsplit(api_url)
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname or ""
+        self._port = parts.port
+        self._path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self._ssl_context = ssl.create_default_context() if self._https else None
+
+        self._conn: http.client.HTTPConnection | None = None
+        self._last_used = 0.0
+        self.last_timing: RequestTiming | None = None
+
+    def send(self, payload: dict[str, Any], api_key: str | None = None) -> None:
+        """POST one payload, optionally authenticated with a per-drone `api_key`."""
+        # one serialize sample covers a failed binary encode and its JSON fallback
+        started = tracing.SERIALIZE.start()
+        binary_body = None
+        if self._binary:
+            try:
+                binary_body = encode_payload(payload)
+            except (ValueError, TypeError, struct.error):
+                pass  # not representable in the binary layout; send this one as JSON
+        body = binary_body if binary_body is not None else codec.dumps(payload)
+        tracing.SERIALIZE.stop(started)
+
+        if binary_body is not None:
+            status, resp_headers, _ = self._post_body(binary_body, CONTENT_TYPE_BINARY, api_key)
+            if status != 415:
+                if status >= 400:
+                    raise error.HTTPError(self._api_url, status, "HTTP error", hdrs=resp_headers, fp=None)
+                return
+            logging.getLogger(__name__).warning("Server rejected binary telemetry; using JSON")
+            self._binary = False
+            started = tracing.SERIALIZE.start()
+            body = codec.dumps(payload)
+            tracing.SERIALIZE.stop(started)
+
+        status, resp_headers, _ = self._post_body(body, CONTENT_TYPE_JSON, api_key)
+        if status >= 400:
+            raise error.HTTPError(self._api_url, status, "HTTP error", hdrs=resp_headers, fp=None)
+
+    def send_batch(self, items: list[bytes], ndjson: bool = False) -> list[int]:
+        """POST pre-encoded payloads as one JSON array (or NDJSON) body.
+
+        Returns one status per item. A 2xx response whose body is a list of
+        per-item results (or `{"results": [...]}`), each an int or an object
+        with a `status`, maps partial failures back to individual payloads;
+        otherwise every item gets the response status. Raises `HTTPError`
+        when the whole request fails.
+        """
+        if ndjson:
+            body = b"\n".join(items) + b"\n"
+            content_type = CONTENT_TYPE_NDJSON
+        else:
+            body = b"[" + b",".join(items) + b"]"
+            content_type = CONTENT_TYPE_JSON
+
+        status, resp_headers, resp_body = self._post_body(body, content_type)
+        if status >= 400:
+            raise error.HTTPError(self._api_url, status, "HTTP error", hdrs=resp_headers, fp=None)
+        return _per_item_statuses(resp_body, status, len(items))
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @property
+    def wire_format(self) -> str:
+        return WIRE_FORMAT_BINARY if self._binary else WIRE_FORMAT_JSON
+
+    @property
+    def content_encodings(self) -> tuple[str, ...]:
+        """Request body codings still considered usable, most preferred first."""
+        return tuple(self._encodings)
+
+    def _post_body(
+        self,
+        body: bytes,
+        content_type: str,
+        api_key: str | None = None,
+    ) -> tuple[int, http.client.HTTPMessage, bytes]:
+        headers = self._headers(content_type, api_key)
+        if not self._encodings or len(body) < self._compression_min_bytes:
+            return self._post(body, headers)
+
+        encoding = self._encodings[0]
+        compressed = _COMPRESSORS[encoding](body)
+        status, resp_headers, resp_body = self._post(compressed, {**headers, "Content-Encoding": encoding})
+        if status == 415:
+            # server refuses this coding: honour its Accept-Encoding and resend as identity
+            self._negotiate(resp_headers.get("Accept-Encoding"), rejected=encoding)
+            return self._post(body, headers)
 
-    def send(self, payload: dict[str, Any]) -> None:
-        body = json.dumps(payload).encode("utf-8")
-        req = request.Request(
-            self._api_url,
-            data=body,
-            method="POST",
-            headers={
-                "Content-Type": "application/json",
-                "X-API-Key": self._api_key,
-            },
+        self._negotiate(resp_headers.get("Accept-Encoding"))
+        return status, resp_headers, resp_body
+
+    def _negotiate(self, accept_encoding: str | None, rejected: str | None = None) -> None:
+        if accept_encoding is None:
+            if rejected is not None:
+                self._encodings = []
+            return
+        accepted = {item.split(";", 1)[0].strip().lower() for item in accept_encoding.split(",")}
+        self._encodings = [name for name in self._encodings if name in accepted and name != rejected]
+
+    def _headers(self, content_type: str, api_key: str | None = None) -> dict[str, str]:
+        return {
+            "Content-Type": content_type,
+            "X-API-Key": api_key or self._api_key,
+        }
+
+    def _post(self, body: bytes, headers: dict[str, str]) -> tuple[int, http.client.HTTPMessage, bytes]:
+        started = time.monotonic()
+        if self._conn is not None and started - self._last_used > self._idle_timeout:
+            self.close()
+
+        reused = self._conn is not None
+        try:
+            return self._request(body, headers, started, reused)
+        except _STALE_CONNECTION_ERRORS:
+            self.close()
+            if not reused:
+                raise
+        except Exception:
+            self.close()
+            raise
+
+        # the server dropped an idle keep-alive connection; retry once on a fresh one
+        try:
+            return self._request(body, headers, started, reused=False)
+        except Exception:
+            self.close()
+            raise
+
+    def _request(
+        self,
+        body: bytes,
+        headers: dict[str, str],
+        started: float,
+        reused: bool,
+    ) -> tuple[int, http.client.HTTPMessage, bytes]:
+        connect_seconds = 0.0
+        if self._conn is None:
+            conn = self._new_connection()
+            connect_started = time.monotonic()
+            conn.connect()
+            connect_seconds = time.monotonic() - connect_started
+            self._conn = conn
+
+        self._conn.request("POST", self._path, body=body, headers=headers)
+        resp = self._conn.getresponse()
+        resp_body = resp.read()  # drain so the connection can be reused
+        if resp.will_close:
+            self.close()
+
+        self._last_used = time.monotonic()
+        self.last_timing = RequestTiming(
+            status=resp.status,
+            reused_connection=reused,
+            connect_seconds=connect_seconds,
+            total_seconds=self._last_used - started,
+        )
+        metrics.SEND_LATENCY.observe(self.last_timing.total_seconds)
+        tracing.POST.record(self.last_timing.total_seconds)
+        metrics.HTTP_RESPONSES.inc_label(resp.status)
+        return resp.status, resp.headers, resp_body
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        if self._https:
+            return http.client.HTTPSConnection(
+                self._host, self._port, timeout=self._timeout, context=self._ssl_context
+            )
+        return http.client.HTTPConnection(self._host, self._port, timeout=self._timeout)
+
+
+class PayloadBatcher:
+    """Collect encoded payloads until a batch is due by count, size or age.
+
+    Holds at most `max_pending_items`; beyond that the oldest payloads are
+    dropped and counted in `dropped`.
+    """
+
+    def __init__(
+        self,
+        max_items: int = 20,
+        max_bytes: int = 64 * 1024,
+        max_age_seconds: float = 2.0,
+        max_pending_items: int = 1000,
+    ) -> None:
+        self._max_items = max(1, max_items)
+        self._max_bytes = max_bytes
+        self._max_age = max_age_seconds
+        self._max_pending = max(self._max_items, max_pending_items)
+        self._items: deque[tuple[float, bytes]] = deque()
+        self._bytes = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, payload: dict[str, Any], now: float | None = None) -> None:
+        encoded = codec.dumps(payload)
+        self._items.append((time.monotonic() if now is None else now, encoded))
+        self._bytes += len(encoded)
+        self._trim()
+
+    def requeue(self, items: list[tuple[float, bytes]]) -> None:
+        """Put drained items back at the front, keeping their original order."""
+        for item in reversed(items):
+            self._items.appendleft(item)
+            self._bytes += len(item[1])
+        self._trim()
+
+    def time_left(self, now: float | None = None) -> float | None:
+        """Seconds until the oldest pending item reaches `max_age_seconds`; None if empty."""
+        if not self._items:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._items[0][0] + self._max_age - now)
+
+    def ready(self, now: float | None = None) -> bool:
+        if not self._items:
+            return False
+        now = time.monotonic() if now is None else now
+        return (
+            len(self._items) >= self._max_items
+            or self._bytes >= self._max_bytes
+            or now - self._items[0][0] >= self._max_age
         )
-        with request.urlopen(req, timeout=self._timeout) as resp:
-            status = getattr(resp, "status", 200)
-            if status >= 400:
-                raise error.HTTPError(self._api_url, status, "HTTP error", hdrs=resp.headers, fp=None)
+
+    def drain(self) -> list[tuple[float, bytes]]:
+        """Take the oldest items that fit in one batch (always at least one)."""
+        batch: list[tuple[float, bytes]] = []
+        size = 0
+        while self._items and len(batch) < self._max_items:
+            item = self._items[0]
+            if batch and size + len(item[1]) > self._max_bytes:
+                break
+            self._items.popleft()
+            self._bytes -= len(item[1])
+            size += len(item[1])
+            batch.append(item)
+        return batch
+
+    def _trim(self) -> None:
+        while len(self._items) > self._max_pending:
+            _, encoded = self._items.popleft()
+            self._bytes -= len(encoded)
+            self.dropped += 1
+
+
+def offline_backoff(base_seconds: float, failures: int) -> float:
+    """Delay before retrying after `failures` consecutive failed sends."""
+    return min(MAX_BACKOFF_SECONDS, base_seconds * (2 ** min(failures, 8)))
 
 
 def send_loop(
@@ -36,18 +353,253 @@ def send_loop(
     sender: TelemetrySender,
     send_interval_seconds: float,
     offline_backoff_seconds: float,
+    overrun_policy: str = OVERRUN_SKIP,
+    scheduler: RateScheduler | None = None,
+    report_interval_seconds: float = 60.0,
+    delta: DeltaEncoder | None = None,
+    rate: AdaptiveRate | None = None,
 ) -> None:
+    """Send one payload per tick; with `delta`, as schema 2 keyframes and deltas.
+
+    With `rate`, the tick interval follows the adaptive rate and payloads
+    inside its dead-band are skipped.
+    """
     logger = logging.getLogger(__name__)
     failures = 0
+    scheduler = scheduler or RateScheduler(send_interval_seconds, overrun_policy=overrun_policy)
+    metrics.track_scheduler(scheduler)
+    last_report = time.monotonic()
 
     while True:
+        last_report = _report_rate(logger, scheduler, last_report, report_interval_seconds)
         payload = get_payload()
+        if rate is not None:
+            send = rate.observe(payload)
+            scheduler.set_interval(rate.interval_seconds)
+            if not send:
+                scheduler.wait()
+                continue
         try:
-            sender.send(payload)
+            sender.send(payload if delta is None else delta.encode(payload))
             failures = 0
-            time.sleep(send_interval_seconds)
+            metrics.BACKOFF_SECONDS.set(0.0)
+            metrics.observe_data_age(payload)
+            if delta is not None:
+                delta.ack()
+            scheduler.wait()
         except Exception as exc:  # intentionally broad for resilience
+            if delta is not None:
+                delta.reset()
             failures += 1
-            delay = min(30.0, offline_backoff_seconds * (2 ** min(failures, 8)))
+            delay = offline_backoff(offline_backoff_seconds, failures)
+            metrics.SEND_FAILURES.inc()
+            metrics.BACKOFF_SECONDS.set(delay)
             logger.warning("Send failed (%s). Retrying in %.1fs", exc, delay)
             time.sleep(delay)
+            scheduler.reset()
+
+
+def send_batch_loop(
+    *,
+    get_payload,
+    sender: TelemetrySender,
+    batcher: PayloadBatcher,
+    send_interval_seconds: float,
+    offline_backoff_seconds: float,
+    ndjson: bool = False,
+    overrun_policy: str = OVERRUN_SKIP,
+    scheduler: RateScheduler | None = None,
+    report_interval_seconds: float = 60.0,
+) -> None:
+    """Send payloads in batches once `batcher` says one is due.
+
+    `get_payload(timeout=...)` returns None when no payload arrived in time,
+    so a partial batch still goes out at its max age when the source is quiet.
+    Payloads already queued are drained without waiting, so a backlog
+    leaves in full batches rather than one payload per send interval.
+    """
+    logger = logging.getLogger(__name__)
+    failures = 0
+    scheduler = scheduler or RateScheduler(send_interval_seconds, overrun_policy=overrun_policy)
+    metrics.track_scheduler(scheduler)
+    last_report = time.monotonic()
+
+    while True:
+        last_report = _report_rate(logger, scheduler, last_report, report_interval_seconds)
+        payload = get_payload(timeout=batcher.time_left())
+        while payload is not None:
+            batcher.add(payload)
+            if batcher.ready():
+                break
+            payload = get_payload(timeout=0)
+        if not batcher.ready():
+            scheduler.wait()
+            continue
+
+        batch = batcher.drain()
+        try:
+            statuses = sender.send_batch([encoded for _, encoded in batch], ndjson=ndjson)
+        except Exception as exc:  # intentionally broad for resilience
+            batcher.requeue(batch)
+            failures += 1
+            delay = offline_backoff(offline_backoff_seconds, failures)
+            metrics.SEND_FAILURES.inc()
+            metrics.BACKOFF_SECONDS.set(delay)
+            logger.warning("Batch send failed (%s). Retrying in %.1fs", exc, delay)
+            time.sleep(delay)
+            scheduler.reset()
+            continue
+
+        failures = 0
+        metrics.BACKOFF_SECONDS.set(0.0)
+        retry = [item for item, status in zip(batch, statuses) if _is_retryable(status)]
+        rejected = sum(1 for status in statuses if status >= 400 and not _is_retryable(status))
+        if retry or rejected:
+            logger.warning(
+                "Batch partially failed: %d of %d payloads to retry, %d rejected",
+                len(retry),
+                len(batch),
+                rejected,
+            )
+            batcher.requeue(retry)
+        scheduler.wait()
+
+
+def store_and_forward_loop(
+    *,
+    get_payload,
+    sender: TelemetrySender,
+    spool: Spool,
+    send_interval_seconds: float,
+    offline_backoff_seconds: float,
+    replay_batch_items: int = 50,
+    replay_interval_seconds: float = 1.0,
+    overrun_policy: str = OVERRUN_SKIP,
+    scheduler: RateScheduler | None = None,
+    report_interval_seconds: float = 60.0,
+) -> None:
+    """Send live payloads at the configured rate, spooling them to disk while offline.
+
+    During backoff every payload is appended to `spool` instead of being
+    dropped. Once a live send succeeds again, the backlog is replayed oldest
+    first, at most `replay_batch_items` per `replay_interval_seconds`, in
+    between the live sends.
+    """
+    logger = logging.getLogger(__name__)
+    failures = 0
+    retry_at = 0.0
+    last_replay = 0.0
+    scheduler = scheduler or RateScheduler(send_interval_seconds, overrun_policy=overrun_policy)
+    metrics.track_scheduler(scheduler)
+    last_report = time.monotonic()
+
+    def go_offline(exc: Exception) -> None:
+        nonlocal failures, retry_at
+        failures += 1
+        delay = offline_backoff(offline_backoff_seconds, failures)
+        retry_at = time.monotonic() + delay
+        metrics.SEND_FAILURES.inc()
+        metrics.BACKOFF_SECONDS.set(delay)
+        logger.warning("Send failed (%s). Spooling, retrying in %.1fs", exc, delay)
+
+    while True:
+        last_report = _report_rate(logger, scheduler, last_report, report_interval_seconds)
+        payload = get_payload()
+        now = time.monotonic()
+        if failures and now < retry_at:
+            spool.append(codec.dumps(payload))
+            scheduler.wait()
+            continue
+
+        try:
+            sender.send(payload)
+        except Exception as exc:  # intentionally broad for resilience
+            spool.append(codec.dumps(payload))
+            go_offline(exc)
+            scheduler.wait()
+            continue
+        failures = 0
+        metrics.BACKOFF_SECONDS.set(0.0)
+        metrics.observe_data_age(payload)
+
+        if now - last_replay >= replay_interval_seconds and spool.has_backlog():
+            last_replay = now
+            try:
+                _replay_spool(spool, sender, replay_batch_items)
+            except Exception as exc:  # intentionally broad for resilience
+                go_offline(exc)
+        scheduler.wait()
+
+
+def _replay_spool(spool: Spool, sender: TelemetrySender, max_items: int) -> None:
+    records = spool.read_batch(max_items)
+    if not records:
+        return
+    statuses = sender.send_batch([record for record, _ in records])
+    delivered = 0
+    for status in statuses:
+        if _is_retryable(status):
+            break
+        delivered += 1
+    if delivered:
+        spool.commit(records[delivered - 1][1])
+    if delivered < len(records):
+        raise RuntimeError(f"replay stopped at status {statuses[delivered]}")
+
+
+def _per_item_statuses(resp_body: bytes, status: int, count: int) -> list[int]:
+    try:
+        decoded = codec.loads(resp_body) if resp_body else None
+    except ValueError:
+        decoded = None
+    if isinstance(decoded, dict):
+        decoded = decoded.get("results")
+    if not isinstance(decoded, list) or len(decoded) != count:
+        return [status] * count
+
+    statuses: list[int] = []
+    for result in decoded:
+        if isinstance(result, dict):
+            result = result.get("status", status)
+        statuses.append(result if isinstance(result, int) else status)
+    return statuses
+
+
+def _report_rate(
+    logger: logging.Logger,
+    scheduler: RateScheduler,
+    last_report: float,
+    interval_seconds: float,
+) -> float:
+    """Log achieved rate and jitter once per `interval_seconds`; returns the last report time."""
+    now = time.monotonic()
+    if now - last_report < interval_seconds:
+        return last_report
+    rate = scheduler.stats()
+    logger.info(
+        "Send rate %.2f/%.2f Hz, jitter %.1f ms, max lateness %.1f ms, skipped ticks=%d",
+        rate.achieved_hz,
+        rate.target_hz,
+        rate.jitter_seconds * 1000,
+        rate.max_lateness_seconds * 1000,
+        rate.skipped_ticks,
+    )
+    return now
+
+
+def _is_retryable(status: int) -> bool:
+    return status == 429 or status >= 500
+
+
+def _preferred_encodings(compression: str) -> list[str]:
+    compression = compression.strip().lower()
+    if compression in ("", "none", "identity"):
+        return []
+    if compression == "auto":
+        return list(_COMPRESSORS)
+    if compression not in ("gzip", "zstd"):
+        raise ValueError(f"Unknown HTTP compression: {compression}")
+    if compression not in _COMPRESSORS:
+        logging.getLogger(__name__).warning("%s compression unavailable; using gzip", compression)
+        return ["gzip"]
+    return [compression]
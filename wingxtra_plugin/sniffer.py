@@ -1,73 +1,431 @@
 from __future__ import annotations
 
-import json
+import ctypes
+import logging
+import mmap
+import select
 import socket
+import struct
 import time
-from typing import Any
+import zlib
+from collections import OrderedDict, deque
+from typing import Any, Callable, Iterator
+
+from . import codec, metrics, tracing
+from .timestamps import CAPTURE_TS_KEY, TIMESTAMP_ANCBUF_SIZE, capture_time, enable_kernel_timestamps
+
+ETH_P_ALL = 0x0003
+SO_ATTACH_FILTER = getattr(socket, "SO_ATTACH_FILTER", 26)
+
+CAPTURE_SOCKET = "socket"
+CAPTURE_RING = "ring"
+
+# packet mmap ring (linux/if_packet.h)
+SOL_PACKET = getattr(socket, "SOL_PACKET", 263)
+PACKET_RX_RING = 5
+PACKET_VERSION = 10
+TPACKET_V3 = 2
+TP_STATUS_KERNEL = 0
+TP_STATUS_USER = 1
+TPACKET3_HDRLEN = 48  # TPACKET_ALIGN(sizeof(struct tpacket3_hdr)); sockaddr_ll follows
+
+PACKET_OUTGOING = 4
+ARPHRD_LOOPBACK = 772
+
+# classic BPF opcodes (linux/filter.h)
+_BPF_LD_H_ABS = 0x28
+_BPF_LD_B_ABS = 0x30
+_BPF_LD_H_IND = 0x48
+_BPF_LDX_B_MSH = 0xB1
+_BPF_JEQ_K = 0x15
+_BPF_JSET_K = 0x45
+_BPF_RET_K = 0x06
+
+_U16_BE = struct.Struct("!H")
+_UDP_DST_LEN = struct.Struct("!HH")
+_BLOCK_STATUS = struct.Struct("=I")
+_BLOCK_PKTS = struct.Struct("=III")  # num_pkts, offset_to_first_pkt, blk_len
+_TPACKET3_HDR = struct.Struct("=IIIIIIHH")  # next_offset, sec, nsec, snaplen, len, status, mac, net
+_SLL_HATYPE_PKTTYPE = struct.Struct("=HB")
+
+logger = logging.getLogger(__name__)
+
+
+class DataBusSniffer:
+    """Long-lived sniffer yielding UDP JSON payloads destined for `port` on `iface`.
+
+    Keeps one raw socket open for its whole lifetime so that frames arriving
+    between reads are queued by the kernel instead of being lost.
+    With `bpf_filter` enabled a classic BPF program is attached so that only
+    IPv4/UDP frames for `port` are copied to userspace. `capture="ring"`
+    switches from per-packet `recv()` to a TPACKET_V3 mmap ring that is
+    walked one block at a time.
+
+    On loopback every datagram is seen twice (outgoing and host copy); the
+    outgoing copy is dropped by packet type, and a short-lived dedup cache
+    keyed on IP id and payload checksum catches any remaining repeats
+    before JSON decoding.
+    Requires Linux raw socket privileges (root / CAP_NET_RAW).
+    """
+
+    def __init__(
+        self,
+        port: int,
+        iface: str = "lo",
+        poll_timeout_s: float = 0.2,
+        bpf_filter: bool = True,
+        capture: str = CAPTURE_SOCKET,
+        ring_block_size: int = 1 << 18,
+        ring_block_count: int = 8,
+        dedup_ttl_s: float = 0.25,
+        dedup_max_entries: int = 256,
+    ) -> None:
+        if capture not in (CAPTURE_SOCKET, CAPTURE_RING):
+            raise ValueError(f"Unknown capture mode: {capture}")
+        self._port = port
+        self._iface = iface
+        self._poll_timeout = poll_timeout_s
+        self._bpf_filter = bpf_filter
+        self._capture = capture
+        self._ring_block_size = ring_block_size
+        self._ring_block_count = ring_block_count
+        self._sock: socket.socket | None = None
+        self._ring: _PacketRing | None = None
+        self._pending: deque[dict[str, Any]] = deque()
+        self._dedup = _DedupCache(dedup_ttl_s, dedup_max_entries) if dedup_ttl_s > 0 else None
+
+    @property
+    def is_open(self) -> bool:
+        return self._sock is not None
+
+    def open(self) -> None:
+        if self._sock is not None:
+            return
+        sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.ntohs(ETH_P_ALL))
+        try:
+            if self._bpf_filter:
+                # attach before bind so foreign frames never get queued
+                try:
+                    attach_bpf_filter(sock, build_udp_dst_port_filter(self._port))
+                except OSError as exc:
+                    logger.warning("BPF filter unavailable (%s); filtering in userspace", exc)
+            if self._capture == CAPTURE_RING:
+                self._ring = _PacketRing(sock, self._ring_block_size, self._ring_block_count)
+            else:
+                enable_kernel_timestamps(sock)
+            sock.bind((self._iface, 0))
+            sock.settimeout(self._poll_timeout)
+        except OSError:
+            if self._ring is not None:
+                self._ring.close()
+                self._ring = None
+            sock.close()
+            raise
+        self._sock = sock
+
+    def close(self) -> None:
+        self._pending.clear()
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self) -> "DataBusSniffer":
+        self.open()
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        while True:
+            message = self.read()
+            if message is not None:
+                yield message
+
+    def fileno(self) -> int:
+        self.open()
+        assert self._sock is not None
+        return self._sock.fileno()
+
+    def drain(self) -> list[dict[str, Any]]:
+        """Return every message already captured, without blocking."""
+        self.open()
+        assert self._sock is not None
+        if self._ring is not None:
+            while self._ring.drain_block(self._port, 0.0, self._pending.append, self._dedup):
+                pass
+        else:
+            self._sock.setblocking(False)
+            try:
+                while True:
+                    try:
+                        packet, ancdata, _flags, addr = self._sock.recvmsg(65535, TIMESTAMP_ANCBUF_SIZE)
+                    except BlockingIOError:
+                        break
+                    self._handle_packet(packet, addr, capture_time(ancdata))
+            finally:
+                self._sock.settimeout(self._poll_timeout)
+
+        messages = list(self._pending)
+        self._pending.clear()
+        return messages
+
+    def read(self, timeout_s: float | None = None) -> dict[str, Any] | None:
+        """Return the next decoded DataBus dict, or None once `timeout_s` elapses.
+
+        With `timeout_s=None` this blocks until a message arrives.
+        """
+        self.open()
+        deadline = None if timeout_s is None else time.monotonic() + timeout_s
+
+        while not self._pending:
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            self._fill_pending()
+        return self._pending.popleft()
+
+    def _fill_pending(self) -> None:
+        if self._ring is not None:
+            self._ring.drain_block(self._port, self._poll_timeout, self._pending.append, self._dedup)
+            return
+
+        assert self._sock is not None
+        try:
+            packet, ancdata, _flags, addr = self._sock.recvmsg(65535, TIMESTAMP_ANCBUF_SIZE)
+        except socket.timeout:
+            return
+        self._handle_packet(packet, addr, capture_time(ancdata))
+
+    def _handle_packet(self, packet: bytes, addr: tuple[Any, ...], captured_at: float | None) -> None:
+        if _is_loopback_outgoing(addr[3], addr[2]):
+            return
+        decoded = _decode_databus_packet(packet, self._port, dedup=self._dedup, captured_at=captured_at)
+        if decoded is not None:
+            self._pending.append(decoded)
+
+
+class _PacketRing:
+    """TPACKET_V3 receive ring mapped into userspace.
+
+    The kernel fills whole blocks of frames; each ready block is walked in
+    place through a memoryview and then handed back to the kernel.
+    """
+
+    def __init__(self, sock: socket.socket, block_size: int, block_count: int, retire_ms: int = 10) -> None:
+        frame_size = 2048
+        sock.setsockopt(SOL_PACKET, PACKET_VERSION, TPACKET_V3)
+        req = struct.pack(
+            "=7I",
+            block_size,
+            block_count,
+            frame_size,
+            (block_size * block_count) // frame_size,
+            retire_ms,
+            0,
+            0,
+        )
+        sock.setsockopt(SOL_PACKET, PACKET_RX_RING, req)
+        self._block_size = block_size
+        self._block_count = block_count
+        self._map = mmap.mmap(
+            sock.fileno(),
+            block_size * block_count,
+            mmap.MAP_SHARED,
+            mmap.PROT_READ | mmap.PROT_WRITE,
+        )
+        self._view = memoryview(self._map)
+        self._poller = select.poll()
+        self._poller.register(sock.fileno(), select.POLLIN | select.POLLERR)
+        self._next_block = 0
+
+    def drain_block(
+        self,
+        port: int,
+        timeout_s: float,
+        emit: Callable[[dict[str, Any]], None],
+        dedup: _DedupCache | None = None,
+    ) -> bool:
+        """Decode every DataBus frame in the next ready block, waiting up to `timeout_s`.
+
+        Returns False if no block became ready in time.
+        """
+        view = self._view
+        block = self._next_block * self._block_size
+        if not _BLOCK_STATUS.unpack_from(view, block + 8)[0] & TP_STATUS_USER:
+            self._poller.poll(int(timeout_s * 1000))
+            if not _BLOCK_STATUS.unpack_from(view, block + 8)[0] & TP_STATUS_USER:
+                return False
+
+        num_pkts, frame, _blk_len = _BLOCK_PKTS.unpack_from(view, block + 12)
+        frame += block
+        for _ in range(num_pkts):
+            next_offset, sec, nsec, snaplen, _len, _status, mac, _net = _TPACKET3_HDR.unpack_from(view, frame)
+            hatype, pkttype = _SLL_HATYPE_PKTTYPE.unpack_from(view, frame + TPACKET3_HDRLEN + 8)
+            if not _is_loopback_outgoing(hatype, pkttype):
+                start = frame + mac
+                decoded = _decode_databus_packet(view, port, start, start + snaplen, dedup, sec + nsec * 1e-9)
+                if decoded is not None:
+                    emit(decoded)
+            frame += next_offset
+
+        _BLOCK_STATUS.pack_into(view, block + 8, TP_STATUS_KERNEL)
+        self._next_block = (self._next_block + 1) % self._block_count
+        return True
+
+    def close(self) -> None:
+        self._view.release()
+        self._map.close()
+
+
+class _DedupCache:
+    """Bounded set of recently seen frame keys with time-based eviction."""
+
+    def __init__(self, ttl_s: float, max_entries: int) -> None:
+        self._ttl = ttl_s
+        self._max_entries = max(1, max_entries)
+        self._entries: OrderedDict[tuple[int, int, int], float] = OrderedDict()
+
+    def seen(self, key: tuple[int, int, int], now: float | None = None) -> bool:
+        """Return True if `key` was recorded within the TTL, else record it."""
+        now = time.monotonic() if now is None else now
+        entries = self._entries
+        while entries:
+            oldest_key, expires = next(iter(entries.items()))
+            if expires > now:
+                break
+            del entries[oldest_key]
+
+        if key in entries:
+            return True
+        entries[key] = now + self._ttl
+        if len(entries) > self._max_entries:
+            entries.popitem(last=False)
+        return False
 
 
 def sniff_de_databus_json(port: int, iface: str = "lo", timeout_s: float = 1.0) -> dict[str, Any] | None:
     """Sniff one UDP JSON payload destined for `port` on `iface`.
 
-    Requires Linux raw socket privileges (root / CAP_NET_RAW).
+    One-shot convenience wrapper; long-running consumers should keep a
+    `DataBusSniffer` open instead.
     """
+    sniffer = DataBusSniffer(port, iface=iface)
     try:
-        sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.ntohs(0x0003))
+        sniffer.open()
     except OSError:
         return None
 
-    try:
-        sock.bind((iface, 0))
-        sock.settimeout(0.2)
-        deadline = time.time() + timeout_s
+    with sniffer:
+        return sniffer.read(timeout_s=timeout_s)
 
-        while time.time() < deadline:
-            try:
-                packet = sock.recv(65535)
-            except socket.timeout:
-                continue
 
-            payload = _extract_udp_payload_for_dst_port(packet, port)
-            if payload is None:
-                continue
+def build_udp_dst_port_filter(dst_port: int) -> list[tuple[int, int, int, int]]:
+    """Build a classic BPF program accepting IPv4/UDP frames to `dst_port`.
 
-            try:
-                decoded = json.loads(payload.decode("utf-8", errors="ignore"))
-            except json.JSONDecodeError:
-                continue
-            if isinstance(decoded, dict):
-                return decoded
+    Non-first IP fragments are rejected since they carry no UDP header.
+    """
+    return [
+        (_BPF_LD_H_ABS, 0, 0, 12),  # ethertype
+        (_BPF_JEQ_K, 0, 8, 0x0800),
+        (_BPF_LD_B_ABS, 0, 0, 23),  # ip protocol
+        (_BPF_JEQ_K, 0, 6, 17),
+        (_BPF_LD_H_ABS, 0, 0, 20),  # ip flags + fragment offset
+        (_BPF_JSET_K, 4, 0, 0x1FFF),
+        (_BPF_LDX_B_MSH, 0, 0, 14),  # x = ip header length
+        (_BPF_LD_H_IND, 0, 0, 16),  # udp destination port
+        (_BPF_JEQ_K, 0, 1, dst_port),
+        (_BPF_RET_K, 0, 0, 0x40000),
+        (_BPF_RET_K, 0, 0, 0),
+    ]
+
+
+def attach_bpf_filter(sock: socket.socket, program: list[tuple[int, int, int, int]]) -> None:
+    raw = b"".join(struct.pack("HBBI", *insn) for insn in program)
+    buf = ctypes.create_string_buffer(raw, len(raw))
+    fprog = struct.pack("HP", len(program), ctypes.addressof(buf))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+
+
+def _decode_databus_packet(
+    packet: bytes | memoryview,
+    port: int,
+    start: int = 0,
+    end: int | None = None,
+    dedup: _DedupCache | None = None,
+    captured_at: float | None = None,
+) -> dict[str, Any] | None:
+    bounds = _udp_payload_bounds(packet, port, start, end)
+    if bounds is None:
+        return None
+
+    payload_start, payload_end = bounds
+    payload = memoryview(packet)[payload_start:payload_end]
+    metrics.DATABUS_PACKETS.inc_label("sniff")
+    metrics.DATABUS_BYTES.inc_label("sniff", payload_end - payload_start)
+    if dedup is not None:
+        ip_id = _U16_BE.unpack_from(packet, start + 18)[0]
+        if dedup.seen((ip_id, len(payload), zlib.crc32(payload))):
+            return None
+
+    if captured_at is not None:
+        tracing.CAPTURE.record(time.time() - captured_at)
+    started = tracing.DECODE.start()
+    try:
+        decoded = codec.loads(payload)
+    except ValueError:
+        decoded = None
+    tracing.DECODE.stop(started)
+    if not isinstance(decoded, dict):
+        metrics.DATABUS_DECODE_FAILURES.inc_label("sniff")
         return None
-    finally:
-        sock.close()
+    if captured_at is not None:
+        decoded[CAPTURE_TS_KEY] = captured_at
+    return decoded
+
+
+def _is_loopback_outgoing(hatype: int, pkttype: int) -> bool:
+    return pkttype == PACKET_OUTGOING and hatype == ARPHRD_LOOPBACK
 
 
 def _extract_udp_payload_for_dst_port(packet: bytes, dst_port: int) -> bytes | None:
-    if len(packet) < 42:
+    bounds = _udp_payload_bounds(packet, dst_port)
+    if bounds is None:
         return None
-    eth_proto = int.from_bytes(packet[12:14], "big")
+    return packet[bounds[0] : bounds[1]]
+
+
+def _udp_payload_bounds(
+    packet: bytes | memoryview,
+    dst_port: int,
+    start: int = 0,
+    end: int | None = None,
+) -> tuple[int, int] | None:
+    """Locate the UDP payload of an Ethernet frame in `packet[start:end]` without copying."""
+    if end is None:
+        end = len(packet)
+    if end - start < 42:
+        return None
+    eth_proto = _U16_BE.unpack_from(packet, start + 12)[0]
     if eth_proto != 0x0800:  # IPv4 only
         return None
 
-    ip_start = 14
-    if len(packet) < ip_start + 20:
-        return None
+    ip_start = start + 14
     ihl = (packet[ip_start] & 0x0F) * 4
     protocol = packet[ip_start + 9]
     if protocol != 17:  # UDP
         return None
 
     udp_start = ip_start + ihl
-    if len(packet) < udp_start + 8:
+    if end < udp_start + 8:
         return None
 
-    dst = int.from_bytes(packet[udp_start + 2 : udp_start + 4], "big")
+    dst, udp_len = _UDP_DST_LEN.unpack_from(packet, udp_start + 2)
     if dst != dst_port:
         return None
 
-    udp_len = int.from_bytes(packet[udp_start + 4 : udp_start + 6], "big")
     payload_start = udp_start + 8
-    payload_end = payload_start + max(0, udp_len - 8)
-    if payload_end > len(packet):
-        payload_end = len(packet)
-    return packet[payload_start:payload_end]
+    payload_end = min(end, payload_start + max(0, udp_len - 8))
+    return payload_start, payload_end
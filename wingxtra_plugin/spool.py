@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from typing import BinaryIO
+
+SEGMENT_SUFFIX = ".seg"
+CURSOR_FILE = "cursor"
+
+_RECORD_HEADER = struct.Struct("<II")  # payload length, crc32
+
+
+@dataclass(frozen=True, order=True)
+class SpoolPosition:
+    segment: int
+    offset: int
+
+
+class Spool:
+    """Append-only, segmented on-disk spool of encoded payloads.
+
+    Records are framed as `<length><crc32><bytes>` and appended to numbered
+    segment files; a new segment starts every `segment_max_bytes` and on
+    every restart. Writes are fsynced every `fsync_every` records or
+    `fsync_interval_seconds`. The replay cursor is persisted separately, so
+    delivery is at-least-once across restarts. Closed segments are dropped
+    oldest-first beyond `max_total_bytes` or once older than `max_age_seconds`.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_max_bytes: int = 4 * 1024 * 1024,
+        max_total_bytes: int = 256 * 1024 * 1024,
+        max_age_seconds: float = 7 * 24 * 3600,
+        fsync_every: int = 32,
+        fsync_interval_seconds: float = 1.0,
+    ) -> None:
+        self._dir = directory
+        self._segment_max_bytes = segment_max_bytes
+        self._max_total_bytes = max_total_bytes
+        self._max_age = max_age_seconds
+        self._fsync_every = max(1, fsync_every)
+        self._fsync_interval = fsync_interval_seconds
+        self._logger = logging.getLogger(__name__)
+
+        os.makedirs(directory, exist_ok=True)
+        self._segments = sorted(
+            int(name[: -len(SEGMENT_SUFFIX)])
+            for name in os.listdir(directory)
+            if name.endswith(SEGMENT_SUFFIX) and name[: -len(SEGMENT_SUFFIX)].isdigit()
+        )
+        self._cursor = self._load_cursor()
+        self._writer: BinaryIO | None = None
+        self._writer_segment: int | None = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.dropped_segments = 0
+        self.corrupt_records = 0
+        self._enforce_retention()
+
+    def append(self, record: bytes) -> None:
+        writer = self._writer
+        if writer is None or writer.tell() >= self._segment_max_bytes:
+            writer = self._rotate()
+        writer.write(_RECORD_HEADER.pack(len(record), zlib.crc32(record)))
+        writer.write(record)
+
+        self._unsynced += 1
+        if self._unsynced >= self._fsync_every or time.monotonic() - self._last_sync >= self._fsync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        if self._writer is not None and self._unsynced:
+            self._writer.flush()
+            os.fsync(self._writer.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def has_backlog(self) -> bool:
+        if not self._segments:
+            return False
+        if self._cursor.segment < self._segments[-1]:
+            return True
+        if self._writer is not None:
+            self._writer.flush()
+        return self._cursor.offset < self._segment_size(self._segments[-1])
+
+    def read_batch(self, max_items: int) -> list[tuple[bytes, SpoolPosition]]:
+        """Read up to `max_items` records after the cursor, each with its end position.
+
+        Nothing is consumed until `commit` is called with one of the positions.
+        """
+        if self._writer is not None:
+            self._writer.flush()
+
+        records: list[tuple[bytes, SpoolPosition]] = []
+        segment, offset = self._cursor.segment, self._cursor.offset
+        while len(records) < max_items and segment in self._segments:
+            exhausted = self._read_segment(segment, offset, max_items - len(records), records)
+            if not exhausted or segment == self._writer_segment:
+                break
+            following = [seg for seg in self._segments if seg > segment]
+            if not following:
+                break
+            segment, offset = following[0], 0
+            if not records:
+                # skip past an empty or corrupt tail without replaying anything
+                self._cursor = SpoolPosition(segment, 0)
+        return records
+
+    def commit(self, position: SpoolPosition) -> None:
+        """Mark everything up to `position` as delivered and drop consumed segments."""
+        self._cursor = position
+        for segment in [seg for seg in self._segments if seg < position.segment]:
+            self._remove_segment(segment)
+        tmp_path = os.path.join(self._dir, CURSOR_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            fh.write(f"{position.segment} {position.offset}\n")
+        os.replace(tmp_path, os.path.join(self._dir, CURSOR_FILE))
+
+    def close(self) -> None:
+        self.sync()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def _read_segment(
+        self,
+        segment: int,
+        offset: int,
+        limit: int,
+        records: list[tuple[bytes, SpoolPosition]],
+    ) -> bool:
+        """Append records of one segment; return True once its end (or corruption) is reached."""
+        with open(self._segment_path(segment), "rb") as fh:
+            fh.seek(offset)
+            while limit > 0:
+                header = fh.read(_RECORD_HEADER.size)
+                if not header:
+                    return True
+                if len(header) < _RECORD_HEADER.size:
+                    break
+                length, crc = _RECORD_HEADER.unpack(header)
+                data = fh.read(length)
+                if len(data) < length or zlib.crc32(data) != crc:
+                    break
+                offset = fh.tell()
+                records.append((data, SpoolPosition(segment, offset)))
+                limit -= 1
+            else:
+                return False
+
+        # torn or corrupt record: nothing after it in this segment can be trusted
+        self.corrupt_records += 1
+        self._logger.warning("Spool segment %d is corrupt after offset %d; skipping rest", segment, offset)
+        if segment == self._writer_segment:
+            self._rotate()
+        else:
+            # cut the bad tail so has_backlog and later reads stop at the last good record
+            with open(self._segment_path(segment), "r+b") as fh:
+                fh.truncate(offset)
+        return True
+
+    def _rotate(self) -> BinaryIO:
+        if self._writer is not None:
+            self.sync()
+            self._writer.close()
+        segment = (self._segments[-1] + 1) if self._segments else 0
+        self._segments.append(segment)
+        self._writer = open(self._segment_path(segment), "ab")
+        self._writer_segment = segment
+        self._enforce_retention()
+        return self._writer
+
+    def _enforce_retention(self) -> None:
+        closed = [seg for seg in self._segments if seg != self._writer_segment]
+        total = sum(self._segment_size(seg) for seg in self._segments)
+        cutoff = time.time() - self._max_age
+        for segment in closed:
+            if total <= self._max_total_bytes and os.path.getmtime(self._segment_path(segment)) >= cutoff:
+                break
+            total -= self._segment_size(segment)
+            self._remove_segment(segment)
+            self.dropped_segments += 1
+
+        if self._segments and self._cursor.segment < self._segments[0]:
+            self._cursor = SpoolPosition(self._segments[0], 0)
+
+    def _remove_segment(self, segment: int) -> None:
+        self._segments.remove(segment)
+        try:
+            os.remove(self._segment_path(segment))
+        except FileNotFoundError:
+            pass
+
+    def _load_cursor(self) -> SpoolPosition:
+        try:
+            with open(os.path.join(self._dir, CURSOR_FILE), encoding="utf-8") as fh:
+                segment, offset = (int(part) for part in fh.read().split())
+        except (OSError, ValueError):
+            segment, offset = (self._segments[0] if self._segments else 0), 0
+        return SpoolPosition(segment, offset)
+
+    def _segment_size(self, segment: int) -> int:
+        try:
+            return os.path.getsize(self._segment_path(segment))
+        except OSError:
+            return 0
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self._dir, f"{segment:012d}{SEGMENT_SUFFIX}")
@@ -1,18 +1,26 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
 from typing import Any
 
+from .extract import ShapeExtractor
+from .timestamps import iso_now, message_iso_ts
+
+_POSITION_FIELDS = ShapeExtractor(
+    ("lat", "latitude"),
+    ("lon", "lng", "longitude"),
+    ("alt_m", "alt", "altitude", "altitude_m", "relative_alt"),
+)
+
 
 def iso_utc_now() -> str:
-    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+    return iso_now()
 
 
 def map_databus_to_payload(drone_id: str, data: dict[str, Any]) -> dict[str, Any]:
     payload: dict[str, Any] = {
         "schema_version": 1,
         "drone_id": drone_id,
-        "ts": iso_utc_now(),
+        "ts": message_iso_ts(data),
     }
 
     position = _extract_position(data)
@@ -49,13 +57,13 @@ def _extract_position(data: dict[str, Any]) -> dict[str, float] | None:
 
     source = next((item for item in position_candidates if isinstance(item, dict)), {})
 
-    lat = _first_available(source, data, keys=("lat", "latitude"))
-    lon = _first_available(source, data, keys=("lon", "lng", "longitude"))
-    alt = _first_available(
-        source,
-        data,
-        keys=("alt_m", "alt", "altitude", "altitude_m", "relative_alt"),
-    )
+    lat, lon, alt = _POSITION_FIELDS(source)
+    if lat is None or lon is None or alt is None:
+        # fall back to top-level keys for whatever the position object lacks
+        top_lat, top_lon, top_alt = _POSITION_FIELDS(data)
+        lat = top_lat if lat is None else lat
+        lon = top_lon if lon is None else lon
+        alt = top_alt if alt is None else alt
 
     lat_f = _coerce_float(lat)
     lon_f = _coerce_float(lon)
@@ -70,16 +78,6 @@ def _extract_position(data: dict[str, Any]) -> dict[str, float] | None:
     }
 
 
-def _first_available(primary: dict[str, Any], fallback: dict[str, Any], keys: tuple[str, ...]) -> Any:
-    for key in keys:
-        if key in primary and primary[key] is not None:
-            return primary[key]
-    for key in keys:
-        if key in fallback and fallback[key] is not None:
-            return fallback[key]
-    return None
-
-
 def _coerce_float(value: Any, default: float | None = None) -> float | None:
     try:
         return float(value)
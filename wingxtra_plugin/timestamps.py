@@ -0,0 +1,112 @@
+"""Capture-time stamps for DataBus messages and a cheap ISO 8601 formatter.
+
+Sockets ask the kernel for SO_TIMESTAMPNS receive times; decoded messages
+carry that time (Unix seconds) under `CAPTURE_TS_KEY`, so payload `ts`
+reflects when the sample arrived rather than when the payload was built.
+"""
+
+from __future__ import annotations
+
+import socket
+import struct
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+CAPTURE_TS_KEY = "_capture_ts"
+
+# Linux asm-generic values; not exported by the socket module
+SO_TIMESTAMPNS = getattr(socket, "SO_TIMESTAMPNS", 35)
+SCM_TIMESTAMPNS = SO_TIMESTAMPNS
+
+_TIMESPEC = struct.Struct("@ll")  # struct timespec: tv_sec, tv_nsec as native longs
+TIMESTAMP_ANCBUF_SIZE = socket.CMSG_SPACE(_TIMESPEC.size)
+
+
+def enable_kernel_timestamps(sock: socket.socket) -> bool:
+    """Request SO_TIMESTAMPNS on `sock`; False if the platform refuses."""
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+    except OSError:
+        return False
+    return True
+
+
+def capture_time(ancdata: list[tuple[int, int, bytes]]) -> float | None:
+    """Unix receive time from `recvmsg` ancillary data, if the kernel attached one."""
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == SCM_TIMESTAMPNS and len(data) >= _TIMESPEC.size:
+            sec, nsec = _TIMESPEC.unpack_from(data)
+            return sec + nsec * 1e-9
+    return None
+
+
+class IsoFormatter:
+    """Format Unix times as `YYYY-MM-DDTHH:MM:SS.mmmZ`, reusing the seconds prefix.
+
+    `now()` reads the monotonic clock against a wall-clock anchor that is
+    refreshed every `reanchor_seconds`, so stamps stay ordered between
+    re-anchors even if the wall clock steps.
+    """
+
+    def __init__(self, reanchor_seconds: float = 60.0) -> None:
+        self._reanchor = reanchor_seconds
+        # pairs are swapped as whole tuples so threads never see a torn update
+        self._anchor = (time.monotonic(), time.time())
+        self._cached: tuple[int, str] = (-1, "")
+
+    def now(self) -> str:
+        return self.format(self.time())
+
+    def time(self) -> float:
+        mono = time.monotonic()
+        anchor_mono, anchor_wall = self._anchor
+        if mono - anchor_mono >= self._reanchor:
+            anchor_mono, anchor_wall = self._anchor = (mono, time.time())
+        return anchor_wall + (mono - anchor_mono)
+
+    def format(self, unix_seconds: float) -> str:
+        second = int(unix_seconds)
+        # round to microseconds first, like datetime, then truncate to millis
+        micros = round((unix_seconds - second) * 1e6)
+        if micros >= 1_000_000:
+            second, micros = second + 1, 0
+        cached_second, prefix = self._cached
+        if second != cached_second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._cached = (second, prefix)
+        return f"{prefix}.{micros // 1000:03d}Z"
+
+
+_formatter = IsoFormatter()
+
+
+def iso_now() -> str:
+    return _formatter.now()
+
+
+def capture_clock() -> float:
+    """Monotonic-anchored Unix time, for transports without kernel stamps."""
+    return _formatter.time()
+
+
+def iso_to_unix(ts: Any) -> float | None:
+    """Parse a payload `ts` back to Unix seconds; None if it is not ISO 8601."""
+    if not isinstance(ts, str):
+        return None
+    try:
+        # Python 3.10 does not accept the trailing Z
+        parsed = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def message_iso_ts(message: dict[str, Any]) -> str:
+    """ISO `ts` for a payload built from `message`: its capture time, else now."""
+    captured = message.get(CAPTURE_TS_KEY)
+    if isinstance(captured, float):
+        return _formatter.format(captured)
+    return _formatter.now()
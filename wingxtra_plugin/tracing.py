@@ -0,0 +1,215 @@
+"""Sampled per-stage timings and an on-demand profiler.
+
+Each pipeline stage owns a `StageTimer`. With `TRACE_SAMPLE_EVERY=N`, one
+call in N is timed and the duration kept in that stage's ring buffer; at
+0 a stage costs one attribute test. `SIGUSR1` logs a summary and
+`SIGUSR2` starts or stops a profiler that writes its result to
+`PROFILE_DIR`:
+
+- `sample` snapshots every thread's stack each `interval_seconds`, so
+  the reader, event lane and sender threads all show up. Output is
+  collapsed stacks (`*.folded`) for flamegraph tools.
+- `cprofile` runs `cProfile` on the main thread (the send loop or the
+  event loop) and writes a `*.prof` file for `pstats` or snakeviz.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+
+PROFILE_SAMPLE = "sample"
+PROFILE_CPROFILE = "cprofile"
+PROFILE_MODES = (PROFILE_SAMPLE, PROFILE_CPROFILE)
+
+
+@dataclass(frozen=True)
+class StageSummary:
+    stage: str
+    samples: int
+    p50_seconds: float
+    p95_seconds: float
+    max_seconds: float
+
+
+class StageTimer:
+    """Times one call in `sample_every` into a ring of the last `capacity` samples."""
+
+    __slots__ = ("name", "samples", "_every", "_calls")
+
+    def __init__(self, name: str, sample_every: int = 0, capacity: int = 512) -> None:
+        self.name = name
+        self.samples: deque[float] = deque(maxlen=max(1, capacity))
+        self._every = max(0, sample_every)
+        self._calls = 0
+
+    def configure(self, sample_every: int, capacity: int) -> None:
+        self._every = max(0, sample_every)
+        self._calls = 0
+        self.samples = deque(self.samples, maxlen=max(1, capacity))
+
+    def start(self) -> float:
+        """A start time if this call is sampled, else 0.0; pass it to `stop`."""
+        if not self._every:
+            return 0.0
+        self._calls += 1
+        if self._calls % self._every:
+            return 0.0
+        return time.perf_counter()
+
+    def stop(self, started: float) -> None:
+        if started:
+            self.samples.append(time.perf_counter() - started)
+
+    def record(self, seconds: float) -> None:
+        """Add a duration measured elsewhere, subject to the same sampling."""
+        if self.start():
+            self.samples.append(seconds)
+
+    def summary(self) -> StageSummary:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return StageSummary(self.name, 0, 0.0, 0.0, 0.0)
+        return StageSummary(
+            self.name,
+            len(ordered),
+            ordered[len(ordered) // 2],
+            ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            ordered[-1],
+        )
+
+
+# pipeline order: kernel receive -> json decode -> type filter -> payload map -> serialize -> POST
+CAPTURE = StageTimer("capture")
+DECODE = StageTimer("decode")
+FILTER = StageTimer("filter")
+MAP = StageTimer("map")
+SERIALIZE = StageTimer("serialize")
+POST = StageTimer("post")
+STAGES = (CAPTURE, DECODE, FILTER, MAP, SERIALIZE, POST)
+
+
+def configure(sample_every: int, capacity: int = 512) -> None:
+    for stage in STAGES:
+        stage.configure(sample_every, capacity)
+
+
+def summary() -> list[StageSummary]:
+    return [stage.summary() for stage in STAGES]
+
+
+def format_summary(summaries: list[StageSummary] | None = None) -> str:
+    lines = [f"{'stage':<10} {'samples':>8} {'p50 us':>10} {'p95 us':>10} {'max us':>10}"]
+    for item in summary() if summaries is None else summaries:
+        lines.append(
+            f"{item.stage:<10} {item.samples:>8} {item.p50_seconds * 1e6:>10.1f} "
+            f"{item.p95_seconds * 1e6:>10.1f} {item.max_seconds * 1e6:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+class StackSampler:
+    """Count every thread's stack, sampled from a daemon thread."""
+
+    def __init__(self, interval_seconds: float = 0.005) -> None:
+        self._interval = interval_seconds
+        self._stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="wx-stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            for stack, count in self._stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self._interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                frames.append(names.get(ident, str(ident)))
+                self._stacks[";".join(reversed(frames))] += 1
+
+
+class ProfileToggle:
+    """Start a profile on the first `toggle()` and write it out on the next."""
+
+    def __init__(self, directory: str, mode: str = PROFILE_SAMPLE, interval_seconds: float = 0.005) -> None:
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self._directory = directory
+        self._mode = mode
+        self._interval = interval_seconds
+        self._active: cProfile.Profile | StackSampler | None = None
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def active(self) -> bool:
+        return self._active is not None
+
+    def toggle(self) -> str | None:
+        """Returns the written file's path when a profile was stopped."""
+        if self._active is None:
+            if self._mode == PROFILE_CPROFILE:
+                profiler = cProfile.Profile()
+                profiler.enable()
+                self._active = profiler
+            else:
+                sampler = StackSampler(self._interval)
+                sampler.start()
+                self._active = sampler
+            self._logger.info("Profiling started (%s)", self._mode)
+            return None
+
+        active, self._active = self._active, None
+        os.makedirs(self._directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        if isinstance(active, cProfile.Profile):
+            active.disable()
+            path = os.path.join(self._directory, f"wx-{os.getpid()}-{stamp}.prof")
+            active.dump_stats(path)
+        else:
+            active.stop()
+            path = os.path.join(self._directory, f"wx-{os.getpid()}-{stamp}.folded")
+            active.dump(path)
+        self._logger.info("Profile written to %s", path)
+        return path
+
+
+def install_signal_handlers(profile: ProfileToggle | None = None) -> None:
+    """SIGUSR1 logs the stage summary; SIGUSR2 toggles `profile` if given.
+
+    Must be called from the main thread; a no-op where the signals do not exist.
+    """
+    logger = logging.getLogger(__name__)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda _signum, _frame: logger.info("Stage timings\n%s", format_summary()))
+    if profile is not None and hasattr(signal, "SIGUSR2"):
+        signal.signal(signal.SIGUSR2, lambda _signum, _frame: profile.toggle())
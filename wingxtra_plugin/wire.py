@@ -0,0 +1,160 @@
+"""Compact binary encoding of schema 1 telemetry payloads.
+
+Layout (little-endian)::
+
+    u8  format version (1)
+    u8  presence bits, see FIELD_*
+    i64 ts, milliseconds since the Unix epoch
+    u8  drone_id length, utf-8 bytes
+    if FIELD_POSITION: i32 lat*1e7, i32 lon*1e7, i32 alt centimetres
+    if FIELD_YAW:      u16 yaw centidegrees in [0, 36000)
+    if FIELD_SPEED:    u16 groundspeed cm/s
+    if FIELD_VOLTAGE:  u16 battery millivolts
+    if FIELD_BATTERY:  i8  battery remaining %
+    if FIELD_RSSI:     i8  rssi dBm
+    if FIELD_STATE:    u8  armed, u8 mode length, utf-8 bytes
+
+A typical 9102-derived payload packs into about 40 bytes instead of ~200 of JSON.
+"""
+
+from __future__ import annotations
+
+import struct
+from datetime import datetime, timezone
+from typing import Any
+
+CONTENT_TYPE_BINARY = "application/vnd.wingxtra.telemetry.v1+binary"
+FORMAT_VERSION = 1
+
+FIELD_POSITION = 0x01
+FIELD_YAW = 0x02
+FIELD_SPEED = 0x04
+FIELD_VOLTAGE = 0x08
+FIELD_BATTERY = 0x10
+FIELD_RSSI = 0x20
+FIELD_STATE = 0x40
+
+_HEADER = struct.Struct("<BBq")
+_POSITION = struct.Struct("<iii")
+_U16 = struct.Struct("<H")
+_I8 = struct.Struct("<b")
+_U8 = struct.Struct("<B")
+
+
+def encode_payload(payload: dict[str, Any]) -> bytes:
+    """Pack a schema 1 payload; raises ValueError if it does not fit the layout."""
+    if payload.get("schema_version") != 1:
+        raise ValueError("binary encoding only supports schema_version 1")
+
+    mask = 0
+    body = bytearray(_short_string(payload.get("drone_id", "")))
+
+    position = payload.get("position") or {}
+    lat, lon = position.get("lat"), position.get("lon")
+    if lat is not None and lon is not None:
+        mask |= FIELD_POSITION
+        body += _POSITION.pack(
+            round(float(lat) * 1e7),
+            round(float(lon) * 1e7),
+            round(float(position.get("alt_m") or 0.0) * 100),
+        )
+
+    yaw = (payload.get("attitude") or {}).get("yaw_deg")
+    if yaw is not None:
+        mask |= FIELD_YAW
+        body += _U16.pack(round(float(yaw) * 100) % 36000)
+
+    speed = (payload.get("velocity") or {}).get("groundspeed_mps")
+    if speed is not None:
+        mask |= FIELD_SPEED
+        body += _U16.pack(_clamp(round(float(speed) * 100), 0, 0xFFFF))
+
+    battery = payload.get("battery") or {}
+    if battery.get("voltage_v") is not None:
+        mask |= FIELD_VOLTAGE
+        body += _U16.pack(_clamp(round(float(battery["voltage_v"]) * 1000), 0, 0xFFFF))
+    if battery.get("remaining_pct") is not None:
+        mask |= FIELD_BATTERY
+        body += _I8.pack(_clamp(round(float(battery["remaining_pct"])), -128, 127))
+
+    rssi = (payload.get("link") or {}).get("rssi_dbm")
+    if rssi is not None:
+        mask |= FIELD_RSSI
+        body += _I8.pack(_clamp(round(float(rssi)), -128, 127))
+
+    state = payload.get("state")
+    if state:
+        mask |= FIELD_STATE
+        body += _U8.pack(1 if state.get("armed") else 0)
+        body += _short_string(state.get("mode") or "")
+
+    return _HEADER.pack(FORMAT_VERSION, mask, _epoch_ms(payload.get("ts"))) + bytes(body)
+
+
+def decode_payload(data: bytes) -> dict[str, Any]:
+    """Inverse of `encode_payload`, for servers and tests."""
+    version, mask, ts_ms = _HEADER.unpack_from(data)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary telemetry version {version}")
+    offset = _HEADER.size
+    drone_id, offset = _read_short_string(data, offset)
+
+    ts = datetime.fromtimestamp(ts_ms / 1000, timezone.utc)
+    payload: dict[str, Any] = {
+        "schema_version": 1,
+        "drone_id": drone_id,
+        "ts": ts.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+    }
+    if mask & FIELD_POSITION:
+        lat, lon, alt_cm = _POSITION.unpack_from(data, offset)
+        offset += _POSITION.size
+        payload["position"] = {"lat": lat / 1e7, "lon": lon / 1e7, "alt_m": alt_cm / 100}
+    if mask & FIELD_YAW:
+        payload["attitude"] = {"yaw_deg": _U16.unpack_from(data, offset)[0] / 100}
+        offset += _U16.size
+    if mask & FIELD_SPEED:
+        payload["velocity"] = {"groundspeed_mps": _U16.unpack_from(data, offset)[0] / 100}
+        offset += _U16.size
+    if mask & (FIELD_VOLTAGE | FIELD_BATTERY):
+        battery: dict[str, Any] = {"voltage_v": None, "remaining_pct": None}
+        if mask & FIELD_VOLTAGE:
+            battery["voltage_v"] = _U16.unpack_from(data, offset)[0] / 1000
+            offset += _U16.size
+        if mask & FIELD_BATTERY:
+            battery["remaining_pct"] = _I8.unpack_from(data, offset)[0]
+            offset += _I8.size
+        payload["battery"] = battery
+    if mask & FIELD_RSSI:
+        payload["link"] = {"rssi_dbm": _I8.unpack_from(data, offset)[0]}
+        offset += _I8.size
+    if mask & FIELD_STATE:
+        armed = bool(_U8.unpack_from(data, offset)[0])
+        mode, offset = _read_short_string(data, offset + _U8.size)
+        payload["state"] = {"armed": armed, "mode": mode}
+    return payload
+
+
+def _short_string(value: Any) -> bytes:
+    encoded = str(value).encode("utf-8")
+    if len(encoded) > 0xFF:
+        raise ValueError("string field longer than 255 bytes")
+    return _U8.pack(len(encoded)) + encoded
+
+
+def _read_short_string(data: bytes, offset: int) -> tuple[str, int]:
+    length = data[offset]
+    start = offset + 1
+    return data[start : start + length].decode("utf-8"), start + length
+
+
+def _epoch_ms(ts: Any) -> int:
+    if not isinstance(ts, str):
+        raise ValueError("binary encoding needs an ISO 8601 ts")
+    parsed = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return round(parsed.timestamp() * 1000)
+
+
+def _clamp(value: int, low: int, high: int) -> int:
+    return max(low, min(high, value))